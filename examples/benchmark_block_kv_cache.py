@@ -0,0 +1,101 @@
+# coding=utf-8
+# Copyright 2026 The Alibaba Qwen team.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measure the per-step cost of the talker `BlockKVCache` against a `DynamicCache`.
+
+Both caches are driven with random keys/values shaped like the talker of the 1.7B model, without running the model:
+for every decode step the script times one `update` per layer. `BlockKVCache.update` writes the new token in place and
+reallocates a layer once every `block_size` steps; `DynamicCache.update` concatenates the whole cache with the new token
+on every step. The table shows both at growing context lengths.
+
+    python examples/benchmark_block_kv_cache.py --batch-sizes 1 8 32 --context-lengths 256 1024 2048
+"""
+import argparse
+import time
+
+import torch
+from transformers.cache_utils import DynamicCache
+
+from qwen_tts.engine import BlockKVCache
+
+
+def synchronize(device):
+    if torch.device(device).type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def time_block_cache(args, batch_size, context_length, dtype):
+    cache = BlockKVCache(
+        num_layers=args.num_layers,
+        block_size=args.block_size,
+        max_num_blocks=batch_size * ((context_length + args.steps) // args.block_size + 1),
+    )
+    prompt = torch.randn(batch_size, args.num_kv_heads, context_length, args.head_dim, dtype=dtype, device=args.device)
+    for layer_idx in range(args.num_layers):
+        cache.update(prompt, prompt, layer_idx)
+
+    step = torch.randn(batch_size, args.num_kv_heads, 1, args.head_dim, dtype=dtype, device=args.device)
+    synchronize(args.device)
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        for layer_idx in range(args.num_layers):
+            cache.update(step, step, layer_idx)
+    synchronize(args.device)
+    return (time.perf_counter() - start) / args.steps
+
+
+def time_dynamic_cache(args, batch_size, context_length, dtype):
+    cache = DynamicCache()
+    prompt = torch.randn(batch_size, args.num_kv_heads, context_length, args.head_dim, dtype=dtype, device=args.device)
+    for layer_idx in range(args.num_layers):
+        cache.update(prompt, prompt, layer_idx)
+
+    step = torch.randn(batch_size, args.num_kv_heads, 1, args.head_dim, dtype=dtype, device=args.device)
+    synchronize(args.device)
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        for layer_idx in range(args.num_layers):
+            cache.update(step, step, layer_idx)
+    synchronize(args.device)
+    return (time.perf_counter() - start) / args.steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--device", default="cuda:0" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--context-lengths", type=int, nargs="+", default=[256, 1024, 2048])
+    parser.add_argument("--steps", type=int, default=32, help="Decode steps timed per setting.")
+    parser.add_argument("--num-layers", type=int, default=28)
+    parser.add_argument("--num-kv-heads", type=int, default=8)
+    parser.add_argument("--head-dim", type=int, default=128)
+    parser.add_argument("--block-size", type=int, default=16)
+    args = parser.parse_args()
+
+    dtype = torch.bfloat16 if str(args.device).startswith("cuda") else torch.float32
+    print(f"{'batch':>6}{'context':>9}{'block (ms)':>12}{'dynamic (ms)':>14}{'ratio':>8}")
+    for batch_size in args.batch_sizes:
+        for context_length in args.context_lengths:
+            block_seconds = time_block_cache(args, batch_size, context_length, dtype)
+            dynamic_seconds = time_dynamic_cache(args, batch_size, context_length, dtype)
+            print(
+                f"{batch_size:>6}{context_length:>9}{block_seconds * 1e3:>12.2f}{dynamic_seconds * 1e3:>14.2f}"
+                f"{block_seconds / dynamic_seconds:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# coding=utf-8
+# Copyright 2026 The Alibaba Qwen team.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare DiT sampling settings of a 25Hz tokenizer against the default 10-step Euler decode.
+
+For every setting the script reports the decode wall time and two quality proxies measured against the baseline
+waveform decoded from the same noise: the L1 distance of the log-mel spectrograms and the waveform SNR.
+
+    python examples/benchmark_dit_solvers.py --tokenizer /path/to/Qwen3-TTS-Tokenizer-25Hz
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from qwen_tts import Qwen3TTSTokenizer
+from qwen_tts.core.models.modeling_qwen3_tts import SpeakerMelFeatures
+
+AUDIO = "https://qianwen-res.oss-cn-beijing.aliyuncs.com/Qwen3-TTS-Repo/tokenizer_demo_1.wav"
+
+# (name, decode kwargs)
+SETTINGS = [
+    ("euler-10 (baseline)", dict(num_steps=10, solver="euler")),
+    ("euler-6", dict(num_steps=6, solver="euler")),
+    ("euler-4", dict(num_steps=4, solver="euler")),
+    ("euler-10 cfg-3", dict(num_steps=10, solver="euler", cfg_steps=3)),
+    ("midpoint-5", dict(num_steps=5, solver="midpoint")),
+    ("heun-5", dict(num_steps=5, solver="heun")),
+    ("heun-4 cfg-2", dict(num_steps=4, solver="heun", cfg_steps=2)),
+    ("rk4-3", dict(num_steps=3, solver="rk4")),
+    ("adaptive_heun", dict(num_steps=4, solver="adaptive_heun", solver_options=dict(rtol=0.05, atol=0.05))),
+]
+
+
+def decode(tokenizer, enc, seed, **kwargs):
+    torch.manual_seed(seed)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    wavs, sr = tokenizer.decode(enc, **kwargs)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    return wavs[0], sr, time.perf_counter() - start
+
+
+def log_mel(features, wav):
+    return features(torch.from_numpy(wav))[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokenizer", required=True, help="Path or repo id of a 25Hz Qwen3-TTS tokenizer.")
+    parser.add_argument("--audio", default=AUDIO, help="Reference audio to encode and decode.")
+    parser.add_argument("--device", default="cuda:0" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per setting; the fastest is reported.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tokenizer = Qwen3TTSTokenizer.from_pretrained(args.tokenizer, device_map=args.device)
+    if tokenizer.get_model_type() != "qwen3_tts_tokenizer_25hz":
+        raise ValueError(f"{args.tokenizer} is not a 25Hz tokenizer.")
+    enc = tokenizer.encode(args.audio)
+
+    # warm-up
+    decode(tokenizer, enc, args.seed, num_steps=2)
+
+    baseline = None
+    features = None
+    print(f"{'setting':<22}{'time (s)':>10}{'speedup':>10}{'mel L1':>10}{'SNR (dB)':>10}")
+    for name, kwargs in SETTINGS:
+        runs = [decode(tokenizer, enc, args.seed, **kwargs) for _ in range(args.repeats)]
+        wav, sr, _ = runs[0]
+        seconds = min(run[2] for run in runs)
+        if baseline is None:
+            features = SpeakerMelFeatures(
+                n_fft=1024, num_mels=80, sampling_rate=sr, hop_size=sr // 100, win_size=1024, fmin=0, fmax=sr // 2
+            )
+            baseline = (wav, log_mel(features, wav), seconds)
+
+        length = min(len(wav), len(baseline[0]))
+        noise = wav[:length] - baseline[0][:length]
+        snr = 10 * np.log10(np.sum(baseline[0][:length] ** 2) / max(np.sum(noise**2), 1e-12))
+        mel = log_mel(features, wav)
+        frames = min(mel.shape[-1], baseline[1].shape[-1])
+        mel_l1 = (mel[:, :frames] - baseline[1][:, :frames]).abs().mean().item()
+        print(f"{name:<22}{seconds:>10.3f}{baseline[2] / seconds:>9.2f}x{mel_l1:>10.4f}{snr:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
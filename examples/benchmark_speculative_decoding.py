@@ -0,0 +1,118 @@
+# coding=utf-8
+# Copyright 2026 The Alibaba Qwen team.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare voice clone generation with and without a draft model for speculative decoding.
+
+For every batch size and number of drafted frames the script reports the wall time of `generate_voice_clone`
+(talker, code predictor and 12Hz decode) and the speedup over the same call without a draft. Greedy runs are also
+checked for identical audio lengths, which speculative decoding must reproduce exactly.
+
+    python examples/benchmark_speculative_decoding.py \\
+        --model Qwen/Qwen3-TTS-12Hz-1.7B-Base --draft Qwen/Qwen3-TTS-12Hz-0.6B-Base
+"""
+import argparse
+import time
+
+import torch
+
+from qwen_tts import Qwen3TTSModel
+
+REF_AUDIO = "https://qianwen-res.oss-cn-beijing.aliyuncs.com/Qwen3-TTS-Repo/clone_2.wav"
+REF_TEXT = (
+    "Okay. Yeah. I resent you. I love you. I respect you. But you know what? You blew it! And thanks to you."
+)
+TEXTS = [
+    "Speculative decoding lets a small model draft several codec frames that the large model checks in one pass.",
+    "The weather is lovely today, so we decided to take a long walk along the river before dinner.",
+    "Please remember to bring your passport, your boarding pass and a bottle of water to the gate.",
+    "It is not the strongest of the species that survives, but the one most responsive to change.",
+]
+
+
+def timed(call):
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    wavs, sr = call()
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    return wavs, sr, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True, help="Path or repo id of the target Base model.")
+    parser.add_argument("--draft", required=True, help="Path or repo id of the smaller draft Base model.")
+    parser.add_argument("--device", default="cuda:0" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--draft-frames", type=int, nargs="+", default=[2, 4, 6])
+    parser.add_argument("--greedy", action="store_true", help="Decode greedily and check the outputs match.")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per setting; the fastest is reported.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    dtype = torch.bfloat16 if str(args.device).startswith("cuda") else torch.float32
+    tts = Qwen3TTSModel.from_pretrained(args.model, device_map=args.device, dtype=dtype)
+    draft = Qwen3TTSModel.from_pretrained(args.draft, device_map=args.device, dtype=dtype)
+    prompt = tts.create_voice_clone_prompt(ref_audio=REF_AUDIO, ref_text=REF_TEXT)
+    draft_prompt = draft.create_voice_clone_prompt(ref_audio=REF_AUDIO, ref_text=REF_TEXT)
+    sampling = dict(do_sample=False, subtalker_dosample=False) if args.greedy else {}
+
+    def run(batch_size, num_draft_frames=None):
+        texts = [TEXTS[i % len(TEXTS)] for i in range(batch_size)]
+        if num_draft_frames is None:
+            tts.disable_speculative_decoding()
+        else:
+            tts.enable_speculative_decoding(draft, num_draft_frames=num_draft_frames)
+        runs = []
+        for _ in range(args.repeats):
+            torch.manual_seed(args.seed)
+            runs.append(
+                timed(
+                    lambda: tts.generate_voice_clone(
+                        text=texts,
+                        language="English",
+                        voice_clone_prompt=prompt * batch_size,
+                        draft_voice_clone_prompt=draft_prompt * batch_size if num_draft_frames else None,
+                        **sampling,
+                    )
+                )
+            )
+        wavs, sr, _ = runs[0]
+        return wavs, sr, min(run[2] for run in runs)
+
+    # warm-up
+    run(1)
+    run(1, num_draft_frames=2)
+
+    print(f"{'batch':>6}{'draft frames':>14}{'time (s)':>10}{'speedup':>10}{'audio (s)':>11}{'same':>6}")
+    for batch_size in args.batch_sizes:
+        base_wavs, sr, base_seconds = run(batch_size)
+        audio_seconds = sum(len(wav) for wav in base_wavs) / sr
+        print(f"{batch_size:>6}{'-':>14}{base_seconds:>10.3f}{1.0:>9.2f}x{audio_seconds:>11.1f}{'':>6}")
+        for num_draft_frames in args.draft_frames:
+            wavs, _, seconds = run(batch_size, num_draft_frames)
+            same = [len(a) for a in wavs] == [len(b) for b in base_wavs] if args.greedy else "-"
+            audio_seconds = sum(len(wav) for wav in wavs) / sr
+            print(
+                f"{batch_size:>6}{num_draft_frames:>14}{seconds:>10.3f}{base_seconds / seconds:>9.2f}x"
+                f"{audio_seconds:>11.1f}{str(same):>6}"
+            )
+    tts.disable_speculative_decoding()
+
+
+if __name__ == "__main__":
+    main()
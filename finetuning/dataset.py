@@ -19,7 +19,7 @@ import librosa
 import numpy as np
 import torch
 from qwen_tts.core.models.configuration_qwen3_tts import Qwen3TTSConfig
-from qwen_tts.core.models.modeling_qwen3_tts import mel_spectrogram
+from qwen_tts.core.models.modeling_qwen3_tts import SpeakerMelFeatures
 from torch.utils.data import Dataset
 
 AudioLike = Union[
@@ -36,6 +36,15 @@ class TTSDataset(Dataset):
         self.processor = processor
         self.lag_num = lag_num
         self.config = config
+        self.mel_features = SpeakerMelFeatures(
+            n_fft=1024,
+            num_mels=128,
+            sampling_rate=24000,
+            hop_size=256,
+            win_size=1024,
+            fmin=0,
+            fmax=12000,
+        )
 
     def __len__(self):
         return len(self.data_list)
@@ -103,16 +112,7 @@ class TTSDataset(Dataset):
     @torch.inference_mode()
     def extract_mels(self, audio, sr):
         assert sr == 24000, "Only support 24kHz audio"
-        mels = mel_spectrogram(
-            torch.from_numpy(audio).unsqueeze(0), 
-            n_fft=1024, 
-            num_mels=128, 
-            sampling_rate=24000,
-            hop_size=256, 
-            win_size=1024, 
-            fmin=0, 
-            fmax=12000
-        ).transpose(1, 2)
+        mels = self.mel_features(torch.from_numpy(audio)).transpose(1, 2)
         return mels
 
 
@@ -20,5 +20,6 @@ qwen_tts: Qwen-TTS package.
 
 from .inference.qwen3_tts_model import Qwen3TTSModel, VoiceClonePromptItem
 from .inference.qwen3_tts_tokenizer import Qwen3TTSTokenizer
+from .inference.voice_prompt_store import VoicePromptStore, load_voice_clone_prompt, save_voice_clone_prompt
 
 __all__ = ["__version__"]
\ No newline at end of file
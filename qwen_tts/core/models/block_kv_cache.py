@@ -0,0 +1,239 @@
+# coding=utf-8
+# Copyright 2026 The Alibaba Qwen team.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import torch
+from transformers.cache_utils import Cache, CacheLayerMixin
+
+
+@dataclass
+class KVCacheUsage:
+    """
+    Occupancy snapshot of a `BlockKVCache`, in blocks of one layer.
+    """
+    block_size: int
+    max_num_blocks: int                              # cap of the cache
+    num_blocks: int                                  # blocks currently allocated, padding and spare columns included
+    num_used_blocks: int                             # blocks the cached tokens of every sequence fill
+    num_sequences: int
+    num_tokens: int                                  # sum of the sequence lengths
+
+    @property
+    def occupancy(self) -> float:
+        return self.num_used_blocks / self.num_blocks if self.num_blocks else 0.0
+
+
+class BlockKVCacheLayer(CacheLayerMixin):
+    """
+    Keys/values of one layer of a `BlockKVCache`, `(batch_size, num_key_value_heads, capacity, head_dim)` buffers of
+    which the first `length` columns are filled.
+    """
+
+    is_sliding = False
+
+    def __init__(self, cache: "BlockKVCache"):
+        super().__init__()
+        self.cache = cache
+        self.length = 0
+
+    def lazy_initialization(self, key_states: torch.Tensor):
+        self.dtype, self.device = key_states.dtype, key_states.device
+        batch_size, num_heads, _, head_dim = key_states.shape
+        self.keys = key_states.new_zeros((batch_size, num_heads, 0, head_dim))
+        self.values = key_states.new_zeros((batch_size, num_heads, 0, head_dim))
+        self.is_initialized = True
+
+    @property
+    def batch_size(self) -> int:
+        return self.keys.shape[0] if self.is_initialized else 0
+
+    @property
+    def capacity(self) -> int:
+        return self.keys.shape[2] if self.is_initialized else 0
+
+    def _allocate(self, batch_size: int, num_tokens: int, zero: bool = False):
+        capacity = self.cache.num_blocks_for(num_tokens) * self.cache.block_size
+        self.cache.check_num_blocks(batch_size, capacity)
+        new = torch.zeros if zero else torch.empty
+        shape = (batch_size, self.keys.shape[1], capacity, self.keys.shape[3])
+        return new(shape, dtype=self.dtype, device=self.device), new(shape, dtype=self.dtype, device=self.device)
+
+    def update(
+        self,
+        key_states: torch.Tensor,
+        value_states: torch.Tensor,
+        cache_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> tuple[torch.Tensor, torch.Tensor]:
+        """
+        Write the new keys/values after the `length` cached columns and return views of all filled columns.
+        """
+        if not self.is_initialized:
+            self.lazy_initialization(key_states)
+        end = self.length + key_states.shape[2]
+        if end > self.capacity:
+            # the buffers of this layer only are reallocated, to the next whole block
+            keys, values = self._allocate(self.batch_size, end)
+            keys[:, :, : self.length] = self.keys[:, :, : self.length]
+            values[:, :, : self.length] = self.values[:, :, : self.length]
+            self.keys, self.values = keys, values
+        self.keys[:, :, self.length : end] = key_states
+        self.values[:, :, self.length : end] = value_states
+        self.length = end
+        return self.keys[:, :, :end], self.values[:, :, :end]
+
+    def get_mask_sizes(self, cache_position: torch.Tensor) -> tuple[int, int]:
+        return self.length + cache_position.shape[0], 0
+
+    def get_seq_length(self) -> int:
+        return self.length
+
+    def get_max_cache_shape(self) -> int:
+        return -1
+
+    def reset(self) -> None:
+        super().reset()
+        self.length = 0
+
+    def crop(self, max_length: int) -> None:
+        if max_length < 0:
+            max_length = self.length + max_length
+        self.length = max(min(self.length, max_length), 0)
+
+    def batch_repeat_interleave(self, repeats: int) -> None:
+        if self.is_initialized:
+            self.keys = self.keys.repeat_interleave(repeats, dim=0)
+            self.values = self.values.repeat_interleave(repeats, dim=0)
+
+    def batch_select_indices(self, indices: torch.Tensor, start: int = 0) -> None:
+        if not self.is_initialized:
+            return
+        length = self.length - start
+        keys, values = self._allocate(len(indices), length)
+        keys[:, :, :length] = self.keys[indices, :, start : self.length]
+        values[:, :, :length] = self.values[indices, :, start : self.length]
+        self.keys, self.values, self.length = keys, values, length
+
+    def append_rows(self, other: "BlockKVCacheLayer") -> None:
+        if not self.is_initialized:
+            self.lazy_initialization(other.keys[:0])
+        # both batches stay right-aligned, the shorter one is left-padded with zeros
+        length = max(self.length, other.length)
+        keys, values = self._allocate(self.batch_size + other.batch_size, length, zero=True)
+        for rows, layer in ((slice(0, self.batch_size), self), (slice(self.batch_size, None), other)):
+            keys[rows, :, length - layer.length : length] = layer.keys[:, :, : layer.length]
+            values[rows, :, length - layer.length : length] = layer.values[:, :, : layer.length]
+        self.keys, self.values, self.length = keys, values, length
+
+
+class BlockKVCache(Cache):
+    """
+    Talker KV cache whose memory grows by blocks of `block_size` tokens, up to a hard cap.
+
+    Every layer keeps the keys/values of the batch in one dense `(batch_size, num_key_value_heads, capacity, head_dim)`
+    buffer, left-padded like a `DynamicCache`. A forward pass writes its new columns in place and attention reads a
+    view of the filled columns, so a decode step copies nothing but the new token. When a step needs a column past the
+    capacity, the buffers of that layer (only) are reallocated to the next whole block and the filled columns copied
+    over, i.e. once every `block_size` steps instead of the `torch.cat` of the whole cache a `DynamicCache` performs
+    on every step. `max_num_blocks` caps `batch_size * capacity / block_size` per layer; going past it raises instead
+    of running the device out of memory.
+
+    Finished rows are dropped with `batch_select_indices`, which can also cut leading columns no remaining row attends
+    to, and a prefilled batch joins a running one with `append_rows`. The stock attention implementations read the
+    dense layout directly; there is no paged attention kernel over a block table behind them.
+    """
+
+    def __init__(self, num_layers: int, block_size: int = 16, max_num_blocks: int = 4096):
+        """
+        Args:
+            num_layers (int):
+                Number of attention layers writing into the cache.
+            block_size (int, default=16):
+                Tokens by which the buffers grow.
+            max_num_blocks (int, default=4096):
+                Cap on `batch_size * capacity / block_size`, per layer.
+        """
+        if block_size <= 0 or max_num_blocks <= 0:
+            raise ValueError("`block_size` and `max_num_blocks` must be positive.")
+        self.block_size = block_size
+        self.max_num_blocks = max_num_blocks
+        super().__init__(layers=[BlockKVCacheLayer(self) for _ in range(num_layers)])
+
+    @classmethod
+    def from_config(cls, config, **kwargs) -> "BlockKVCache":
+        """
+        Build a cache for the attention layers described by a decoder config (e.g. `talker_config`).
+        """
+        return cls(num_layers=config.num_hidden_layers, **kwargs)
+
+    @classmethod
+    def for_batch(cls, config, batch_size: int, max_length: int, block_size: int = 16) -> "BlockKVCache":
+        """
+        Build a cache capped at exactly what `batch_size` sequences of `max_length` tokens need.
+        """
+        cache = cls.from_config(config, block_size=block_size)
+        cache.max_num_blocks = max(batch_size * cache.num_blocks_for(max_length), 1)
+        return cache
+
+    def num_blocks_for(self, num_tokens: int) -> int:
+        return (num_tokens + self.block_size - 1) // self.block_size
+
+    def can_allocate(self, batch_size: int, num_tokens: int) -> bool:
+        """
+        Whether `batch_size` rows of `num_tokens` columns fit under `max_num_blocks`.
+        """
+        return batch_size * self.num_blocks_for(num_tokens) <= self.max_num_blocks
+
+    def check_num_blocks(self, batch_size: int, capacity: int) -> None:
+        if batch_size * (capacity // self.block_size) > self.max_num_blocks:
+            raise RuntimeError(
+                f"BlockKVCache is full: {batch_size} sequences of {capacity} tokens need more than `max_num_blocks`="
+                f"{self.max_num_blocks} blocks of {self.block_size} tokens. Increase `max_num_blocks` or run fewer "
+                "sequences at once."
+            )
+
+    def batch_select_indices(self, indices: torch.Tensor, start: int = 0) -> None:
+        """
+        Keep the rows `indices` and drop the first `start` columns, e.g. padding none of them attends to.
+        """
+        for layer in self.layers:
+            layer.batch_select_indices(indices, start)
+
+    def append_rows(self, other: "BlockKVCache") -> None:
+        """
+        Append the rows of `other` to the batch, right-aligning both: the shorter side is left-padded, which the
+        attention mask of the merged batch has to mask out.
+        """
+        for layer, other_layer in zip(self.layers, other.layers):
+            layer.append_rows(other_layer)
+
+    def usage(self, attention_mask: Optional[torch.Tensor] = None) -> KVCacheUsage:
+        """
+        Occupancy of the cache. `attention_mask` (batch_size, length) tells padding from cached tokens.
+        """
+        layer = self.layers[0]
+        if attention_mask is not None:
+            num_tokens = attention_mask.sum(dim=-1).tolist()
+        else:
+            num_tokens = [layer.length] * layer.batch_size
+        return KVCacheUsage(
+            block_size=self.block_size,
+            max_num_blocks=self.max_num_blocks,
+            num_blocks=layer.batch_size * (layer.capacity // self.block_size),
+            num_used_blocks=sum(self.num_blocks_for(n) for n in num_tokens),
+            num_sequences=len(num_tokens),
+            num_tokens=sum(num_tokens),
+        )
@@ -345,6 +345,9 @@ class Qwen3TTSTalkerConfig(PretrainedConfig):
             Sliding window attention (SWA) window size. If not specified, will default to `4096`.
         attention_dropout (`float`, *optional*, defaults to 0.0):
             The dropout ratio for the attention probabilities.
+        layer_types (`list`, *optional*):
+            Attention pattern for each layer, `"full_attention"` or `"sliding_attention"`. Defaults to sliding
+            window attention in every layer when `use_sliding_window` is set and full attention otherwise.
     """
 
     model_type = "qwen3_tts_talker"
@@ -400,6 +403,7 @@ class Qwen3TTSTalkerConfig(PretrainedConfig):
         spk_id=None,
         spk_is_dialect=None,
         codec_language_id=None,
+        layer_types=None,
         **kwargs,
     ):
         super().__init__(
@@ -429,6 +433,14 @@ class Qwen3TTSTalkerConfig(PretrainedConfig):
         if self.rope_scaling is not None and "type" in self.rope_scaling:
             self.rope_scaling["rope_type"] = self.rope_scaling["type"]
 
+        self.layer_types = layer_types
+        if self.layer_types is None:
+            self.layer_types = [
+                "sliding_attention" if self.sliding_window is not None else "full_attention"
+                for _ in range(self.num_hidden_layers)
+            ]
+        layer_type_validation(self.layer_types)
+
         if code_predictor_config is None:
             code_predictor_config = {}
             self.code_predictor_config = Qwen3TTSTalkerCodePredictorConfig()
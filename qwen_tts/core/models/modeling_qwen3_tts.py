@@ -14,20 +14,31 @@
 # limitations under the License.
 """PyTorch Qwen3TTS model."""
 
+import hashlib
 import json
 import os
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Callable, Optional
 
 import huggingface_hub
+import numpy as np
 import torch
 from huggingface_hub import snapshot_download
 from librosa.filters import mel as librosa_mel_fn
+from safetensors.torch import load_file as load_safetensors
+from safetensors.torch import save_file as save_safetensors
 from torch import nn
 from torch.nn import functional as F
 from transformers.activations import ACT2FN
-from transformers.cache_utils import Cache, DynamicCache
+from transformers.cache_utils import Cache, DynamicCache, StaticCache
 from transformers.generation import GenerationMixin
+from transformers.generation.logits_process import (
+    LogitsProcessorList, MinNewTokensLengthLogitsProcessor,
+    RepetitionPenaltyLogitsProcessor, SuppressTokensLogitsProcessor,
+    TemperatureLogitsWarper, TopKLogitsWarper, TopPLogitsWarper)
 from transformers.integrations import use_kernel_forward_from_hub
 from transformers.masking_utils import (create_causal_mask,
                                         create_sliding_window_causal_mask)
@@ -44,6 +55,7 @@ from transformers.utils import can_return_tuple, logging
 from transformers.utils.hub import cached_file
 
 from ...inference.qwen3_tts_tokenizer import Qwen3TTSTokenizer
+from .block_kv_cache import BlockKVCache
 from .configuration_qwen3_tts import (Qwen3TTSConfig,
                                       Qwen3TTSSpeakerEncoderConfig,
                                       Qwen3TTSTalkerCodePredictorConfig,
@@ -112,15 +124,15 @@ class Res2NetBlock(torch.nn.Module):
         )
         self.scale = scale
 
-    def forward(self, hidden_states):
+    def forward(self, hidden_states, pad_index=None):
         outputs = []
         for i, hidden_part in enumerate(torch.chunk(hidden_states, self.scale, dim=1)):
             if i == 0:
                 output_part = hidden_part
             elif i == 1:
-                output_part = self.blocks[i - 1](hidden_part)
+                output_part = self.blocks[i - 1](hidden_part, pad_index=pad_index)
             else:
-                output_part = self.blocks[i - 1](hidden_part + output_part)
+                output_part = self.blocks[i - 1](hidden_part + output_part, pad_index=pad_index)
             outputs.append(output_part)
         output = torch.cat(outputs, dim=1)
         return output
@@ -147,8 +159,11 @@ class SqueezeExcitationBlock(nn.Module):
         )
         self.sigmoid = nn.Sigmoid()
 
-    def forward(self, hidden_states):
-        hidden_states_mean = hidden_states.mean(dim=2, keepdim=True)
+    def forward(self, hidden_states, mask=None):
+        if mask is None:
+            hidden_states_mean = hidden_states.mean(dim=2, keepdim=True)
+        else:
+            hidden_states_mean = (hidden_states * mask).sum(dim=2, keepdim=True) / mask.sum(dim=2, keepdim=True)
 
         hidden_states_mean = self.relu(self.conv1(hidden_states_mean))
         hidden_states_mean = self.sigmoid(self.conv2(hidden_states_mean))
@@ -211,13 +226,14 @@ class AttentiveStatisticsPooling(nn.Module):
         std = torch.sqrt((m * (x - mean.unsqueeze(dim)).pow(2)).sum(dim).clamp(self.eps))
         return mean, std
 
-    def forward(self, hidden_states):
+    def forward(self, hidden_states, lengths=None):
         seq_length = hidden_states.shape[-1]
-        lengths = torch.ones(hidden_states.shape[0], device=hidden_states.device)
+        if lengths is None:
+            lengths = torch.ones(hidden_states.shape[0], device=hidden_states.device) * seq_length
 
         # Make binary mask of shape [N, 1, L]
         mask = self._length_to_mask(
-            lengths * seq_length, max_len=seq_length, dtype=hidden_states.dtype, device=hidden_states.device
+            lengths, max_len=seq_length, dtype=hidden_states.dtype, device=hidden_states.device
         )
         mask = mask.unsqueeze(1)
 
@@ -263,7 +279,10 @@ class TimeDelayNetBlock(nn.Module):
         )
         self.activation = nn.ReLU()
 
-    def forward(self, hidden_states: torch.Tensor):
+    def forward(self, hidden_states: torch.Tensor, pad_index=None):
+        if pad_index is not None and self.conv.kernel_size[0] > 1:
+            # refill the padded tail of every item with its own reflection, as if it was convolved alone
+            hidden_states = hidden_states.gather(2, pad_index.expand(-1, hidden_states.shape[1], -1))
         return self.activation(self.conv(hidden_states))
 
 class SqueezeExcitationRes2NetBlock(nn.Module):
@@ -297,13 +316,13 @@ class SqueezeExcitationRes2NetBlock(nn.Module):
         )
         self.se_block = SqueezeExcitationBlock(out_channels, se_channels, out_channels)
 
-    def forward(self, hidden_state):
+    def forward(self, hidden_state, mask=None, pad_index=None):
         residual = hidden_state
 
-        hidden_state = self.tdnn1(hidden_state)
-        hidden_state = self.res2net_block(hidden_state)
-        hidden_state = self.tdnn2(hidden_state)
-        hidden_state = self.se_block(hidden_state)
+        hidden_state = self.tdnn1(hidden_state, pad_index=pad_index)
+        hidden_state = self.res2net_block(hidden_state, pad_index=pad_index)
+        hidden_state = self.tdnn2(hidden_state, pad_index=pad_index)
+        hidden_state = self.se_block(hidden_state, mask=mask)
 
         return hidden_state + residual
 
@@ -370,21 +389,51 @@ class Qwen3TTSSpeakerEncoder(torch.nn.Module):
             padding_mode="reflect",
         )
 
-    def forward(self, hidden_states):
+        # widest one-sided reach of the "same"-padded convolutions
+        self.max_conv_reach = max(
+            (kernel_size - 1) // 2 * dilation
+            for kernel_size, dilation in zip(config.enc_kernel_sizes, config.enc_dilations)
+        )
+
+    def forward(self, hidden_states, lengths=None):
+        """
+        Args:
+            hidden_states (`torch.FloatTensor` of shape `(batch_size, num_frames, mel_dim)`):
+                Mel features, right-padded when the batch mixes lengths.
+            lengths (`torch.LongTensor` of shape `(batch_size,)`, *optional*):
+                Valid frames per item. Before every convolution the padded tail of an item is refilled with the
+                reflection of its valid frames, which is what the reflect padding of that item alone would provide,
+                and padded frames are excluded from the squeeze-excitation means and the attentive statistics
+                pooling. Each item then gets the embedding it would get on its own.
+        """
         # Minimize transpose for efficiency
         hidden_states = hidden_states.transpose(1, 2)
 
+        mask, pad_index = None, None
+        if lengths is not None:
+            # room for a full reflected context after the longest item too
+            hidden_states = F.pad(hidden_states, (0, self.max_conv_reach))
+            positions = torch.arange(hidden_states.shape[-1], device=hidden_states.device)[None, :]
+            lengths = lengths[:, None]
+            mask = (positions < lengths).unsqueeze(1).to(hidden_states.dtype)
+            pad_index = torch.where(positions < lengths, positions, 2 * (lengths - 1) - positions).clamp(min=0)
+            pad_index = pad_index.unsqueeze(1)
+            lengths = lengths[:, 0]
+
         hidden_states_list = []
         for layer in self.blocks:
-            hidden_states = layer(hidden_states)
+            if isinstance(layer, SqueezeExcitationRes2NetBlock):
+                hidden_states = layer(hidden_states, mask=mask, pad_index=pad_index)
+            else:
+                hidden_states = layer(hidden_states, pad_index=pad_index)
             hidden_states_list.append(hidden_states)
 
         # Multi-layer feature aggregation
         hidden_states = torch.cat(hidden_states_list[1:], dim=1)
-        hidden_states = self.mfa(hidden_states)
+        hidden_states = self.mfa(hidden_states, pad_index=pad_index)
 
         # Attentive Statistical Pooling
-        hidden_states = self.asp(hidden_states)
+        hidden_states = self.asp(hidden_states, lengths=lengths)
 
         # Final linear transformation
         hidden_states = self.fc(hidden_states)
@@ -396,6 +445,153 @@ class Qwen3TTSSpeakerEncoder(torch.nn.Module):
 def dynamic_range_compression_torch(x, C=1, clip_val=1e-5):
     return torch.log(torch.clamp(x, min=clip_val) * C)
 
+
+@lru_cache(maxsize=8)
+def _get_mel_basis_and_window(sampling_rate, n_fft, num_mels, fmin, fmax, win_size, device, dtype):
+    """
+    Mel filterbank and Hann window for one STFT setup, built once per
+    (sr, n_fft, n_mels, fmin, fmax, win_size, device, dtype) and shared by all callers. Only the most recently used
+    setups are kept.
+    """
+    mel = librosa_mel_fn(sr=sampling_rate, n_fft=n_fft, n_mels=num_mels, fmin=fmin, fmax=fmax)
+    return (
+        torch.from_numpy(mel).to(device=device, dtype=dtype),
+        torch.hann_window(win_size, device=device, dtype=dtype),
+    )
+
+
+class SpeakerMelFeatures:
+    """
+    Log-mel feature extractor with the filterbank and STFT window cached per device and dtype. The defaults are the
+    features of the speaker encoder.
+
+    Computes the same features as `mel_spectrogram` (slaney-normed librosa filterbank, Hann-windowed `torch.stft`,
+    reflect padding of `(n_fft - hop_size) // 2` samples on both sides) without rebuilding the filterbank on every
+    call, for a single signal, a right-padded batch with per-item lengths, or a list of signals of different
+    lengths. `submit` runs the extraction on a background thread, e.g. to overlap it with a model forward.
+    """
+
+    def __init__(
+        self,
+        n_fft: int = 1024,
+        num_mels: int = 128,
+        sampling_rate: int = 24000,
+        hop_size: int = 256,
+        win_size: int = 1024,
+        fmin: int = 0,
+        fmax: Optional[int] = 12000,
+        center: bool = False,
+        num_workers: int = 1,
+    ):
+        self.n_fft = n_fft
+        self.num_mels = num_mels
+        self.sampling_rate = sampling_rate
+        self.hop_size = hop_size
+        self.win_size = win_size
+        self.fmin = fmin
+        self.fmax = fmax
+        self.center = center
+        self.num_workers = num_workers
+        self.padding = (n_fft - hop_size) // 2
+        self._executor = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        return state
+
+    def frame_lengths(self, lengths: torch.Tensor) -> torch.Tensor:
+        """
+        Number of valid frames for signals of `lengths` samples.
+        """
+        return (lengths + 2 * self.padding - self.n_fft) // self.hop_size + 1
+
+    def __call__(self, y: torch.Tensor, lengths: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """
+        Args:
+            y (torch.Tensor):
+                Signal of shape `(num_samples,)` or `(batch, num_samples)`. A batch of signals of different lengths
+                is right-padded, with the valid sample counts given in `lengths`.
+            lengths (Optional[torch.Tensor]):
+                `(batch,)` valid samples per item. Every item is reflect-padded at its own end, so its first
+                `frame_lengths(lengths)[i]` frames equal its unbatched mel spectrogram.
+
+        Returns:
+            torch.Tensor: log-mel spectrogram of shape `(batch, num_mels, num_frames)`.
+        """
+        if y.dim() == 1:
+            y = y.unsqueeze(0)
+        if lengths is None:
+            y = F.pad(y.unsqueeze(1), (self.padding, self.padding), mode="reflect").squeeze(1)
+        else:
+            y = self._reflect_pad(y, lengths.to(y.device))
+        return self._from_padded(y)
+
+    def batch(self, ys: list[torch.Tensor]) -> tuple[torch.Tensor, torch.Tensor]:
+        """
+        Mel spectrograms of 1-D signals of different lengths with a single STFT.
+
+        Returns:
+            tuple: `(mel_spec, frame_lengths)` of shapes `(batch, num_mels, max_frames)` and `(batch,)`.
+        """
+        lengths = torch.tensor([len(y) for y in ys], dtype=torch.long)
+        y = torch.nn.utils.rnn.pad_sequence(list(ys), batch_first=True)
+        return self(y, lengths=lengths), self.frame_lengths(lengths)
+
+    def submit(self, ys: list[torch.Tensor]) -> Future:
+        """
+        Run `batch(ys)` on a background thread.
+
+        Returns:
+            concurrent.futures.Future: resolves to the `(mel_spec, frame_lengths)` tuple of `batch`.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="mel_features")
+        return self._executor.submit(self.batch, ys)
+
+    def close(self) -> None:
+        """
+        Shut down the background thread started by `submit`, if any.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _reflect_pad(self, y: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        # per-item reflect padding of a right-padded batch: sample j of the padded item reads y[|j - p|] left of
+        # the signal and y[2 * (len - 1) - (j - p)] right of it; everything past the item's padding stays zero
+        positions = torch.arange(y.shape[1] + 2 * self.padding, device=y.device) - self.padding
+        lengths = lengths.unsqueeze(1)
+        index = positions.abs().unsqueeze(0).expand(y.shape[0], -1)
+        index = torch.where(index < lengths, index, 2 * (lengths - 1) - index)
+        valid = positions.unsqueeze(0) < lengths + self.padding
+        padded = y.gather(1, index.clamp(0, y.shape[1] - 1))
+        return padded * valid.to(padded.dtype)
+
+    def _from_padded(self, y: torch.Tensor) -> torch.Tensor:
+        mel_basis, hann_window = _get_mel_basis_and_window(
+            self.sampling_rate, self.n_fft, self.num_mels, self.fmin, self.fmax, self.win_size, y.device, y.dtype
+        )
+        spec = torch.stft(
+            y,
+            self.n_fft,
+            hop_length=self.hop_size,
+            win_length=self.win_size,
+            window=hann_window,
+            center=self.center,
+            pad_mode="reflect",
+            normalized=False,
+            onesided=True,
+            return_complex=True,
+        )
+        spec = torch.sqrt(torch.view_as_real(spec).pow(2).sum(-1) + 1e-9)
+
+        mel_spec = torch.matmul(mel_basis, spec)
+        mel_spec = dynamic_range_compression_torch(mel_spec)
+
+        return mel_spec
+
+
 def mel_spectrogram(
     y: torch.Tensor,
     n_fft: int,
@@ -410,6 +606,7 @@ def mel_spectrogram(
     """
     Calculate the mel spectrogram of an input signal.
     This function uses slaney norm for the librosa mel filterbank (using librosa.filters.mel) and uses Hann window for STFT (using torch.stft).
+    The filterbank and window are cached, see `SpeakerMelFeatures`.
 
     Args:
         y (torch.Tensor): Input signal.
@@ -425,43 +622,17 @@ def mel_spectrogram(
     Returns:
         torch.Tensor: Mel spectrogram.
     """
-    if torch.min(y) < -1.0:
-        print(f"[WARNING] Min value of input waveform signal is {torch.min(y)}")
-    if torch.max(y) > 1.0:
-        print(f"[WARNING] Max value of input waveform signal is {torch.max(y)}")
-
-    device = y.device
-
-    mel = librosa_mel_fn(
-        sr=sampling_rate, n_fft=n_fft, n_mels=num_mels, fmin=fmin, fmax=fmax
-    )
-
-    mel_basis = torch.from_numpy(mel).float().to(device)
-    hann_window = torch.hann_window(win_size).to(device)
-
-    padding = (n_fft - hop_size) // 2
-    y = torch.nn.functional.pad(
-        y.unsqueeze(1), (padding, padding), mode="reflect"
-    ).squeeze(1)
-
-    spec = torch.stft(
-        y,
-        n_fft,
-        hop_length=hop_size,
-        win_length=win_size,
-        window=hann_window,
+    features = SpeakerMelFeatures(
+        n_fft=n_fft,
+        num_mels=num_mels,
+        sampling_rate=sampling_rate,
+        hop_size=hop_size,
+        win_size=win_size,
+        fmin=fmin,
+        fmax=fmax,
         center=center,
-        pad_mode="reflect",
-        normalized=False,
-        onesided=True,
-        return_complex=True,
     )
-    spec = torch.sqrt(torch.view_as_real(spec).pow(2).sum(-1) + 1e-9)
-
-    mel_spec = torch.matmul(mel_basis, spec)
-    mel_spec = dynamic_range_compression_torch(mel_spec)
-
-    return mel_spec
+    return features(y)
 
 
 class Qwen3TTSPreTrainedModel(PreTrainedModel):
@@ -755,7 +926,7 @@ class Qwen3TTSTalkerAttention(nn.Module):
         self.k_norm = Qwen3TTSRMSNorm(
             self.head_dim, eps=config.rms_norm_eps
         )  # thus post q_norm does not need reshape
-        self.sliding_window = getattr(config, "sliding_window", None)
+        self.sliding_window = config.sliding_window if config.layer_types[layer_idx] == "sliding_attention" else None
         self.rope_scaling = config.rope_scaling
 
     def forward(
@@ -1153,6 +1324,84 @@ class Qwen3TTSTalkerCodePredictorModel(Qwen3TTSPreTrainedModel):
         )
 
 
+def sample_next_token(
+    logits: torch.Tensor,
+    do_sample: Optional[bool] = True,
+    top_k: Optional[int] = 50,
+    top_p: Optional[float] = 1.0,
+    temperature: Optional[float] = 1.0,
+) -> torch.Tensor:
+    """
+    Pick the next token from `logits` of shape `(batch_size, vocab_size)`.
+
+    Applies temperature, top-k and top-p filtering in a single pass with the same arithmetic as the
+    `TemperatureLogitsWarper`, `TopKLogitsWarper` and `TopPLogitsWarper` that `generate` would build, so sampling
+    with the same RNG state selects the same tokens. As in `generate`, a `None` argument disables that warper.
+    """
+    if not do_sample:
+        return torch.argmax(logits.to(torch.float32), dim=-1)
+    probs = next_token_probs(logits, do_sample=do_sample, top_k=top_k, top_p=top_p, temperature=temperature)
+    return torch.multinomial(probs, num_samples=1).squeeze(1)
+
+
+def next_token_probs(
+    logits: torch.Tensor,
+    do_sample: Optional[bool] = True,
+    top_k: Optional[int] = 50,
+    top_p: Optional[float] = 1.0,
+    temperature: Optional[float] = 1.0,
+) -> torch.Tensor:
+    """
+    The distribution `sample_next_token` draws from, `(batch_size, vocab_size)` in float32. Without `do_sample` it
+    is the one-hot distribution of the argmax.
+    """
+    scores = logits.to(torch.float32)
+    if not do_sample:
+        return F.one_hot(torch.argmax(scores, dim=-1), scores.shape[-1]).to(torch.float32)
+
+    if temperature is not None and temperature != 1.0:
+        scores = scores / temperature
+    if top_k is not None and top_k != 0:
+        top_k = min(top_k, scores.shape[-1])
+        indices_to_remove = scores < torch.topk(scores, top_k)[0][..., -1, None]
+        scores = scores.masked_fill(indices_to_remove, -float("inf"))
+    if top_p is not None and top_p < 1.0:
+        sorted_logits, sorted_indices = torch.sort(scores, descending=False)
+        cumulative_probs = sorted_logits.softmax(dim=-1).cumsum(dim=-1)
+        sorted_indices_to_remove = cumulative_probs <= (1 - top_p)
+        sorted_indices_to_remove[..., -1:] = 0
+        indices_to_remove = sorted_indices_to_remove.scatter(1, sorted_indices, sorted_indices_to_remove)
+        scores = scores.masked_fill(indices_to_remove, -float("inf"))
+
+    return F.softmax(scores, dim=-1)
+
+
+class Qwen3TTSResidualCodesCache:
+    """
+    Static KV caches and causal masks of `generate_residual_codes`, one per batch size, device and dtype.
+
+    The sub-talker sequence never exceeds `num_code_groups` positions (hidden, layer 0, layers 1..Q-2), so one static
+    cache serves every frame of a batch. It needs no reset: every frame rewrites the slots in order and the causal
+    masks hide the stale ones. The masks only depend on the step and are built once alongside it.
+
+    The caller owns the store and passes it to every frame, e.g. one per `generate` call or per engine, so that
+    concurrent generations never share a cache. A batch that shrinks and grows again reuses its earlier caches.
+    """
+
+    def __init__(self, config: Qwen3TTSTalkerCodePredictorConfig):
+        self.config = config
+        self.caches: dict[tuple[int, torch.device, torch.dtype], tuple[StaticCache, dict]] = {}
+
+    def get(self, batch_size: int, device: torch.device, dtype: torch.dtype) -> tuple[StaticCache, dict]:
+        """
+        Returns the static cache and the per-step masks for a batch of `batch_size` frames.
+        """
+        key = (batch_size, device, dtype)
+        if key not in self.caches:
+            self.caches[key] = (StaticCache(config=self.config, max_cache_len=self.config.num_code_groups), {})
+        return self.caches[key]
+
+
 class Qwen3TTSTalkerCodePredictorModelForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin):
     _tied_weights_keys = ["lm_head.weight"]
     _tp_plan = {"lm_head": "colwise_rep"}
@@ -1318,6 +1567,117 @@ class Qwen3TTSTalkerCodePredictorModelForConditionalGeneration(Qwen3TTSPreTraine
         model_kwargs["generation_steps"] = outputs.generation_steps
         return model_kwargs
 
+    @torch.no_grad()
+    def generate_residual_codes(
+        self,
+        inputs_embeds: torch.Tensor,
+        do_sample: Optional[bool] = True,
+        top_k: Optional[int] = 50,
+        top_p: Optional[float] = 1.0,
+        temperature: Optional[float] = 1.0,
+        return_probs: bool = False,
+        forced_codes: Optional[torch.Tensor] = None,
+        num_forced: Optional[torch.Tensor] = None,
+        residual_codes_cache: Optional[Qwen3TTSResidualCodesCache] = None,
+    ) -> tuple[torch.Tensor, ...]:
+        """
+        Predict the residual codebooks of one frame without going through `GenerationMixin.generate`.
+
+        Equivalent to `generate(inputs_embeds=inputs_embeds, max_new_tokens=num_code_groups - 1, ...)`, but decodes
+        with a preallocated static KV cache and `sample_next_token` instead of the generic generation loop.
+
+        Args:
+            inputs_embeds (`torch.FloatTensor` of shape `(batch_size, 2, talker_hidden_size)`):
+                The talker hidden state of the frame followed by the embedding of its first-codebook token.
+            forced_codes (`torch.LongTensor` of shape `(batch_size, num_code_groups - 1)`, *optional*):
+                Residual codes to take instead of sampling them, the first `num_forced[i]` of row `i`. The rest of
+                the frame is completed through the same cached loop, e.g. after a rejected speculative code.
+            num_forced (`torch.LongTensor` of shape `(batch_size,)`, *optional*):
+                Number of leading `forced_codes` used per row.
+            residual_codes_cache (`Qwen3TTSResidualCodesCache`, *optional*):
+                Caches reused across the frames of one generation. A fresh one is allocated for this frame if unset.
+
+        Returns:
+            codes (`torch.LongTensor` of shape `(batch_size, num_code_groups - 1)`):
+                Codes of codebooks 1..num_code_groups-1.
+            codec_embeds (`torch.FloatTensor` of shape `(batch_size, num_code_groups, talker_hidden_size)`):
+                Embeddings of all codebooks of the frame, starting with the first-codebook embedding.
+            probs (`torch.FloatTensor` of shape `(batch_size, num_code_groups - 1, vocab_size)`):
+                Only with `return_probs=True`: the distributions every code was drawn from, see `next_token_probs`.
+        """
+        batch_size = inputs_embeds.shape[0]
+        num_residual = self.config.num_code_groups - 1
+        device = inputs_embeds.device
+        if residual_codes_cache is None:
+            residual_codes_cache = Qwen3TTSResidualCodesCache(self.config)
+        past_key_values, masks = residual_codes_cache.get(batch_size, device, inputs_embeds.dtype)
+
+        codes = torch.empty((batch_size, num_residual), dtype=torch.long, device=device)
+        probs = None
+        if return_probs:
+            probs = torch.empty((batch_size, num_residual, self.config.vocab_size), device=device)
+        codec_embeds = inputs_embeds.new_empty((batch_size, num_residual + 1, inputs_embeds.shape[-1]))
+        codec_embeds[:, 0] = inputs_embeds[:, 1]
+
+        hidden_states = self.small_to_mtp_projection(inputs_embeds)
+        cache_position = torch.arange(2, device=device)
+        for step in range(num_residual):
+            if step not in masks:
+                mask_kwargs = {
+                    "config": self.config,
+                    "input_embeds": hidden_states,
+                    "attention_mask": None,
+                    "cache_position": cache_position,
+                    "past_key_values": past_key_values,
+                }
+                masks[step] = {"full_attention": create_causal_mask(**mask_kwargs)}
+                if self.model.has_sliding_layers:
+                    masks[step]["sliding_attention"] = create_sliding_window_causal_mask(**mask_kwargs)
+            hidden_states = self.model(
+                inputs_embeds=hidden_states,
+                attention_mask=masks[step],
+                past_key_values=past_key_values,
+                use_cache=True,
+                cache_position=cache_position,
+            ).last_hidden_state
+            logits = self.lm_head[step](hidden_states[:, -1])
+            if return_probs:
+                probs[:, step] = next_token_probs(
+                    logits, do_sample=do_sample, top_k=top_k, top_p=top_p, temperature=temperature
+                )
+                codes[:, step] = torch.multinomial(probs[:, step], num_samples=1).squeeze(1)
+            else:
+                codes[:, step] = sample_next_token(
+                    logits, do_sample=do_sample, top_k=top_k, top_p=top_p, temperature=temperature
+                )
+            if forced_codes is not None:
+                codes[:, step] = torch.where(step < num_forced, forced_codes[:, step], codes[:, step])
+            code_embeds = self.model.get_input_embeddings()[step](codes[:, step : step + 1])
+            codec_embeds[:, step + 1] = code_embeds[:, 0]
+            hidden_states = self.small_to_mtp_projection(code_embeds)
+            cache_position = cache_position[-1:] + 1
+        if return_probs:
+            return codes, codec_embeds, probs
+        return codes, codec_embeds
+
+    def residual_logits(self, inputs_embeds: torch.Tensor) -> torch.Tensor:
+        """
+        Teacher-forced logits of the residual codebooks of given frames, in one forward without a cache.
+
+        Args:
+            inputs_embeds (`torch.FloatTensor` of shape `(batch_size, length, talker_hidden_size)`):
+                The talker hidden state of every frame followed by the embeddings of its first `length - 1`
+                codebooks, `2 <= length <= num_code_groups`.
+
+        Returns:
+            `torch.FloatTensor` of shape `(batch_size, length - 1, vocab_size)`: the logits of codebooks
+            1..length-1.
+        """
+        hidden_states = self.model(inputs_embeds=self.small_to_mtp_projection(inputs_embeds)).last_hidden_state
+        return torch.stack(
+            [self.lm_head[step](hidden_states[:, step + 1]) for step in range(inputs_embeds.shape[1] - 1)], dim=1
+        )
+
 
 @dataclass
 class Qwen3TTSTalkerOutputWithPast(ModelOutput):
@@ -1355,6 +1715,7 @@ class Qwen3TTSTalkerDecoderLayer(GradientCheckpointingLayer):
 
         self.input_layernorm = Qwen3TTSRMSNorm(config.hidden_size, eps=config.rms_norm_eps)
         self.post_attention_layernorm = Qwen3TTSRMSNorm(config.hidden_size, eps=config.rms_norm_eps)
+        self.attention_type = config.layer_types[layer_idx]
 
     def forward(
         self,
@@ -1440,6 +1801,7 @@ class Qwen3TTSTalkerModel(Qwen3TTSTalkerTextPreTrainedModel):
         self.gradient_checkpointing = False
         self.codec_embedding = nn.Embedding(config.vocab_size, config.hidden_size)
         self.text_embedding = nn.Embedding(config.text_vocab_size, config.text_hidden_size)
+        self.has_sliding_layers = "sliding_attention" in self.config.layer_types
 
         # Initialize weights and apply final processing
         self.post_init()
@@ -1507,15 +1869,19 @@ class Qwen3TTSTalkerModel(Qwen3TTSTalkerTextPreTrainedModel):
         else:
             text_position_ids = position_ids[0]
         
-        mask_function = create_causal_mask if self.config.sliding_window is None else create_sliding_window_causal_mask
-        causal_mask = mask_function(
-            config=self.config,
-            input_embeds=inputs_embeds,
-            attention_mask=attention_mask,
-            cache_position=cache_position,
-            past_key_values=past_key_values,
-            position_ids=text_position_ids,
-        )
+        # It may already have been prepared by e.g. `decode_step`
+        if not isinstance(causal_mask_mapping := attention_mask, dict):
+            mask_kwargs = {
+                "config": self.config,
+                "input_embeds": inputs_embeds,
+                "attention_mask": attention_mask,
+                "cache_position": cache_position,
+                "past_key_values": past_key_values,
+                "position_ids": text_position_ids,
+            }
+            causal_mask_mapping = {"full_attention": create_causal_mask(**mask_kwargs)}
+            if self.has_sliding_layers:
+                causal_mask_mapping["sliding_attention"] = create_sliding_window_causal_mask(**mask_kwargs)
 
         hidden_states = inputs_embeds
 
@@ -1532,7 +1898,7 @@ class Qwen3TTSTalkerModel(Qwen3TTSTalkerTextPreTrainedModel):
 
             layer_outputs = decoder_layer(
                 hidden_states,
-                attention_mask=causal_mask,
+                attention_mask=causal_mask_mapping[decoder_layer.attention_type],
                 position_ids=text_position_ids,
                 past_key_values=past_key_values,
                 output_attentions=output_attentions,
@@ -1653,6 +2019,8 @@ class Qwen3TTSTalkerForConditionalGeneration(Qwen3TTSTalkerTextPreTrainedModel,
         subtalker_top_p=None,
         subtalker_top_k=None,
         subtalker_temperature=None,
+        codec_collector=None,
+        residual_codes_cache=None,
         **kwargs,
     ) -> CausalLMOutputWithPast:
         r"""
@@ -1668,22 +2036,15 @@ class Qwen3TTSTalkerForConditionalGeneration(Qwen3TTSTalkerTextPreTrainedModel,
         # Generate
         else:
             last_id_hidden = self.get_input_embeddings()(input_ids)
-            predictor_result = self.code_predictor.generate(
+            residual_codes, codec_hiddens = self.code_predictor.generate_residual_codes(
                 inputs_embeds=torch.cat((past_hidden, last_id_hidden), dim=1),
-                max_new_tokens=self.config.num_code_groups - 1,
                 do_sample=subtalker_dosample,
                 top_p=subtalker_top_p,
                 top_k=subtalker_top_k,
                 temperature=subtalker_temperature,
-                output_hidden_states=True,
-                return_dict_in_generate=True,
-            )
-            codec_ids = torch.cat((input_ids, predictor_result.sequences), dim=-1)
-            codec_hiddens = torch.cat(
-                [last_id_hidden]
-                + [self.code_predictor.get_input_embeddings()[i](predictor_result.sequences[..., i:i+1]) for i in range(self.config.num_code_groups - 1)],
-                dim=1,
+                residual_codes_cache=residual_codes_cache,
             )
+            codec_ids = torch.cat((input_ids, residual_codes), dim=-1)
             inputs_embeds = codec_hiddens.sum(1, keepdim=True)
 
             if generation_step < trailing_text_hidden.shape[1]:
@@ -1693,13 +2054,15 @@ class Qwen3TTSTalkerForConditionalGeneration(Qwen3TTSTalkerTextPreTrainedModel,
         if attention_mask is not None:
             if (
                 cache_position is None
-                or (cache_position is not None and cache_position[0] == 0)
+                or generation_step == -1
                 or self.rope_deltas is None
             ):
                 delta0 = (1 - attention_mask).sum(dim=-1).unsqueeze(1)
                 position_ids, rope_deltas = self.get_rope_index(
                     attention_mask,
                 )
+                # a prefill may continue a cached prompt prefix, the mask covers the prefix as well
+                position_ids = position_ids[..., -inputs_embeds.shape[1]:]
                 rope_deltas = rope_deltas - delta0
                 self.rope_deltas = rope_deltas
             else:
@@ -1725,6 +2088,8 @@ class Qwen3TTSTalkerForConditionalGeneration(Qwen3TTSTalkerTextPreTrainedModel,
 
         hidden_states = outputs.last_hidden_state
         logits = self.codec_head(hidden_states)
+        if codec_collector is not None:
+            codec_collector.append(codec_ids, hidden_states[:, -1:, :])
 
         loss = None
         if labels is not None:
@@ -1743,6 +2108,161 @@ class Qwen3TTSTalkerForConditionalGeneration(Qwen3TTSTalkerTextPreTrainedModel,
             tts_pad_embed=tts_pad_embed,
         )
 
+    def get_codec_embeds(self, codec_ids: torch.LongTensor) -> torch.FloatTensor:
+        """
+        Per-codebook input embeddings of frames, `(num_frames, num_codes)` -> `(num_frames, num_codes, hidden_size)`
+        for the first `num_codes` codebooks. For whole frames their sum is the codec part of the talker input, and
+        the first `num_code_groups - 1` of them follow the talker hidden state in the code predictor.
+        """
+        codec_embeds = [self.get_input_embeddings()(codec_ids[:, :1])]
+        for i in range(1, codec_ids.shape[1]):
+            codec_embeds.append(self.code_predictor.get_input_embeddings()[i - 1](codec_ids[:, i : i + 1]))
+        return torch.cat(codec_embeds, dim=1)
+
+    def forward_frames(
+        self,
+        inputs_embeds: torch.FloatTensor,
+        past_key_values: Cache,
+        attention_mask: torch.LongTensor,
+        position_ids: torch.LongTensor,
+    ) -> torch.FloatTensor:
+        """
+        Run the talker over several positions of every sequence at once, e.g. the prompts or a run of frames to
+        verify, appending them to `past_key_values`.
+
+        Args:
+            inputs_embeds (`torch.FloatTensor` of shape `(batch_size, length, hidden_size)`):
+                Input embeddings of the new positions.
+            past_key_values (`Cache`):
+                Cache holding the earlier positions.
+            attention_mask (`torch.LongTensor` of shape `(batch_size, past_length + length)`):
+                Which cached and new positions take part in attention; padding and dropped positions are 0.
+            position_ids (`torch.LongTensor` of shape `(batch_size, length)`):
+                Rope position of every new input, the number of attended positions before it.
+
+        Returns:
+            `torch.FloatTensor` of shape `(batch_size, length, hidden_size)`: the last hidden states of the new
+            positions.
+        """
+        past_length = past_key_values.get_seq_length()
+        cache_position = torch.arange(past_length, past_length + inputs_embeds.shape[1], device=inputs_embeds.device)
+        outputs = self.model(
+            inputs_embeds=inputs_embeds,
+            attention_mask=attention_mask,
+            position_ids=position_ids.unsqueeze(0).expand(3, -1, -1),
+            past_key_values=past_key_values,
+            use_cache=True,
+            cache_position=cache_position,
+        )
+        return outputs.last_hidden_state
+
+    def decode_step(
+        self,
+        input_ids: torch.LongTensor,
+        past_hidden: torch.FloatTensor,
+        generation_step: torch.LongTensor,
+        cache_position: torch.LongTensor,
+        attention_mask: torch.Tensor,
+        rope_deltas: torch.LongTensor,
+        trailing_text_hidden: torch.FloatTensor,
+        past_key_values: Cache,
+        subtalker_dosample: Optional[bool] = True,
+        subtalker_top_k: Optional[int] = 50,
+        subtalker_top_p: Optional[float] = 1.0,
+        subtalker_temperature: Optional[float] = 0.9,
+        residual_codes_cache: Optional[Qwen3TTSResidualCodesCache] = None,
+    ) -> tuple[torch.FloatTensor, torch.LongTensor, torch.FloatTensor]:
+        """
+        Static-shape equivalent of a decode-stage `forward` call.
+
+        All per-step state is passed as tensors of fixed shape and there is no data-dependent Python branching, so
+        the whole step (code predictor included) can be wrapped in `torch.compile(mode="reduce-overhead")` or
+        captured in a CUDA graph when used with a `StaticCache`.
+
+        Args:
+            input_ids (`torch.LongTensor` of shape `(batch_size, 1)`):
+                First-codebook token sampled from the previous step.
+            past_hidden (`torch.FloatTensor` of shape `(batch_size, 1, hidden_size)`):
+                Last hidden state of the previous step.
+            generation_step (`torch.LongTensor` of shape `(1,)` or `(batch_size,)`):
+                Index of the trailing text position consumed by this step, shared or per sequence.
+            cache_position (`torch.LongTensor` of shape `(1,)`):
+                Cache slot written by this step.
+            attention_mask (`torch.Tensor` of shape `(batch_size, max_cache_len)`):
+                Padding mask over the whole cache, including the slot at `cache_position`.
+            rope_deltas (`torch.LongTensor` of shape `(batch_size, 1)`):
+                Offset between each sequence's rope position and `cache_position`, i.e. `self.rope_deltas` as set
+                by the prefill `forward`.
+            trailing_text_hidden (`torch.FloatTensor` of shape `(batch_size, trailing_len + 1, hidden_size)`):
+                Trailing text hidden states followed by one `tts_pad_embed` position, used for every step past the
+                end of the text.
+            past_key_values (`Cache`):
+                The talker cache filled by the prefill.
+            residual_codes_cache (`Qwen3TTSResidualCodesCache`, *optional*):
+                Code predictor caches owned by the caller and reused by every step.
+
+        Returns:
+            logits (`torch.FloatTensor` of shape `(batch_size, vocab_size)`), codec_ids (`torch.LongTensor` of
+            shape `(batch_size, num_code_groups)`) of the consumed frame and the new `past_hidden`.
+        """
+        last_id_hidden = self.get_input_embeddings()(input_ids)
+        residual_codes, codec_hiddens = self.code_predictor.generate_residual_codes(
+            inputs_embeds=torch.cat((past_hidden, last_id_hidden), dim=1),
+            do_sample=subtalker_dosample,
+            top_p=subtalker_top_p,
+            top_k=subtalker_top_k,
+            temperature=subtalker_temperature,
+            residual_codes_cache=residual_codes_cache,
+        )
+        codec_ids = torch.cat((input_ids, residual_codes), dim=-1)
+        text_index = generation_step.clamp(max=trailing_text_hidden.shape[1] - 1)
+        text_index = text_index.view(-1, 1, 1).expand(input_ids.shape[0], 1, trailing_text_hidden.shape[-1])
+        inputs_embeds = codec_hiddens.sum(1, keepdim=True) + trailing_text_hidden.gather(1, text_index)
+
+        position_ids = (cache_position.view(1, 1) + rope_deltas).unsqueeze(0).expand(3, -1, -1)
+
+        # for a single query the 4D masks are cheap elementwise expressions, while the generic mask builders of
+        # `self.model` cost more than the step itself on a static cache. Like those builders, the mask of every
+        # attention type covers the cache of its first layer: a sliding window layer of a `StaticCache` only keeps
+        # the last `sliding_window` positions, oldest first.
+        causal_mask_mapping = {}
+        for layer_type in dict.fromkeys(self.config.layer_types):
+            if self.config._attn_implementation not in ("sdpa", "eager"):
+                causal_mask_mapping[layer_type] = attention_mask
+                continue
+            layer_idx = self.config.layer_types.index(layer_type)
+            kv_length, _ = past_key_values.get_mask_sizes(cache_position, layer_idx)
+            kv_index = torch.arange(kv_length, device=attention_mask.device).view(1, -1)
+            if past_key_values.is_sliding[layer_idx]:
+                kv_index = kv_index + (cache_position.view(1, 1) - self.config.sliding_window + 1).clamp(min=0)
+                padding_mask = attention_mask.bool().gather(1, kv_index.expand(attention_mask.shape[0], -1))
+            else:
+                padding_mask = attention_mask[:, :kv_length].bool()
+            causal_mask = (kv_index <= cache_position.view(1, 1)) & padding_mask
+            if layer_type == "sliding_attention":
+                causal_mask = causal_mask & (kv_index > cache_position.view(1, 1) - self.config.sliding_window)
+            causal_mask = causal_mask[:, None, None, :]
+            if self.config._attn_implementation == "eager":
+                causal_mask = torch.where(
+                    causal_mask,
+                    torch.tensor(0.0, device=causal_mask.device, dtype=inputs_embeds.dtype),
+                    torch.finfo(inputs_embeds.dtype).min,
+                )
+            causal_mask_mapping[layer_type] = causal_mask
+
+        outputs: BaseModelOutputWithPast = self.model(
+            input_ids=None,
+            attention_mask=causal_mask_mapping,
+            position_ids=position_ids,
+            past_key_values=past_key_values,
+            inputs_embeds=inputs_embeds,
+            use_cache=True,
+            cache_position=cache_position,
+        )
+        hidden_states = outputs.last_hidden_state
+        logits = self.codec_head(hidden_states[:, -1])
+        return logits, codec_ids, hidden_states[:, -1:]
+
     def get_rope_index(
         self,
         attention_mask: Optional[torch.Tensor] = None,
@@ -1810,6 +2330,286 @@ class Qwen3TTSTalkerForConditionalGeneration(Qwen3TTSTalkerTextPreTrainedModel,
         return model_kwargs
 
 
+class Qwen3TTSTalkerPrefixCache:
+    """
+    LRU store of talker KV caches for prompt prefixes that do not depend on the target text.
+
+    Every talker prompt starts with positions that only depend on the voice: the instruct text, the role tokens, the
+    codec think/language tags, the speaker embedding and, in ICL mode, the reference transcript. Their keys/values
+    are computed once per distinct prefix and reused by later requests, which then only prefill the rest of the
+    prompt. Entries are keyed by a hash of the inputs the prefix is built from (instruct and role tokens, speaker
+    name or embedding, language, reference transcript and codes, `non_streaming_mode` and the prefix length), so a
+    change in any of them selects a different entry. Those inputs are kept on the host by `Qwen3TTSModel`, so a key
+    costs no device sync. The `namespace` separates the entries of different checkpoints in a shared `cache_dir`.
+
+    In ICL mode the reference codes come after the target text in the prompt and are therefore always prefilled.
+    """
+
+    def __init__(self, max_entries: int = 32, cache_dir: Optional[str] = None, namespace: str = ""):
+        """
+        Args:
+            max_entries (int, default=32):
+                Number of prefixes kept in memory; the least recently used one is dropped first.
+            cache_dir (Optional[str]):
+                If set, every computed prefix is also written there as a safetensors file and looked up there on a
+                memory miss, so the cache survives restarts.
+            namespace (str, default=""):
+                Mixed into every key, identifies the model the keys/values were computed with.
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.namespace = namespace
+        self.entries: "OrderedDict[str, list[tuple[torch.Tensor, torch.Tensor]]]" = OrderedDict()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def hash_parts(*parts) -> str:
+        """
+        sha1 of a sequence of tensors and plain values. Tensors are hashed by dtype, shape and content and copied to
+        the host first if needed, everything else by its `repr`.
+        """
+        digest = hashlib.sha1()
+        for part in parts:
+            if isinstance(part, torch.Tensor):
+                data = part.detach().cpu().contiguous()
+                digest.update(f"{data.dtype}{tuple(data.shape)}".encode())
+                # raw bytes, bfloat16 has no numpy counterpart
+                digest.update(data.reshape(-1).view(torch.uint8).numpy().tobytes())
+            else:
+                digest.update(repr(part).encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def prefix_key(self, *parts) -> str:
+        """
+        Key of the prefix built from `parts`, see `Qwen3TTSTalkerForConditionalGeneration._build_talker_inputs`.
+        """
+        return self.hash_parts(self.namespace, *parts)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"talker_prefix_{key}.safetensors")
+
+    def get(self, key: str, device: torch.device) -> Optional[list[tuple[torch.Tensor, torch.Tensor]]]:
+        """
+        Returns the per-layer `(keys, values)` of a prefix, each `(1, num_key_value_heads, prefix_len, head_dim)`.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        if self.cache_dir is None or not os.path.exists(self._path(key)):
+            return None
+        tensors = load_safetensors(self._path(key), device=str(device))
+        layers = [(tensors[f"key.{i}"], tensors[f"value.{i}"]) for i in range(len(tensors) // 2)]
+        self._insert(key, layers)
+        return layers
+
+    def put(self, key: str, layers: list[tuple[torch.Tensor, torch.Tensor]]) -> None:
+        self._insert(key, layers)
+        if self.cache_dir is not None:
+            tensors = {}
+            for i, (keys, values) in enumerate(layers):
+                tensors[f"key.{i}"] = keys.contiguous()
+                tensors[f"value.{i}"] = values.contiguous()
+            save_safetensors(tensors, self._path(key))
+
+    def _insert(self, key: str, layers: list[tuple[torch.Tensor, torch.Tensor]]) -> None:
+        self.entries[key] = layers
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class Qwen3TTSTalkerCodeCollector:
+    """
+    Preallocated store of the codec frames produced during `Qwen3TTSTalkerForConditionalGeneration.generate`.
+
+    Passed to the talker as `codec_collector`, every decode step writes the `num_code_groups` codes of the frame it
+    consumed into a `(batch_size, max_frames, num_code_groups)` long tensor, so `generate` does not need
+    `output_hidden_states=True` and the per-step all-layer hidden states that come with it. With
+    `keep_hidden_states=True` the last-layer talker hidden state that predicted each frame is kept as well.
+
+    When finished sequences are dropped from the talker batch, `select_rows` keeps `rows`, the buffer row of every
+    active sequence, in sync; the slots of a sequence past its last frame are left unwritten.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        max_frames: int,
+        num_code_groups: int,
+        device: torch.device,
+        keep_hidden_states: bool = False,
+    ):
+        """
+        Args:
+            batch_size (int):
+                Number of sequences generated together.
+            max_frames (int):
+                Upper bound on the number of decode steps, i.e. `max_new_tokens`.
+            num_code_groups (int):
+                Codes per frame.
+            device (torch.device):
+                Device of the code buffer.
+            keep_hidden_states (bool, default=False):
+                Also keep the last-layer hidden state of every step.
+        """
+        self.codes = torch.empty(batch_size, max_frames, num_code_groups, dtype=torch.long, device=device)
+        self.rows = torch.arange(batch_size, device=device)
+        self.num_frames = 0
+        self.keep_hidden_states = keep_hidden_states
+        self.hidden_states = None
+        self.num_hidden_states = 0
+
+    def append(self, codec_ids: Optional[torch.LongTensor], past_hidden: torch.FloatTensor) -> None:
+        """
+        Record one talker forward of the active rows: `codec_ids` `(num_rows, num_code_groups)` of the consumed
+        frame (`None` for the prefill) and its last hidden state `(num_rows, 1, hidden_size)`.
+        """
+        if codec_ids is not None:
+            self.codes[self.rows, self.num_frames] = codec_ids
+            self.num_frames += 1
+        if self.keep_hidden_states:
+            if self.hidden_states is None:
+                self.hidden_states = past_hidden.new_empty(
+                    self.codes.shape[0], self.codes.shape[1] + 1, past_hidden.shape[-1]
+                )
+            self.hidden_states[self.rows, self.num_hidden_states] = past_hidden[:, -1]
+            self.num_hidden_states += 1
+
+    def select_rows(self, index: torch.LongTensor) -> None:
+        """
+        Keep only the active rows at positions `index`, in that order, for the following steps.
+        """
+        self.rows = self.rows.index_select(0, index)
+
+    def get_codes(self) -> torch.LongTensor:
+        """
+        Returns the collected frames, `(batch_size, num_frames, num_code_groups)`.
+        """
+        return self.codes[:, : self.num_frames]
+
+    def get_hidden_states(self) -> Optional[torch.FloatTensor]:
+        """
+        Returns the hidden state that predicted the first code of every collected frame,
+        `(batch_size, num_frames, hidden_size)`, or `None` without `keep_hidden_states`.
+        """
+        if self.hidden_states is None:
+            return None
+        return self.hidden_states[:, : self.num_frames]
+
+
+class _PaddedMinNewTokensLengthLogitsProcessor(MinNewTokensLengthLogitsProcessor):
+    """
+    `MinNewTokensLengthLogitsProcessor` for histories of different lengths padded into one tensor with
+    `pad_token_id`: every row counts its own tokens.
+    """
+
+    def __init__(self, min_new_tokens: int, eos_token_id: int, pad_token_id: int, device: str = "cpu"):
+        super().__init__(0, min_new_tokens, eos_token_id, device=device)
+        self.pad_token_id = pad_token_id
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        too_short = (input_ids != self.pad_token_id).sum(-1) < self.min_new_tokens
+        eos_token_mask = torch.isin(torch.arange(scores.shape[-1], device=scores.device), self.eos_token_id)
+        return scores.masked_fill(too_short[:, None] & eos_token_mask, -float("inf"))
+
+
+@dataclass
+class _SpeculativeTalkerState:
+    """
+    Talker cache of a batch of sequences in speculative generation.
+
+    Every `feed` appends the same number of positions to all rows, right-padded to the longest row. Padding, and the
+    frames `commit` drops, stay in the cache as holes that `attention_mask` hides; the rope position of a frame only
+    counts the attended positions before it, so each row sees exactly the sequence it would see on its own.
+    `cache_frames` holds the frame index of every cache position (-1 for the prompt). `hidden_states[i, k]` is the
+    hidden state that predicts frame `num_frames[i] + k` of row `i`, for `k <= num_fed[i] - num_frames[i]`.
+    """
+
+    model: "Qwen3TTSForConditionalGeneration"
+    past_key_values: Cache
+    attention_mask: torch.LongTensor
+    cache_frames: torch.LongTensor
+    text_hidden: torch.FloatTensor
+    hidden_states: torch.FloatTensor
+    num_frames: torch.LongTensor
+    num_fed: torch.LongTensor
+
+    def feed(self, codec_ids: torch.LongTensor, num_new: torch.LongTensor) -> None:
+        """
+        Append the first `num_new[i]` frames of `codec_ids[i]`, `(batch_size, length, num_code_groups)`, to row `i`,
+        starting at its frame `num_fed[i]`.
+        """
+        talker = self.model.talker
+        batch_size, length, num_code_groups = codec_ids.shape
+        if length == 0:
+            return
+        steps = torch.arange(length, device=codec_ids.device)
+        valid = steps < num_new[:, None]
+        frame_index = self.num_fed[:, None] + steps
+        codec_embeds = talker.get_codec_embeds(codec_ids.reshape(-1, num_code_groups)).sum(1)
+        # frames past the end of the text use the tts_pad position at the end of `text_hidden`
+        text_index = frame_index.clamp(max=self.text_hidden.shape[1] - 1)
+        text_embeds = self.text_hidden.gather(1, text_index[..., None].expand(-1, -1, self.text_hidden.shape[-1]))
+        inputs_embeds = codec_embeds.view(batch_size, length, -1) + text_embeds
+        position_ids = self.attention_mask.sum(1, keepdim=True) + steps
+        self.attention_mask = torch.cat([self.attention_mask, valid.long()], dim=1)
+        self.cache_frames = torch.cat([self.cache_frames, frame_index], dim=1)
+        hidden_states = talker.forward_frames(inputs_embeds, self.past_key_values, self.attention_mask, position_ids)
+
+        # row i continues its valid prefix of `hidden_states` with its new frames
+        offset = self.num_fed - self.num_frames + 1
+        columns = torch.arange(self.hidden_states.shape[1] + length, device=codec_ids.device)
+        old = columns.clamp(max=self.hidden_states.shape[1] - 1).expand(batch_size, -1)
+        new = (columns - offset[:, None]).clamp(0, length - 1)
+        hidden_size = hidden_states.shape[-1]
+        self.hidden_states = torch.where(
+            (columns < offset[:, None])[..., None],
+            self.hidden_states.gather(1, old[..., None].expand(-1, -1, hidden_size)),
+            hidden_states.gather(1, new[..., None].expand(-1, -1, hidden_size)),
+        )
+        self.num_fed = self.num_fed + num_new
+
+    def hidden(self, frame_index: torch.LongTensor) -> torch.FloatTensor:
+        """
+        Hidden states predicting frames `frame_index`, `(batch_size, n)` -> `(batch_size, n, hidden_size)`. Frames
+        past `num_fed` get the last hidden state of their row.
+        """
+        column = (frame_index - self.num_frames[:, None]).clamp(min=0)
+        column = torch.minimum(column, (self.num_fed - self.num_frames)[:, None])
+        return self.hidden_states.gather(1, column[..., None].expand(-1, -1, self.hidden_states.shape[-1]))
+
+    def commit(self, num_frames: torch.LongTensor) -> None:
+        """
+        Keep the first `num_frames[i]` frames of row `i` in the cache and drop the rest.
+        """
+        self.hidden_states = self.hidden(num_frames[:, None])
+        self.attention_mask = self.attention_mask * (self.cache_frames < num_frames[:, None])
+        self.num_frames = num_frames
+        self.num_fed = num_frames
+        # positions no row attends anymore at the end of the cache are cut off
+        length = int(self.attention_mask.any(0).nonzero().max()) + 1
+        if length < self.attention_mask.shape[1]:
+            self.past_key_values.crop(length)
+            self.attention_mask = self.attention_mask[:, :length]
+            self.cache_frames = self.cache_frames[:, :length]
+
+    def select_rows(self, index: torch.LongTensor) -> None:
+        """
+        Keep the rows `index` of the batch, e.g. when sequences finish.
+        """
+        self.past_key_values.batch_select_indices(index)
+        for name in ("attention_mask", "cache_frames", "text_hidden", "hidden_states", "num_frames", "num_fed"):
+            setattr(self, name, getattr(self, name).index_select(0, index))
+
+
 class Qwen3TTSForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin):
     config_class = Qwen3TTSConfig
 
@@ -1826,6 +2626,7 @@ class Qwen3TTSForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin)
 
         self.speech_tokenizer = None
         self.generate_config = None
+        self.talker_prefix_cache: Optional[Qwen3TTSTalkerPrefixCache] = None
 
         self.supported_speakers = self.config.talker_config.spk_id.keys()
         self.supported_languages = ["auto"]
@@ -1834,6 +2635,15 @@ class Qwen3TTSForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin)
                 self.supported_languages.append(language_id)
         
         self.speaker_encoder_sample_rate = self.config.speaker_encoder_config.sample_rate
+        self.speaker_mel_features = SpeakerMelFeatures(
+            n_fft=1024,
+            num_mels=128,
+            sampling_rate=24000,
+            hop_size=256,
+            win_size=1024,
+            fmin=0,
+            fmax=12000,
+        )
         self.tokenizer_type = self.config.tokenizer_type
         self.tts_model_size = self.config.tts_model_size
         self.tts_model_type = self.config.tts_model_type
@@ -1845,6 +2655,22 @@ class Qwen3TTSForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin)
     
     def load_generate_config(self, generate_config):
         self.generate_config = generate_config
+
+    def enable_prefix_cache(self, max_entries: int = 32, cache_dir: Optional[str] = None):
+        """
+        Reuse the talker KV cache of voice prefixes across `generate` / `stream_generate` calls, see
+        `Qwen3TTSTalkerPrefixCache`.
+        """
+        # a slice of the codec embedding tells checkpoints apart, prefix keys only cover the inputs
+        namespace = Qwen3TTSTalkerPrefixCache.hash_parts(
+            self.config.name_or_path, self.talker.get_input_embeddings().weight[:, :8]
+        )
+        self.talker_prefix_cache = Qwen3TTSTalkerPrefixCache(
+            max_entries=max_entries, cache_dir=cache_dir, namespace=namespace
+        )
+
+    def disable_prefix_cache(self):
+        self.talker_prefix_cache = None
     
     def get_supported_speakers(self):
         return self.supported_speakers
@@ -1939,20 +2765,66 @@ class Qwen3TTSForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin)
     
     @torch.inference_mode()
     def extract_speaker_embedding(self, audio, sr):
+        return self.extract_speaker_embeddings([audio], sr)[0]
+
+    @torch.inference_mode()
+    def extract_speaker_embeddings(
+        self,
+        audios: list[np.ndarray],
+        sr: int,
+        batch_size: int = 32,
+        max_padding_ratio: float = 0.1,
+    ) -> list[torch.Tensor]:
+        """
+        Speaker embeddings of several waveforms, batched through the speaker encoder.
+
+        Waveforms are sorted by length and grouped into buckets of at most `batch_size` items whose lengths are
+        within `max_padding_ratio` of the longest one. Each bucket costs one mel extraction, overlapped with the
+        previous bucket's encoder pass, and one speaker-encoder forward. The encoder is given the valid frame counts,
+        so every embedding matches one-by-one extraction up to floating point noise. The ratio only bounds the compute
+        spent on padding.
+
+        Args:
+            audios (list[np.ndarray]):
+                1-D float waveforms at 24kHz.
+            sr (int):
+                Sample rate, must be 24000.
+            batch_size (int, default=32):
+                Maximum number of waveforms per speaker-encoder forward.
+            max_padding_ratio (float, default=0.1):
+                Maximum relative padding of a bucket member. 0 only batches waveforms of identical length.
+
+        Returns:
+            list[torch.Tensor]: one `(enc_dim,)` embedding per waveform, in input order.
+        """
         assert sr == 24000, "Only support 24kHz audio"
-        mels = mel_spectrogram(
-            torch.from_numpy(audio).unsqueeze(0), 
-            n_fft=1024, 
-            num_mels=128, 
-            sampling_rate=24000,
-            hop_size=256, 
-            win_size=1024, 
-            fmin=0, 
-            fmax=12000
-        ).transpose(1, 2)
-        speaker_embedding = self.speaker_encoder(mels.to(self.device).to(self.dtype))[0]
-        return speaker_embedding
-    
+        if not audios:
+            return []
+        order = sorted(range(len(audios)), key=lambda i: len(audios[i]), reverse=True)
+        buckets = []
+        for i in order:
+            if (
+                buckets
+                and len(buckets[-1]) < batch_size
+                and len(audios[i]) * (1 + max_padding_ratio) >= len(audios[buckets[-1][0]])
+            ):
+                buckets[-1].append(i)
+            else:
+                buckets.append([i])
+
+        # the mels of the next bucket are computed on a background thread while the encoder runs
+        speaker_embeddings = [None] * len(audios)
+        pending = self.speaker_mel_features.submit([torch.from_numpy(audios[i]) for i in buckets[0]])
+        for k, bucket in enumerate(buckets):
+            mels, frame_lengths = pending.result()
+            if k + 1 < len(buckets):
+                pending = self.speaker_mel_features.submit([torch.from_numpy(audios[i]) for i in buckets[k + 1]])
+            lengths = None if bool((frame_lengths == frame_lengths[0]).all()) else frame_lengths.to(self.device)
+            embeddings = self.speaker_encoder(mels.transpose(1, 2).to(self.device).to(self.dtype), lengths=lengths)
+            for i, embedding in zip(bucket, embeddings):
+                speaker_embeddings[i] = embedding
+        return speaker_embeddings
+
     @torch.inference_mode()
     def generate_speaker_prompt(
         self,
@@ -2018,54 +2890,33 @@ class Qwen3TTSForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin)
                 text_embed = torch.cat([text_embed] + [tts_pad_embed] * (codec_lens - text_lens), dim=1)
                 return text_embed + codec_embed, tts_pad_embed
 
-    @torch.no_grad()
-    def generate(
+    def _build_talker_inputs(
         self,
-        input_ids: Optional[list[torch.Tensor]] = None,
+        input_ids: list[torch.Tensor],
         instruct_ids: Optional[list[torch.Tensor]] = None,
         ref_ids: Optional[list[torch.Tensor]] = None,
         voice_clone_prompt: list[dict] = None,
         languages: list[str] = None,
         speakers: list[str] = None,
-        non_streaming_mode = False,
-        max_new_tokens: int = 4096,
-        do_sample: bool = True,
-        top_k: int = 50,
-        top_p: float = 1.0,
-        temperature: float = 0.9,
-        subtalker_dosample: bool = True,
-        subtalker_top_k: int = 50,
-        subtalker_top_p: float = 1.0,
-        subtalker_temperature: float = 0.9,
-        eos_token_id: Optional[int] = None,
-        repetition_penalty: float = 1.05,
-        **kwargs,
+        non_streaming_mode: bool = False,
+        return_prefix_lens: bool = False,
     ):
-        talker_kwargs = {
-            "max_new_tokens": max_new_tokens,
-            "min_new_tokens": 2,
-            "do_sample": do_sample,
-            "top_k": top_k,
-            "top_p": top_p,
-            "temperature": temperature,
-            "subtalker_dosample": subtalker_dosample, 
-            "subtalker_top_k": subtalker_top_k,
-            "subtalker_top_p": subtalker_top_p,
-            "subtalker_temperature": subtalker_temperature,
-            "eos_token_id": eos_token_id
-            if eos_token_id is not None
-            else self.config.talker_config.codec_eos_token_id,
-            "repetition_penalty": repetition_penalty,
-            "suppress_tokens": [
-                i
-                for i in range(self.config.talker_config.vocab_size - 1024, self.config.talker_config.vocab_size)
-                if i not in (self.config.talker_config.codec_eos_token_id,)
-            ],
-            "output_hidden_states": getattr(kwargs, "output_hidden_states", True),
-            "return_dict_in_generate": getattr(kwargs, "return_dict_in_generate", True)
-        }
-        
+        """
+        Build the left-padded talker prefill embeddings shared by `generate` and `stream_generate`.
+
+        Returns:
+            tuple: `(talker_input_embeds, talker_attention_mask, trailing_text_hiddens, tts_pad_embed)` where
+            `talker_input_embeds` is `(batch, prefill_len, hidden)`, `talker_attention_mask` is `(batch, prefill_len)`
+            and `trailing_text_hiddens` is `(batch, max_trailing_len, hidden)` padded with `tts_pad_embed`.
+            With `return_prefix_lens=True` a fifth element lists, per sequence, how many leading (unpadded) positions
+            do not depend on the target text, and a sixth their `Qwen3TTSTalkerPrefixCache` keys (None while the
+            prefix cache is disabled).
+
+        Token ids may be passed on the host, they are moved to the talker device here.
+        """
         talker_input_embeds = [[] for _ in range(len(input_ids))]
+        prefix_lens = []
+        prefix_keys = []
 
         voice_clone_spk_embeds = None
         # voice clone speaker prompt generate
@@ -2076,6 +2927,7 @@ class Qwen3TTSForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin)
         if instruct_ids is not None:
             for index, instruct_id in enumerate(instruct_ids):
                 if instruct_id is not None:
+                    instruct_id = instruct_id.to(self.talker.device)
                     talker_input_embeds[index].append(self.talker.text_projection(
                                                   self.talker.get_text_embeddings()(instruct_id)))
 
@@ -2084,6 +2936,7 @@ class Qwen3TTSForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin)
         if speakers is None:
             speakers = [None] * len(input_ids)
         for index, (input_id, language, speaker) in enumerate(zip(input_ids, languages, speakers)):
+            input_id = input_id.to(self.talker.device)
             if voice_clone_spk_embeds is None:
                 if speaker == "" or speaker == None: # Instruct create speaker
                     speaker_embed = None
@@ -2184,17 +3037,23 @@ class Qwen3TTSForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin)
                                             ), dim=1) + codec_input_emebdding[:, :-1]
 
             talker_input_embed = torch.cat((_talker_input_embed_role, _talker_input_embed), dim=1)
+            prefix_len = sum(t.shape[1] for t in talker_input_embeds[index] if t is not None) + talker_input_embed.shape[1]
 
             if voice_clone_prompt is not None and voice_clone_prompt["ref_code"] is not None and voice_clone_prompt["icl_mode"][index]:
                 icl_input_embed, trailing_text_hidden = self.generate_icl_prompt(
                     text_id=input_id[:, 3:-5],
-                    ref_id=ref_ids[index][:, 3:-2],
+                    ref_id=ref_ids[index][:, 3:-2].to(self.talker.device),
                     ref_code=voice_clone_prompt["ref_code"][index].to(self.talker.device),
                     tts_pad_embed=tts_pad_embed,
                     tts_eos_embed=tts_eos_embed,
                     non_streaming_mode=non_streaming_mode,
                 )
                 talker_input_embed = torch.cat([talker_input_embed, icl_input_embed], dim=1)
+                # the reference transcript leads the ICL text track; in streaming mode it is summed with the codec
+                # track (codec bos + ref codes), which only covers it up to the number of ref frames + 1
+                ref_len = ref_ids[index][:, 3:-2].shape[1]
+                codec_len = voice_clone_prompt["ref_code"][index].shape[0] + 1
+                prefix_len += ref_len if non_streaming_mode else min(ref_len, codec_len)
             else:
                 #  tts_text_first_token
                 talker_input_embed = torch.cat([talker_input_embed, 
@@ -2232,6 +3091,15 @@ class Qwen3TTSForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin)
                                                     ), tts_eos_embed), dim=1)
             talker_input_embeds[index].append(talker_input_embed)
             trailing_text_hiddens.append(trailing_text_hidden)
+            # leave at least two positions to prefill, the talker treats a single-position forward as a decode step
+            total_len = sum(t.shape[1] for t in talker_input_embeds[index] if t is not None)
+            prefix_lens.append(max(0, min(prefix_len, total_len - 2)))
+            prefix_keys.append(
+                self._talker_prefix_key(
+                    index, input_ids, instruct_ids, ref_ids, voice_clone_prompt, speaker, language_id,
+                    non_streaming_mode, prefix_lens[-1],
+                )
+            )
         
         for index, talker_input_embed in enumerate(talker_input_embeds):
             talker_input_embeds[index] = torch.cat([item for item in talker_input_embed if item is not None], dim=1)
@@ -2268,29 +3136,860 @@ class Qwen3TTSForConditionalGeneration(Qwen3TTSPreTrainedModel, GenerationMixin)
         padded_hiddens[padding_mask] = pad_embedding_vector
         trailing_text_hiddens = padded_hiddens
 
-        # forward
-        talker_result = self.talker.generate(
-            inputs_embeds=talker_input_embeds,
-            attention_mask=talker_attention_mask,
+        if return_prefix_lens:
+            return (
+                talker_input_embeds, talker_attention_mask, trailing_text_hiddens, tts_pad_embed, prefix_lens,
+                prefix_keys,
+            )
+        return talker_input_embeds, talker_attention_mask, trailing_text_hiddens, tts_pad_embed
+
+    def _talker_prefix_key(
+        self,
+        index: int,
+        input_ids: list[torch.Tensor],
+        instruct_ids: Optional[list[torch.Tensor]],
+        ref_ids: Optional[list[torch.Tensor]],
+        voice_clone_prompt: Optional[dict],
+        speaker: Optional[str],
+        language_id: Optional[int],
+        non_streaming_mode: bool,
+        prefix_len: int,
+    ) -> Optional[str]:
+        """
+        `Qwen3TTSTalkerPrefixCache` key of the prefix of sequence `index`, from the inputs it is built of rather
+        than its embeddings, which live on the device. None while the prefix cache is disabled or nothing is cached.
+        """
+        if self.talker_prefix_cache is None or prefix_len == 0:
+            return None
+        instruct_id = instruct_ids[index] if instruct_ids is not None else None
+        parts = [instruct_id, input_ids[index][:, :3], language_id, prefix_len]
+        if voice_clone_prompt is None:
+            parts.append(speaker.lower() if speaker else None)
+        else:
+            if voice_clone_prompt["x_vector_only_mode"][index] or voice_clone_prompt["icl_mode"][index]:
+                parts.append(voice_clone_prompt["ref_spk_embedding"][index])
+            if voice_clone_prompt["ref_code"] is not None and voice_clone_prompt["icl_mode"][index]:
+                parts += [ref_ids[index][:, 3:-2], voice_clone_prompt["ref_code"][index], bool(non_streaming_mode)]
+        return self.talker_prefix_cache.prefix_key(*parts)
+
+    def _get_prefix_kv(
+        self, prefix_embeds: torch.Tensor, key: Optional[str] = None
+    ) -> list[tuple[torch.Tensor, torch.Tensor]]:
+        """
+        Per-layer talker `(keys, values)` of one unpadded prompt prefix `(1, prefix_len, hidden)`, served from
+        `self.talker_prefix_cache` under `key` when enabled.
+        """
+        prefix_cache = self.talker_prefix_cache if key is not None else None
+        if prefix_cache is not None:
+            layers = prefix_cache.get(key, device=prefix_embeds.device)
+            if layers is not None:
+                return layers
+
+        prefix_len = prefix_embeds.shape[1]
+        past_key_values = DynamicCache()
+        self.talker.model(
+            inputs_embeds=prefix_embeds,
+            attention_mask=torch.ones((1, prefix_len), dtype=torch.long, device=prefix_embeds.device),
+            position_ids=torch.arange(prefix_len, device=prefix_embeds.device).view(1, 1, -1).expand(3, 1, -1),
+            past_key_values=past_key_values,
+            use_cache=True,
+            cache_position=torch.arange(prefix_len, device=prefix_embeds.device),
+        )
+        layers = [(layer.keys, layer.values) for layer in past_key_values.layers]
+        if prefix_cache is not None:
+            prefix_cache.put(key, layers)
+        return layers
+
+    def _split_talker_prefix(
+        self,
+        talker_input_embeds: torch.Tensor,
+        attention_mask: torch.Tensor,
+        prefix_lens: list[int],
+        prefix_keys: list[Optional[str]],
+    ):
+        """
+        Move the cacheable prefix of every row out of a left-padded prefill batch.
+
+        The batch is re-laid out as `[pad | prefix | pad | rest]`: all prefixes are right-aligned in the first
+        `max_prefix_len` columns and all rests in the remaining ones. The attention mask covers both segments and the
+        talker derives rope positions from it, so the middle padding is transparent.
+
+        Returns:
+            tuple: `(talker_input_embeds, attention_mask, prefix_kv, max_prefix_len)`. The first `max_prefix_len`
+            columns of `talker_input_embeds` are zeros and must not be fed to the talker; `prefix_kv` holds the
+            per-layer `(keys, values)` of those columns, `(batch, num_key_value_heads, max_prefix_len, head_dim)`.
+        """
+        batch_size, seq_len, hidden_size = talker_input_embeds.shape
+        num_pads = (seq_len - attention_mask.sum(dim=-1)).tolist()
+        max_prefix_len = max(prefix_lens)
+        rest_lens = [seq_len - pad - prefix_len for pad, prefix_len in zip(num_pads, prefix_lens)]
+        max_rest_len = max(rest_lens)
+        total_len = max_prefix_len + max_rest_len
+
+        new_embeds = talker_input_embeds.new_zeros((batch_size, total_len, hidden_size))
+        new_mask = attention_mask.new_zeros((batch_size, total_len))
+        prefix_kv = None
+        for i, (pad, prefix_len, rest_len) in enumerate(zip(num_pads, prefix_lens, rest_lens)):
+            new_embeds[i, total_len - rest_len :] = talker_input_embeds[i, seq_len - rest_len :]
+            new_mask[i, total_len - rest_len :] = 1
+            if prefix_len == 0:
+                continue
+            new_mask[i, max_prefix_len - prefix_len : max_prefix_len] = 1
+            row_kv = self._get_prefix_kv(talker_input_embeds[i : i + 1, pad : pad + prefix_len], prefix_keys[i])
+            if prefix_kv is None:
+                prefix_kv = [
+                    (
+                        keys.new_zeros((batch_size, keys.shape[1], max_prefix_len, keys.shape[3])),
+                        values.new_zeros((batch_size, values.shape[1], max_prefix_len, values.shape[3])),
+                    )
+                    for keys, values in row_kv
+                ]
+            for (keys, values), (row_keys, row_values) in zip(prefix_kv, row_kv):
+                keys[i, :, max_prefix_len - prefix_len :] = row_keys[0]
+                values[i, :, max_prefix_len - prefix_len :] = row_values[0]
+        return new_embeds, new_mask, prefix_kv, max_prefix_len
+
+    def _prepare_talker_prefill(self, talker_input_embeds, attention_mask, prefix_lens, prefix_keys):
+        """
+        Apply the prefix cache, when enabled, to a prefill batch.
+
+        Returns:
+            tuple: `(talker_input_embeds, attention_mask, prefix_kv, prefix_len)`. The talker only has to run on
+            `talker_input_embeds[:, prefix_len:]` once `prefix_kv` (None when nothing is cached) has been written into
+            its cache with `_write_prefix_kv`.
+        """
+        if self.talker_prefix_cache is None or max(prefix_lens) == 0:
+            return talker_input_embeds, attention_mask, None, 0
+        return self._split_talker_prefix(talker_input_embeds, attention_mask, prefix_lens, prefix_keys)
+
+    @staticmethod
+    def _write_prefix_kv(past_key_values: Cache, prefix_kv: Optional[list[tuple[torch.Tensor, torch.Tensor]]]):
+        if prefix_kv is None:
+            return
+        cache_kwargs = {"cache_position": torch.arange(prefix_kv[0][0].shape[2], device=prefix_kv[0][0].device)}
+        for layer_idx, (keys, values) in enumerate(prefix_kv):
+            past_key_values.update(keys, values, layer_idx, cache_kwargs)
+
+    @torch.no_grad()
+    def generate(
+        self,
+        input_ids: Optional[list[torch.Tensor]] = None,
+        instruct_ids: Optional[list[torch.Tensor]] = None,
+        ref_ids: Optional[list[torch.Tensor]] = None,
+        voice_clone_prompt: list[dict] = None,
+        languages: list[str] = None,
+        speakers: list[str] = None,
+        non_streaming_mode = False,
+        max_new_tokens: int = 4096,
+        do_sample: bool = True,
+        top_k: int = 50,
+        top_p: float = 1.0,
+        temperature: float = 0.9,
+        subtalker_dosample: bool = True,
+        subtalker_top_k: int = 50,
+        subtalker_top_p: float = 1.0,
+        subtalker_temperature: float = 0.9,
+        eos_token_id: Optional[int] = None,
+        repetition_penalty: float = 1.05,
+        output_hidden_states: bool = False,
+        draft_model: Optional["Qwen3TTSForConditionalGeneration"] = None,
+        num_draft_frames: int = 4,
+        draft_voice_clone_prompt: Optional[dict] = None,
+        **kwargs,
+    ):
+        """
+        Generate the codec frames of a batch of prompts.
+
+        Sequences that emit `codec_eos_token_id` are dropped from the active batch at that step: their rows are
+        removed from the talker KV cache, the attention mask, `past_hidden`, `trailing_text_hidden` and the talker
+        `rope_deltas`, so the remaining sequences continue at the smaller batch size instead of running the talker
+        and the code predictor on padding until the longest one finishes. The sampling pipeline is the one
+        `stream_generate` uses, which mirrors `talker.generate`.
+
+        Codec frames are gathered by a `Qwen3TTSTalkerCodeCollector` rather than through `output_hidden_states`,
+        which would keep every layer's hidden states of every step.
+
+        With a `draft_model`, a smaller checkpoint with the same codec vocabulary, frames are generated
+        speculatively, see `_speculative_generate`. `num_draft_frames` frames are drafted per round, and
+        `draft_voice_clone_prompt` replaces `voice_clone_prompt` for the draft, whose speaker embeddings have a
+        different size than the target's.
+
+        Returns:
+            tuple: `(talker_codes_list, talker_hidden_states_list)`, one `(num_frames, num_code_groups)` tensor per
+            sequence, without the codec eos frame, and the matching `(num_frames, hidden_size)` talker hidden states
+            when `output_hidden_states=True`, otherwise `None`.
+        """
+        eos_token_id = eos_token_id if eos_token_id is not None else self.config.talker_config.codec_eos_token_id
+        if draft_model is not None:
+            if output_hidden_states:
+                raise ValueError("`output_hidden_states` is not supported with a `draft_model`.")
+            return self._speculative_generate(
+                draft_model=draft_model,
+                num_draft_frames=num_draft_frames,
+                draft_voice_clone_prompt=draft_voice_clone_prompt,
+                input_ids=input_ids,
+                instruct_ids=instruct_ids,
+                ref_ids=ref_ids,
+                voice_clone_prompt=voice_clone_prompt,
+                languages=languages,
+                speakers=speakers,
+                non_streaming_mode=non_streaming_mode,
+                max_new_tokens=max_new_tokens,
+                do_sample=do_sample,
+                top_k=top_k,
+                top_p=top_p,
+                temperature=temperature,
+                subtalker_dosample=subtalker_dosample,
+                subtalker_top_k=subtalker_top_k,
+                subtalker_top_p=subtalker_top_p,
+                subtalker_temperature=subtalker_temperature,
+                eos_token_id=eos_token_id,
+                repetition_penalty=repetition_penalty,
+            )
+        talker_input_embeds, attention_mask, trailing_text_hiddens, tts_pad_embed, prefix_lens, prefix_keys = (
+            self._build_talker_inputs(
+                input_ids=input_ids,
+                instruct_ids=instruct_ids,
+                ref_ids=ref_ids,
+                voice_clone_prompt=voice_clone_prompt,
+                languages=languages,
+                speakers=speakers,
+                non_streaming_mode=non_streaming_mode,
+                return_prefix_lens=True,
+            )
+        )
+        talker_input_embeds, attention_mask, prefix_kv, prefix_len = self._prepare_talker_prefill(
+            talker_input_embeds, attention_mask, prefix_lens, prefix_keys
+        )
+        batch_size, cur_len = talker_input_embeds.shape[:2]
+        device = talker_input_embeds.device
+        logits_processor = self._get_talker_logits_processor(
+            do_sample=do_sample,
+            top_k=top_k,
+            top_p=top_p,
+            temperature=temperature,
+            repetition_penalty=repetition_penalty,
+            eos_token_id=eos_token_id,
+            device=device,
+        )
+        subtalker_kwargs = {
+            "subtalker_dosample": subtalker_dosample,
+            "subtalker_top_k": subtalker_top_k,
+            "subtalker_top_p": subtalker_top_p,
+            "subtalker_temperature": subtalker_temperature,
+            "residual_codes_cache": Qwen3TTSResidualCodesCache(self.config.talker_config.code_predictor_config),
+        }
+        codec_collector = Qwen3TTSTalkerCodeCollector(
+            batch_size=batch_size,
+            max_frames=max_new_tokens,
+            num_code_groups=self.config.talker_config.num_code_groups,
+            device=device,
+            keep_hidden_states=output_hidden_states,
+        )
+
+        # prefill
+        past_key_values = BlockKVCache.for_batch(self.talker.config, batch_size, cur_len + max_new_tokens)
+        self._write_prefix_kv(past_key_values, prefix_kv)
+        outputs = self.talker(
+            inputs_embeds=talker_input_embeds[:, prefix_len:],
+            attention_mask=attention_mask,
+            past_key_values=past_key_values,
+            use_cache=True,
+            cache_position=torch.arange(prefix_len, cur_len, device=device),
             trailing_text_hidden=trailing_text_hiddens,
             tts_pad_embed=tts_pad_embed,
-            **talker_kwargs,
+            codec_collector=codec_collector,
+            **subtalker_kwargs,
         )
-
-        talker_codes = torch.stack([hid[-1] for hid in talker_result.hidden_states if hid[-1] is not None], dim=1)
-        talker_hidden_states = torch.cat([hid[0][-1][:, -1:] for hid in talker_result.hidden_states], dim=1)[:, :-1]
-        
-        first_codebook = talker_codes[:, :, 0]
-        is_stop_token = (first_codebook ==  self.config.talker_config.codec_eos_token_id)
-        stop_indices = torch.argmax(is_stop_token.int(), dim=1)
-        has_stop_token = is_stop_token.any(dim=1)
-        effective_lengths = torch.where(has_stop_token, stop_indices, talker_codes.shape[1])
-        
-        talker_codes_list = [talker_codes[i, :length, ] for i, length in enumerate(effective_lengths)]
-        talker_hidden_states_list = [talker_hidden_states[i, :length, :] for i, length in enumerate(effective_lengths)]
-        
+        logits = outputs.logits[:, -1, :]
+        past_hidden = outputs.past_hidden
+        generation_step = outputs.generation_step
+
+        # frames per sequence, set when it finishes
+        lengths = torch.full((batch_size,), -1, dtype=torch.long, device=device)
+        generated_ids = torch.zeros((batch_size, 0), dtype=torch.long, device=device)
+        for step in range(max_new_tokens):
+            scores = logits_processor(generated_ids, logits.to(torch.float32))
+            if do_sample:
+                next_ids = torch.multinomial(F.softmax(scores, dim=-1), num_samples=1).squeeze(1)
+            else:
+                next_ids = torch.argmax(scores, dim=-1)
+            if step + 1 >= max_new_tokens:
+                break
+
+            finished = next_ids == eos_token_id
+            if finished.any():
+                lengths[codec_collector.rows[finished]] = step
+                if finished.all():
+                    break
+                keep = (~finished).nonzero().squeeze(1)
+                codec_collector.select_rows(keep)
+                past_key_values.batch_select_indices(keep)
+                self.talker.rope_deltas = self.talker.rope_deltas.index_select(0, keep)
+                next_ids = next_ids.index_select(0, keep)
+                generated_ids = generated_ids.index_select(0, keep)
+                attention_mask = attention_mask.index_select(0, keep)
+                past_hidden = past_hidden.index_select(0, keep)
+                trailing_text_hiddens = trailing_text_hiddens.index_select(0, keep)
+            generated_ids = torch.cat([generated_ids, next_ids[:, None]], dim=-1)
+
+            # the talker predicts the residual codebooks of `next_ids` while consuming it
+            attention_mask = torch.cat([attention_mask, attention_mask.new_ones((attention_mask.shape[0], 1))], dim=-1)
+            outputs = self.talker(
+                input_ids=next_ids[:, None],
+                attention_mask=attention_mask,
+                past_key_values=past_key_values,
+                use_cache=True,
+                cache_position=torch.tensor([cur_len], device=device),
+                past_hidden=past_hidden,
+                generation_step=generation_step,
+                trailing_text_hidden=trailing_text_hiddens,
+                tts_pad_embed=tts_pad_embed,
+                codec_collector=codec_collector,
+                **subtalker_kwargs,
+            )
+            logits = outputs.logits[:, -1, :]
+            past_hidden = outputs.past_hidden
+            generation_step = outputs.generation_step
+            cur_len += 1
+        lengths = torch.where(lengths < 0, codec_collector.num_frames, lengths).tolist()
+
+        talker_codes = codec_collector.get_codes()
+        talker_codes_list = [talker_codes[i, :length] for i, length in enumerate(lengths)]
+        talker_hidden_states_list = None
+        talker_hidden_states = codec_collector.get_hidden_states()
+        if talker_hidden_states is not None:
+            talker_hidden_states_list = [talker_hidden_states[i, :length] for i, length in enumerate(lengths)]
         return talker_codes_list, talker_hidden_states_list
 
+    def _speculative_generate(
+        self,
+        draft_model: "Qwen3TTSForConditionalGeneration",
+        num_draft_frames: int,
+        draft_voice_clone_prompt: Optional[dict],
+        input_ids: list[torch.Tensor],
+        instruct_ids: Optional[list[torch.Tensor]],
+        ref_ids: Optional[list[torch.Tensor]],
+        voice_clone_prompt: Optional[dict],
+        languages: Optional[list[str]],
+        speakers: Optional[list[str]],
+        non_streaming_mode: bool,
+        max_new_tokens: int,
+        do_sample: bool,
+        top_k: int,
+        top_p: float,
+        temperature: float,
+        subtalker_dosample: bool,
+        subtalker_top_k: int,
+        subtalker_top_p: float,
+        subtalker_temperature: float,
+        eos_token_id: int,
+        repetition_penalty: float,
+    ):
+        """
+        Speculative counterpart of `generate`, for the whole batch at once.
+
+        Every round the draft talker proposes up to `num_draft_frames` whole frames per sequence, first codebook and
+        residual codebooks, and the target talker consumes all of them in one forward. A single teacher-forced pass
+        of the target code predictor scores the drafted residual codebooks. The codes of a sequence form one chain,
+        frame after frame and codebook after codebook; each code is accepted with probability `min(1, p / q)` of the
+        target and draft distributions, all of them in one vectorized test, and the chain is cut at its first
+        rejection. The rejected code is resampled from `max(p - q, 0)` and the target code predictor completes the
+        rest of that frame, so every frame is distributed exactly as in `generate`. When a whole round is accepted,
+        the target's prediction for the next frame is kept as well. The talker prefix cache is not used in this mode.
+
+        Returns:
+            tuple: `(talker_codes_list, None)`, as `generate`.
+        """
+        target_config, draft_config = self.config.talker_config, draft_model.config.talker_config
+        for name in ("num_code_groups", "vocab_size", "codec_eos_token_id"):
+            if getattr(target_config, name) != getattr(draft_config, name):
+                raise ValueError(
+                    f"The draft model does not share the codec of the target model: {name} is "
+                    f"{getattr(draft_config, name)} instead of {getattr(target_config, name)}."
+                )
+        if draft_voice_clone_prompt is None:
+            draft_voice_clone_prompt = voice_clone_prompt
+        if draft_voice_clone_prompt is not None:
+            for spk_embedding in draft_voice_clone_prompt["ref_spk_embedding"]:
+                if spk_embedding.shape[-1] != draft_config.hidden_size:
+                    raise ValueError(
+                        "The voice clone prompt was made for another model size, pass `draft_voice_clone_prompt` "
+                        "created with the draft model."
+                    )
+
+        logits_processor = self._get_talker_logits_processor(
+            do_sample=do_sample,
+            top_k=top_k,
+            top_p=top_p,
+            temperature=temperature,
+            repetition_penalty=repetition_penalty,
+            eos_token_id=eos_token_id,
+            device=self.talker.device,
+            pad_token_id=target_config.codec_pad_id,
+        )
+        subtalker_kwargs = {
+            "do_sample": subtalker_dosample,
+            "top_k": subtalker_top_k,
+            "top_p": subtalker_top_p,
+            "temperature": subtalker_temperature,
+        }
+        inputs = dict(
+            input_ids=input_ids,
+            instruct_ids=instruct_ids,
+            ref_ids=ref_ids,
+            languages=languages,
+            speakers=speakers,
+            non_streaming_mode=non_streaming_mode,
+        )
+        target = self._speculative_talker_state(voice_clone_prompt=voice_clone_prompt, **inputs)
+        draft = draft_model._speculative_talker_state(voice_clone_prompt=draft_voice_clone_prompt, **inputs)
+        talker_codes_list = self._speculative_decode(
+            target,
+            draft,
+            num_draft_frames=num_draft_frames,
+            max_frames=max_new_tokens - 1,
+            logits_processor=logits_processor,
+            do_sample=do_sample,
+            subtalker_kwargs=subtalker_kwargs,
+            eos_token_id=eos_token_id,
+        )
+        return talker_codes_list, None
+
+    def _speculative_talker_state(self, **inputs) -> _SpeculativeTalkerState:
+        """
+        Prefill the talker with the left-padded prompts built from `_build_talker_inputs` arguments.
+        """
+        talker_input_embeds, attention_mask, trailing_text_hidden, tts_pad_embed = self._build_talker_inputs(**inputs)
+        batch_size = talker_input_embeds.shape[0]
+        past_key_values = DynamicCache()
+        position_ids = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+        hidden_states = self.talker.forward_frames(talker_input_embeds, past_key_values, attention_mask, position_ids)
+        num_frames = attention_mask.new_zeros(batch_size)
+        return _SpeculativeTalkerState(
+            model=self,
+            past_key_values=past_key_values,
+            attention_mask=attention_mask,
+            cache_frames=torch.full_like(attention_mask, -1),
+            # one tts_pad position at the end serves every frame past the end of the text
+            text_hidden=torch.cat([trailing_text_hidden, tts_pad_embed.expand(batch_size, 1, -1)], dim=1),
+            hidden_states=hidden_states[:, -1:],
+            num_frames=num_frames,
+            num_fed=num_frames,
+        )
+
+    def _speculative_decode(
+        self,
+        target: _SpeculativeTalkerState,
+        draft: _SpeculativeTalkerState,
+        num_draft_frames: int,
+        max_frames: int,
+        logits_processor: LogitsProcessorList,
+        do_sample: bool,
+        subtalker_kwargs: dict,
+        eos_token_id: int,
+    ) -> list[torch.LongTensor]:
+        """
+        Speculative decode loop of a prefilled batch, see `_speculative_generate`. Sequences leave the batch when
+        they finish, as in `generate`.
+
+        Returns:
+            list: one `(num_frames, num_code_groups)` `torch.LongTensor` per sequence, without the codec eos frame.
+        """
+        talker, draft_talker = self.talker, draft.model.talker
+        device = talker.device
+        pad_token_id = self.config.talker_config.codec_pad_id
+        num_code_groups = self.config.talker_config.num_code_groups
+        batch_size = target.num_frames.shape[0]
+        residual_codes_cache = Qwen3TTSResidualCodesCache(talker.code_predictor.config)
+        draft_residual_codes_cache = Qwen3TTSResidualCodesCache(draft_talker.code_predictor.config)
+
+        def first_code_probs(history, logits):
+            # `history` holds the first codes before each prediction, `pad_token_id` where a row has fewer
+            scores = logits_processor(history, logits.to(device=device, dtype=torch.float32))
+            return next_token_probs(scores, do_sample=do_sample, top_k=None, top_p=None, temperature=None)
+
+        def resample(p, q):
+            residual = (p - q).clamp(min=0)
+            residual = torch.where(residual.sum(-1, keepdim=True) > 0, residual, p)
+            return torch.multinomial(residual, num_samples=1).squeeze(1)
+
+        def take(values, index):
+            # values[i, index[i]] for every row i
+            index = index.view(-1, *([1] * (values.dim() - 1))).expand(-1, 1, *values.shape[2:])
+            return values.gather(1, index).squeeze(1)
+
+        if max_frames <= 0:
+            return [torch.zeros((0, num_code_groups), dtype=torch.long, device=device) for _ in range(batch_size)]
+        talker_codes_list = [None] * batch_size
+        rows = torch.arange(batch_size, device=device)
+        # frames of the active sequences, with room for one round past `max_frames`
+        frames = torch.full(
+            (batch_size, max_frames + num_draft_frames + 1, num_code_groups), pad_token_id, dtype=torch.long,
+            device=device,
+        )
+        num_frames = torch.zeros(batch_size, dtype=torch.long, device=device)
+        # frame counts on the host, synchronized once per round, size the tensors of the next round
+        host_num_frames, host_target_fed, host_draft_fed = [0] * batch_size, [0] * batch_size, [0] * batch_size
+        steps = torch.arange(num_draft_frames + 1, device=device)
+        while rows.numel() > 0:
+            # draft: catch up on the frames accepted last round, then propose whole frames for every row
+            num_pending = max(n - f for n, f in zip(host_num_frames, host_draft_fed))
+            pending = frames.gather(
+                1, (draft.num_fed[:, None] + steps[:num_pending])[..., None].expand(-1, -1, num_code_groups)
+            )
+            draft.feed(pending, num_frames - draft.num_fed)
+            draft.commit(num_frames)
+            num_drafts = (max_frames - num_frames).clamp(max=num_draft_frames)
+            round_len = min(num_draft_frames, max_frames - min(host_num_frames))
+            history = torch.where(
+                torch.arange(max(host_num_frames), device=device) < num_frames[:, None],
+                frames[:, : max(host_num_frames), 0],
+                pad_token_id,
+            )
+            drafted = frames.new_empty((rows.numel(), round_len, num_code_groups))
+            draft_first_probs, draft_residual_probs = [], []
+            hidden = draft.hidden_states[:, 0]
+            for j in range(round_len):
+                q = first_code_probs(torch.cat([history, drafted[:, :j, 0]], dim=1), draft_talker.codec_head(hidden))
+                code = torch.multinomial(q, num_samples=1)
+                residual_codes, _, residual_probs = draft_talker.code_predictor.generate_residual_codes(
+                    inputs_embeds=torch.cat([hidden[:, None], draft_talker.get_input_embeddings()(code)], dim=1),
+                    return_probs=True,
+                    residual_codes_cache=draft_residual_codes_cache,
+                    **subtalker_kwargs,
+                )
+                drafted[:, j] = torch.cat([code, residual_codes.to(device)], dim=1)
+                draft_first_probs.append(q)
+                draft_residual_probs.append(residual_probs.to(device))
+                if j + 1 < round_len:
+                    draft.feed(drafted[:, j : j + 1], torch.ones_like(num_frames))
+                    hidden = draft.hidden(num_frames[:, None] + j + 1)[:, 0]
+            draft_first_probs = torch.stack(draft_first_probs, dim=1)
+            draft_residual_probs = torch.stack(draft_residual_probs, dim=1)
+            # a row drafts up to its frame limit and up to its first eos code
+            is_eos = drafted[..., 0] == eos_token_id
+            first_eos = torch.where(is_eos.any(1), is_eos.int().argmax(1), round_len)
+            num_codes = torch.minimum(num_drafts, first_eos + 1)
+            num_full = torch.minimum(num_drafts, first_eos)
+
+            # target: one forward over the pending frame and the drafted frames of every row
+            num_pending = num_frames - target.num_fed
+            max_pending = max(n - f for n, f in zip(host_num_frames, host_target_fed))
+            pending = frames.gather(
+                1, (target.num_fed[:, None] + steps[:max_pending])[..., None].expand(-1, -1, num_code_groups)
+            )
+            sequence = torch.cat([pending, drafted], dim=1)
+            # row i: its own pending frames, then its drafted frames
+            order = torch.arange(sequence.shape[1], device=device)
+            order = torch.where(order < num_pending[:, None], order, order - num_pending[:, None] + max_pending)
+            order = order.clamp(max=sequence.shape[1] - 1)
+            sequence = sequence.gather(1, order[..., None].expand(-1, -1, num_code_groups))
+            target.feed(sequence, num_pending + num_full)
+            hidden = target.hidden(num_frames[:, None] + steps[: round_len + 1])
+            # the prediction of drafted frame j sees the first codes of the drafted frames before it
+            drafted_history = torch.where(
+                steps[:round_len] < steps[: round_len + 1, None], drafted[:, None, :, 0], pad_token_id
+            )
+            target_first_probs = first_code_probs(
+                torch.cat([history[:, None].expand(-1, round_len + 1, -1), drafted_history], dim=2).flatten(0, 1),
+                talker.codec_head(hidden).flatten(0, 1),
+            ).view(rows.numel(), round_len + 1, -1)
+            inputs_embeds = torch.cat(
+                [
+                    hidden[:, :round_len, None],
+                    talker.get_codec_embeds(drafted[..., :-1].flatten(0, 1)).view(
+                        rows.numel(), round_len, num_code_groups - 1, -1
+                    ),
+                ],
+                dim=2,
+            )
+            target_residual_probs = next_token_probs(
+                talker.code_predictor.residual_logits(inputs_embeds.flatten(0, 1)).flatten(0, 1), **subtalker_kwargs
+            ).view(rows.numel(), round_len, num_code_groups - 1, -1)
+
+            # accept every drafted code with probability min(1, p / q) and cut each chain at its first rejection
+            p = torch.cat(
+                [
+                    target_first_probs[:, :round_len].gather(2, drafted[..., :1]),
+                    target_residual_probs.gather(3, drafted[..., 1:, None]).squeeze(3),
+                ],
+                dim=2,
+            )
+            q = torch.cat(
+                [
+                    draft_first_probs.gather(2, drafted[..., :1]),
+                    draft_residual_probs.gather(3, drafted[..., 1:, None]).squeeze(3),
+                ],
+                dim=2,
+            )
+            groups = torch.arange(num_code_groups, device=device)
+            in_chain = (steps[:round_len, None] < num_full[:, None, None]) | (
+                (steps[:round_len, None] < num_codes[:, None, None]) & (groups == 0)
+            )
+            rejected = (torch.rand_like(p) * q >= p) & in_chain
+            any_rejected = rejected.flatten(1).any(1)
+            first_rejected = torch.where(any_rejected, rejected.flatten(1).int().argmax(1), num_codes * num_code_groups)
+            frame_index = first_rejected // num_code_groups
+            group_index = first_rejected % num_code_groups
+            eos_accepted = ~any_rejected & (num_full < num_codes)
+            num_accepted = torch.where(eos_accepted, num_full, frame_index)
+
+            # the frame at the first rejection, or the one after a fully accepted round, is sampled from the target
+            hidden = take(hidden, frame_index)
+            frame_index = frame_index.clamp(max=round_len - 1)
+            new_first = resample(
+                take(target_first_probs, num_accepted),
+                take(draft_first_probs, frame_index) * any_rejected[:, None],
+            )
+            residual_index = (group_index - 1).clamp(min=0)
+            new_residual = resample(
+                take(take(target_residual_probs, frame_index), residual_index),
+                take(take(draft_residual_probs, frame_index), residual_index),
+            )
+            drafted_frame = take(drafted, frame_index)
+            first_code = torch.where(group_index == 0, new_first, drafted_frame[:, 0])
+            forced_codes = drafted_frame[:, 1:].scatter(1, residual_index[:, None], new_residual[:, None])
+            residual_codes, _ = talker.code_predictor.generate_residual_codes(
+                inputs_embeds=torch.cat([hidden[:, None], talker.get_input_embeddings()(first_code[:, None])], dim=1),
+                forced_codes=forced_codes,
+                num_forced=group_index,
+                residual_codes_cache=residual_codes_cache,
+                **subtalker_kwargs,
+            )
+            new_frame = torch.cat([first_code[:, None], residual_codes.to(device)], dim=1)
+
+            # accepted drafted frames, then the new frame unless the sequence ended
+            write = (num_frames[:, None] + steps[:round_len]).clamp(max=frames.shape[1] - 1)
+            frames.scatter_(1, write[..., None].expand(-1, -1, num_code_groups), drafted)
+            finished = eos_accepted | ((group_index == 0) & (first_code == eos_token_id))
+            has_new_frame = ~finished & (num_frames + num_accepted < max_frames)
+            frames[torch.arange(rows.numel(), device=device), num_frames + num_accepted] = new_frame
+            target.commit(num_frames + num_accepted)
+            draft.commit(torch.minimum(num_frames + num_accepted, draft.num_fed))
+            num_frames = num_frames + num_accepted + has_new_frame.long()
+            finished = finished | (num_frames >= max_frames)
+
+            host_num_frames, host_target_fed, host_draft_fed, host_finished = torch.stack(
+                [num_frames, target.num_fed, draft.num_fed, finished.long()]
+            ).tolist()
+            for i, row in enumerate(rows.tolist()):
+                if host_finished[i]:
+                    talker_codes_list[row] = frames[i, : host_num_frames[i]]
+            if any(host_finished):
+                keep = [i for i, done in enumerate(host_finished) if not done]
+                index = torch.tensor(keep, dtype=torch.long, device=device)
+                rows, frames, num_frames = rows[index], frames[index], num_frames[index]
+                target.select_rows(index)
+                draft.select_rows(index)
+                host_num_frames, host_target_fed, host_draft_fed = (
+                    [values[i] for i in keep] for values in (host_num_frames, host_target_fed, host_draft_fed)
+                )
+        return talker_codes_list
+
+    def _get_talker_logits_processor(
+        self,
+        do_sample: bool,
+        top_k: int,
+        top_p: float,
+        temperature: float,
+        repetition_penalty: float,
+        eos_token_id: int,
+        device: torch.device,
+        pad_token_id: Optional[int] = None,
+    ) -> LogitsProcessorList:
+        """
+        Build the same first-codebook logits pipeline that `talker.generate` assembles from `generate`'s kwargs.
+
+        With a `pad_token_id` the pipeline takes histories of different lengths padded with that (suppressed) token,
+        the minimum length then counts the codes of every row.
+        """
+        processors = LogitsProcessorList()
+        if repetition_penalty is not None and repetition_penalty != 1.0:
+            processors.append(RepetitionPenaltyLogitsProcessor(penalty=repetition_penalty))
+        if pad_token_id is None:
+            processors.append(MinNewTokensLengthLogitsProcessor(0, 2, eos_token_id, device=device))
+        else:
+            processors.append(_PaddedMinNewTokensLengthLogitsProcessor(2, eos_token_id, pad_token_id, device=device))
+        processors.append(
+            SuppressTokensLogitsProcessor(
+                [
+                    i
+                    for i in range(self.config.talker_config.vocab_size - 1024, self.config.talker_config.vocab_size)
+                    if i not in (self.config.talker_config.codec_eos_token_id,)
+                ],
+                device=device,
+            )
+        )
+        if do_sample:
+            if temperature is not None and temperature != 1.0:
+                processors.append(TemperatureLogitsWarper(temperature))
+            if top_k is not None and top_k != 0:
+                processors.append(TopKLogitsWarper(top_k=top_k))
+            if top_p is not None and top_p < 1.0:
+                processors.append(TopPLogitsWarper(top_p=top_p))
+        return processors
+
+    @torch.no_grad()
+    def stream_generate(
+        self,
+        input_ids: Optional[list[torch.Tensor]] = None,
+        instruct_ids: Optional[list[torch.Tensor]] = None,
+        ref_ids: Optional[list[torch.Tensor]] = None,
+        voice_clone_prompt: list[dict] = None,
+        languages: list[str] = None,
+        speakers: list[str] = None,
+        non_streaming_mode = False,
+        max_new_tokens: int = 4096,
+        do_sample: bool = True,
+        top_k: int = 50,
+        top_p: float = 1.0,
+        temperature: float = 0.9,
+        subtalker_dosample: bool = True,
+        subtalker_top_k: int = 50,
+        subtalker_top_p: float = 1.0,
+        subtalker_temperature: float = 0.9,
+        eos_token_id: Optional[int] = None,
+        repetition_penalty: float = 1.05,
+        use_static_cache: bool = False,
+        **kwargs,
+    ):
+        """
+        Incremental counterpart of `generate`: runs the talker decode loop step by step and yields every codec frame
+        as soon as its residual codebooks have been predicted, instead of waiting for the whole batch to finish.
+
+        Takes the same arguments as `generate`. The sampling pipeline (repetition penalty, `min_new_tokens=2`,
+        suppressed control tokens, temperature/top-k/top-p) mirrors the one `talker.generate` builds.
+
+        With `use_static_cache=True` the talker KV cache and attention mask are preallocated for
+        `prompt_length + max_new_tokens` positions and every frame goes through `talker.decode_step`, whose inputs
+        keep a fixed shape. This removes the per-step Python overhead of `forward` and makes the step capturable,
+        e.g. with `model.talker.decode_step = torch.compile(model.talker.decode_step, mode="reduce-overhead")`.
+        Keep `max_new_tokens` tight in this mode, the cache is allocated for all of it up front. When compiling,
+        note that every distinct `prompt_length + max_new_tokens` is a new cache shape and triggers a recompilation.
+
+        Yields:
+            torch.LongTensor of shape `(batch_size, num_code_groups)`: the codes of the newest frame. Rows whose
+            sequence already emitted `codec_eos_token_id` keep yielding frames whose first code is the eos id and
+            must be discarded by the caller. The codec eos frame itself is never yielded.
+        """
+        eos_token_id = eos_token_id if eos_token_id is not None else self.config.talker_config.codec_eos_token_id
+        talker_input_embeds, attention_mask, trailing_text_hiddens, tts_pad_embed, prefix_lens, prefix_keys = (
+            self._build_talker_inputs(
+                input_ids=input_ids,
+                instruct_ids=instruct_ids,
+                ref_ids=ref_ids,
+                voice_clone_prompt=voice_clone_prompt,
+                languages=languages,
+                speakers=speakers,
+                non_streaming_mode=non_streaming_mode,
+                return_prefix_lens=True,
+            )
+        )
+        talker_input_embeds, attention_mask, prefix_kv, prefix_len = self._prepare_talker_prefill(
+            talker_input_embeds, attention_mask, prefix_lens, prefix_keys
+        )
+        batch_size, cur_len = talker_input_embeds.shape[:2]
+        device = talker_input_embeds.device
+        logits_processor = self._get_talker_logits_processor(
+            do_sample=do_sample,
+            top_k=top_k,
+            top_p=top_p,
+            temperature=temperature,
+            repetition_penalty=repetition_penalty,
+            eos_token_id=eos_token_id,
+            device=device,
+        )
+        step_kwargs = {
+            "trailing_text_hidden": trailing_text_hiddens,
+            "tts_pad_embed": tts_pad_embed,
+            "subtalker_dosample": subtalker_dosample,
+            "subtalker_top_k": subtalker_top_k,
+            "subtalker_top_p": subtalker_top_p,
+            "subtalker_temperature": subtalker_temperature,
+            "residual_codes_cache": Qwen3TTSResidualCodesCache(self.config.talker_config.code_predictor_config),
+        }
+
+        # prefill
+        if use_static_cache:
+            max_cache_len = cur_len + max_new_tokens
+            past_key_values = StaticCache(config=self.talker.config, max_cache_len=max_cache_len)
+        else:
+            past_key_values = BlockKVCache.for_batch(self.talker.config, batch_size, cur_len + max_new_tokens)
+        self._write_prefix_kv(past_key_values, prefix_kv)
+        outputs = self.talker(
+            inputs_embeds=talker_input_embeds[:, prefix_len:],
+            attention_mask=attention_mask,
+            past_key_values=past_key_values,
+            use_cache=True,
+            cache_position=torch.arange(prefix_len, cur_len, device=device),
+            **step_kwargs,
+        )
+        logits = outputs.logits[:, -1, :]
+
+        if use_static_cache:
+            static_attention_mask = attention_mask.new_zeros((batch_size, max_cache_len))
+            static_attention_mask[:, :cur_len] = attention_mask
+            static_trailing_text_hidden = torch.cat(
+                [trailing_text_hiddens, tts_pad_embed.expand(batch_size, 1, -1)], dim=1
+            )
+            past_hidden = outputs.past_hidden.contiguous()
+            generation_step = torch.zeros(1, dtype=torch.long, device=device)
+            cache_position = torch.full((1,), cur_len, dtype=torch.long, device=device)
+            rope_deltas = self.talker.rope_deltas
+
+        generated_ids = torch.zeros((batch_size, 0), dtype=torch.long, device=device)
+        unfinished = torch.ones(batch_size, dtype=torch.bool, device=device)
+        for step in range(max_new_tokens):
+            scores = logits_processor(generated_ids, logits.to(torch.float32))
+            if do_sample:
+                next_ids = torch.multinomial(F.softmax(scores, dim=-1), num_samples=1).squeeze(1)
+            else:
+                next_ids = torch.argmax(scores, dim=-1)
+            next_ids = torch.where(unfinished, next_ids, eos_token_id)
+            generated_ids = torch.cat([generated_ids, next_ids[:, None]], dim=-1)
+            unfinished = unfinished & (next_ids != eos_token_id)
+            if step + 1 >= max_new_tokens or not unfinished.any():
+                break
+
+            # the talker predicts the residual codebooks of `next_ids` while consuming it
+            if use_static_cache:
+                static_attention_mask.index_fill_(1, cache_position, 1)
+                logits, codec_ids, past_hidden = self.talker.decode_step(
+                    input_ids=next_ids[:, None],
+                    past_hidden=past_hidden,
+                    generation_step=generation_step,
+                    cache_position=cache_position,
+                    attention_mask=static_attention_mask,
+                    rope_deltas=rope_deltas,
+                    trailing_text_hidden=static_trailing_text_hidden,
+                    past_key_values=past_key_values,
+                    subtalker_dosample=subtalker_dosample,
+                    subtalker_top_k=subtalker_top_k,
+                    subtalker_top_p=subtalker_top_p,
+                    subtalker_temperature=subtalker_temperature,
+                    residual_codes_cache=step_kwargs["residual_codes_cache"],
+                )
+                generation_step = generation_step + 1
+                cache_position = cache_position + 1
+                yield codec_ids
+                continue
+
+            attention_mask = torch.cat([attention_mask, attention_mask.new_ones((batch_size, 1))], dim=-1)
+            outputs = self.talker(
+                input_ids=next_ids[:, None],
+                attention_mask=attention_mask,
+                past_key_values=outputs.past_key_values,
+                use_cache=True,
+                cache_position=torch.tensor([cur_len], device=device),
+                past_hidden=outputs.past_hidden,
+                generation_step=outputs.generation_step,
+                **step_kwargs,
+            )
+            logits = outputs.logits[:, -1, :]
+            cur_len += 1
+            yield outputs.hidden_states[1]
+
 __all__ = [
     "Qwen3TTSForConditionalGeneration",
     "Qwen3TTSTalkerForConditionalGeneration",
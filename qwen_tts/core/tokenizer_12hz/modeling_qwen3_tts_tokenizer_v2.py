@@ -14,6 +14,7 @@
 # limitations under the License.
 """PyTorch Qwen3TTSTokenizerV2 model."""
 
+import copy
 import math
 from dataclasses import dataclass
 from typing import Callable, Optional, Union, List
@@ -72,6 +73,20 @@ class Qwen3TTSTokenizerV2DecoderOutput(ModelOutput):
     audio_values: List[torch.FloatTensor] = None
 
 
+@dataclass
+@auto_docstring
+class Qwen3TTSTokenizerV2StreamingDecoderOutput(ModelOutput):
+    r"""
+    audio_values (`torch.FloatTensor` of shape `(batch_size, codes_length * decode_upsample_rate)`):
+        Decoded audio values of the new codes only.
+    streaming_state (`Qwen3TTSTokenizerV2DecoderStreamingState`):
+        Updated decoder state, pass it to the next `streaming_decode` call to continue the stream.
+    """
+
+    audio_values: torch.FloatTensor = None
+    streaming_state: Optional["Qwen3TTSTokenizerV2DecoderStreamingState"] = None
+
+
 def rotate_half(x):
     """Rotates half the hidden dims of the input."""
     x1 = x[..., : x.shape[-1] // 2]
@@ -156,6 +171,63 @@ class Qwen3TTSTokenizerV2DecoderPreTrainedModel(PreTrainedModel):
     _supports_attention_backend = True
 
 
+class Qwen3TTSTokenizerV2DecoderStreamingState:
+    """
+    Streaming state of `Qwen3TTSTokenizerV2Decoder`, carried between calls of `Qwen3TTSTokenizerV2Decoder.forward`.
+
+    It keeps, for every causal (transposed) convolution, the tail of its previous input that the next chunk still
+    needs as left context, and the KV cache of `pre_transformer`. Feeding codes chunk by chunk with the same state
+    therefore costs only the work for the new frames and produces the same waveform as a single `forward` over the
+    concatenated codes (up to floating point accumulation order).
+    """
+
+    def __init__(self, config: Qwen3TTSTokenizerV2DecoderConfig):
+        self.conv_states = {}
+        self.past_key_values = DynamicCache(config=config)
+        self.num_frames = 0
+
+    def update(self, hidden_state: torch.Tensor, layer_idx: int, context_size: int) -> torch.Tensor:
+        """
+        Prepend the cached context of layer `layer_idx` to `hidden_state` (zeros on the first call, matching the causal
+        zero padding) and cache the last `context_size` steps for the next call.
+        """
+        context = self.conv_states.get(layer_idx)
+        if context is None:
+            context = hidden_state.new_zeros(hidden_state.shape[0], hidden_state.shape[1], context_size)
+        hidden_state = torch.cat([context, hidden_state], dim=-1)
+        self.conv_states[layer_idx] = hidden_state[..., hidden_state.shape[-1] - context_size :]
+        return hidden_state
+
+    def copy(self) -> "Qwen3TTSTokenizerV2DecoderStreamingState":
+        """
+        Independent copy of the state, e.g. to continue the same cached context for several streams.
+        """
+        return copy.deepcopy(self)
+
+    @classmethod
+    def concat(cls, states: List["Qwen3TTSTokenizerV2DecoderStreamingState"]) -> "Qwen3TTSTokenizerV2DecoderStreamingState":
+        """
+        Stack states of the same number of decoded frames along the batch dimension into a new state.
+
+        Raises:
+            ValueError: If the states have decoded different numbers of frames.
+        """
+        if len(set(state.num_frames for state in states)) > 1:
+            raise ValueError("Only streaming states of the same number of frames can be concatenated.")
+        state = states[0].copy()
+        if len(states) == 1:
+            return state
+        state.conv_states = {
+            layer_idx: torch.cat([s.conv_states[layer_idx] for s in states], dim=0) for layer_idx in state.conv_states
+        }
+        for layer_idx, layer in enumerate(state.past_key_values.layers):
+            if getattr(layer, "keys", None) is None or not layer.is_initialized:
+                continue
+            layer.keys = torch.cat([s.past_key_values.layers[layer_idx].keys for s in states], dim=0)
+            layer.values = torch.cat([s.past_key_values.layers[layer_idx].values for s in states], dim=0)
+        return state
+
+
 class Qwen3TTSTokenizerV2CausalConvNet(nn.Module):
     def __init__(
         self,
@@ -186,7 +258,12 @@ class Qwen3TTSTokenizerV2CausalConvNet(nn.Module):
         ideal_length = (math.ceil(n_frames) - 1) * self.stride + (self.kernel_size - self.padding)
         return ideal_length - length
 
-    def forward(self, hidden_state):
+    def forward(self, hidden_state, streaming_state=None):
+        if streaming_state is not None:
+            if self.stride != 1:
+                raise ValueError("Streaming decode only supports causal convolutions with stride 1")
+            hidden_state = streaming_state.update(hidden_state, self.layer_idx, self.padding)
+            return self.conv(hidden_state).contiguous()
         extra_padding = self._get_extra_padding_for_conv1d(hidden_state)
         hidden_state = F.pad(hidden_state, (self.padding, extra_padding), mode="constant", value=0)
         return self.conv(hidden_state).contiguous()
@@ -198,10 +275,17 @@ class Qwen3TTSTokenizerV2CausalTransConvNet(nn.Module):
         self.conv = nn.ConvTranspose1d(in_channels, out_channels, kernel_size, stride=stride)
 
         pad = kernel_size - stride
+        self.stride = stride
         self.left_pad = 0
         self.right_pad = int(pad)
-
-    def forward(self, hidden_state):
+        # number of previous input steps that still overlap the outputs of the next step
+        self.context_size = math.ceil(self.right_pad / stride)
+
+    def forward(self, hidden_state, streaming_state=None):
+        if streaming_state is not None:
+            hidden_state = streaming_state.update(hidden_state, self.layer_idx, self.context_size)
+            hidden_state = self.conv(hidden_state)
+            return hidden_state[..., self.context_size * self.stride : hidden_state.shape[-1] - self.right_pad].contiguous()
         hidden_state = self.conv(hidden_state)
         if self.right_pad > 0:
             hidden_state = hidden_state[..., : hidden_state.shape[-1] - self.right_pad]
@@ -224,10 +308,10 @@ class Qwen3TTSTokenizerV2ConvNeXtBlock(nn.Module):
         self.pwconv2 = nn.Linear(4 * dim, dim)
         self.gamma = nn.Parameter(1e-6 * torch.ones(dim))
 
-    def forward(self, hidden_states):
+    def forward(self, hidden_states, streaming_state=None):
         input = hidden_states
 
-        hidden_states = self.dwconv(hidden_states)
+        hidden_states = self.dwconv(hidden_states, streaming_state=streaming_state)
         hidden_states = hidden_states.permute(0, 2, 1)
         hidden_states = self.norm(hidden_states)
         hidden_states = self.pwconv1(hidden_states)
@@ -625,13 +709,13 @@ class Qwen3TTSTokenizerV2DecoderDecoderResidualUnit(nn.Module):
         self.act2 = SnakeBeta(dim)
         self.conv2 = Qwen3TTSTokenizerV2CausalConvNet(dim, dim, kernel_size=1)
 
-    def forward(self, hidden_state):
+    def forward(self, hidden_state, streaming_state=None):
         residual = hidden_state
 
         hidden_state = self.act1(hidden_state)
-        hidden_state = self.conv1(hidden_state)
+        hidden_state = self.conv1(hidden_state, streaming_state=streaming_state)
         hidden_state = self.act2(hidden_state)
-        hidden_state = self.conv2(hidden_state)
+        hidden_state = self.conv2(hidden_state, streaming_state=streaming_state)
         return hidden_state + residual
 
 
@@ -652,9 +736,12 @@ class Qwen3TTSTokenizerV2DecoderDecoderBlock(Qwen3TTSTokenizerV2DecoderPreTraine
 
         self.block = nn.ModuleList(block)
 
-    def forward(self, hidden):
+    def forward(self, hidden, streaming_state=None):
         for block in self.block:
-            hidden = block(hidden)
+            if isinstance(block, SnakeBeta):
+                hidden = block(hidden)
+            else:
+                hidden = block(hidden, streaming_state=streaming_state)
         return hidden
 
 
@@ -673,9 +760,12 @@ class EuclideanCodebook(nn.Module):
         self.cluster_usage = nn.Parameter(torch.ones(codebook_size))
         self.embedding_sum = nn.Parameter(torch.zeros(codebook_size, dim))
 
+    @property
+    def embedding(self) -> torch.Tensor:
+        return self.embedding_sum / self.cluster_usage.clamp(min=self.epsilon)[:, None]
+
     def decode(self, codes: torch.Tensor) -> torch.Tensor:
-        embedding = self.embedding_sum / self.cluster_usage.clamp(min=self.epsilon)[:, None]
-        quantized = F.embedding(codes, embedding)
+        quantized = F.embedding(codes, self.embedding)
         return quantized
 
 
@@ -776,6 +866,19 @@ class ResidualVectorQuantizer(nn.Module):
         quantized = self.output_proj(quantized)
         return quantized
 
+    def decode_table(self) -> torch.Tensor:
+        """Codebooks of all levels with `project_out` and `output_proj` applied, shape `(n_q * bins, output_dimension)`.
+
+        Both projections are linear and bias-free on the output side, so `decode(codes)` equals the sum over levels of
+        the rows `level * bins + codes[:, level]` of this table.
+        """
+        tables = []
+        for layer in self.vq.layers:
+            quantized = layer.project_out(layer._codebook.embedding)  # bins, dimension
+            quantized = self.output_proj(quantized.transpose(0, 1).unsqueeze(0))[0].transpose(0, 1)
+            tables.append(quantized)
+        return torch.cat(tables, dim=0)
+
 
 class SplitResidualVectorQuantizer(nn.Module):
     """Residual Vector Quantizer with separate projections for the first quantizer and the rest.
@@ -811,14 +914,51 @@ class SplitResidualVectorQuantizer(nn.Module):
             q_dropout=q_dropout,
             **kwargs,
         )
+        self._decode_table_key = None
+        self._decode_table = None
+
+    def decode_table(self) -> torch.Tensor:
+        """Folded codebooks of all `n_q` levels, see `ResidualVectorQuantizer.decode_table`.
+
+        Outside of training the table is built once and reused until a parameter is replaced, moved or cast, or the
+        weights are reloaded. Call `clear_decode_table` after modifying the codebooks in place by other means.
+        """
+        # No version counter in the key, inference tensors do not track one. The cached parameters are kept alive
+        # so their addresses can not be recycled while the table is cached.
+        params = tuple(self.parameters())
+        key = tuple((p.data_ptr(), p.dtype, p.device) for p in params)
+        if self.training or self._decode_table is None or key != self._decode_table_key:
+            table = torch.cat([self.rvq_first.decode_table(), self.rvq_rest.decode_table()], dim=0)
+            if self.training:
+                return table
+            self._decode_table_key, self._decode_table = key, (params, table.detach())
+        return self._decode_table[1]
+
+    def clear_decode_table(self):
+        self._decode_table_key = None
+        self._decode_table = None
+
+    def train(self, mode: bool = True):
+        self.clear_decode_table()
+        return super().train(mode)
+
+    def _apply(self, fn, *args, **kwargs):
+        self.clear_decode_table()
+        return super()._apply(fn, *args, **kwargs)
+
+    def _load_from_state_dict(self, *args, **kwargs):
+        self.clear_decode_table()
+        return super()._load_from_state_dict(*args, **kwargs)
 
     def decode(self, codes: torch.Tensor) -> torch.Tensor:
         """Decode the given codes to the quantized representation."""
         # codes is [B, K, T], with T frames, K nb of codebooks.
-        quantized = self.rvq_first.decode(codes[:, : self.n_q_semantic])
-        if codes.shape[1] > self.n_q_semantic:
-            quantized += self.rvq_rest.decode(codes[:, self.n_q_semantic :])
-        return quantized
+        # All levels are gathered from one folded table and summed by a single embedding_bag.
+        batch_size, num_levels, num_frames = codes.shape
+        offsets = torch.arange(num_levels, device=codes.device) * self.rvq_first.bins
+        indices = (codes.long() + offsets[None, :, None]).transpose(1, 2).reshape(-1, num_levels)
+        quantized = F.embedding_bag(indices, self.decode_table(), mode="sum")
+        return quantized.view(batch_size, num_frames, -1).transpose(1, 2)
 
 
 class Qwen3TTSTokenizerV2Decoder(Qwen3TTSTokenizerV2DecoderPreTrainedModel):
@@ -864,23 +1004,56 @@ class Qwen3TTSTokenizerV2Decoder(Qwen3TTSTokenizerV2DecoderPreTrainedModel):
         ]
         self.decoder = nn.ModuleList(decoder)
 
+        # initialize layer_idx for causal convolutions, necessary for the streaming state
+        layer_idx = 0
+        for module in self.modules():
+            if isinstance(module, (Qwen3TTSTokenizerV2CausalConvNet, Qwen3TTSTokenizerV2CausalTransConvNet)):
+                module.layer_idx = layer_idx
+                layer_idx += 1
+
         self.post_init()
 
-    def forward(self, codes):
+    def init_streaming_state(self) -> Qwen3TTSTokenizerV2DecoderStreamingState:
+        return Qwen3TTSTokenizerV2DecoderStreamingState(self.config)
+
+    def forward(self, codes, streaming_state: Optional[Qwen3TTSTokenizerV2DecoderStreamingState] = None):
+        """
+        Args:
+            codes (`torch.LongTensor` of shape `(batch_size, num_quantizers, codes_length)`):
+                Codes to decode.
+            streaming_state (`Qwen3TTSTokenizerV2DecoderStreamingState`, *optional*):
+                If given, `codes` are treated as the continuation of all codes previously decoded with this state and
+                only the `codes_length * total_upsample` new samples are returned. The state is updated in place.
+        """
         if codes.shape[1] != self.config.num_quantizers:
             raise ValueError(f"Expected {self.config.num_quantizers} layer of codes, got {codes.shape[1]}")
 
         hidden = self.quantizer.decode(codes)
-        hidden = self.pre_conv(hidden).transpose(1, 2)
+        hidden = self.pre_conv(hidden, streaming_state=streaming_state).transpose(1, 2)
 
-        hidden = self.pre_transformer(inputs_embeds=hidden).last_hidden_state
+        if streaming_state is not None:
+            cache_position = torch.arange(
+                streaming_state.num_frames, streaming_state.num_frames + hidden.shape[1], device=hidden.device
+            )
+            hidden = self.pre_transformer(
+                inputs_embeds=hidden,
+                past_key_values=streaming_state.past_key_values,
+                use_cache=True,
+                cache_position=cache_position,
+            ).last_hidden_state
+            streaming_state.num_frames += codes.shape[-1]
+        else:
+            hidden = self.pre_transformer(inputs_embeds=hidden).last_hidden_state
         hidden = hidden.permute(0, 2, 1)
         for blocks in self.upsample:
             for block in blocks:
-                hidden = block(hidden)
+                hidden = block(hidden, streaming_state=streaming_state)
         wav = hidden
         for block in self.decoder:
-            wav = block(wav)
+            if isinstance(block, SnakeBeta):
+                wav = block(wav)
+            else:
+                wav = block(wav, streaming_state=streaming_state)
         return wav.clamp(min=-1, max=1)
 
     def chunked_decode(self, codes, chunk_size=300, left_context_size=25):
@@ -1023,5 +1196,41 @@ class Qwen3TTSTokenizerV2Model(Qwen3TTSTokenizerV2PreTrainedModel):
 
         return Qwen3TTSTokenizerV2DecoderOutput(audio_values)
 
+    def streaming_decode(
+        self,
+        audio_codes: torch.Tensor,
+        streaming_state: Optional[Qwen3TTSTokenizerV2DecoderStreamingState] = None,
+        return_dict: Optional[bool] = None,
+    ) -> Union[tuple[torch.Tensor, Qwen3TTSTokenizerV2DecoderStreamingState], Qwen3TTSTokenizerV2StreamingDecoderOutput]:
+        """
+        Decodes the next frames of a stream, continuing from `streaming_state`.
+
+        The decoder keeps its causal convolution context and transformer KV cache in `streaming_state`, so every
+        call only processes the new frames. Decoding a sequence chunk by chunk gives the same audio as decoding it in
+        one pass without chunking.
+
+        Args:
+            audio_codes (`torch.LongTensor` of shape `(batch_size, codes_length, num_quantizers)`):
+                The next codes of the stream.
+            streaming_state (`Qwen3TTSTokenizerV2DecoderStreamingState`, *optional*):
+                State returned by the previous call. A new state is created when not given.
+            return_dict (`bool`, *optional*):
+                Whether or not to return a [`~utils.ModelOutput`] instead of a plain tuple.
+        """
+        return_dict = return_dict if return_dict is not None else self.config.return_dict
+        if streaming_state is None:
+            streaming_state = self.decoder.init_streaming_state()
+
+        audio_codes = torch.clamp(audio_codes, min=0)
+        audio_values = self.decoder(audio_codes.transpose(1, 2), streaming_state=streaming_state).squeeze(1)
+
+        if not return_dict:
+            return (
+                audio_values,
+                streaming_state,
+            )
+
+        return Qwen3TTSTokenizerV2StreamingDecoderOutput(audio_values, streaming_state)
+
 
 __all__ = ["Qwen3TTSTokenizerV2Model", "Qwen3TTSTokenizerV2PreTrainedModel"]
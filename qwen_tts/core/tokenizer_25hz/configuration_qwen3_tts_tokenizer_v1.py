@@ -47,6 +47,9 @@ class Qwen3TTSTokenizerV1DecoderDiTConfig(PretrainedConfig):
             The dimension of the mel-spectrogram.
         dropout (`float`, *optional*, defaults to 0.1):
             The dropout rate for the transformer blocks.
+        block_sparse_attention (`bool`, *optional*, defaults to `True`):
+            Whether attention only computes the block pairs allowed by `look_ahead_layers` / `look_backward_layers`.
+            `False` runs dense attention over the whole sequence with a block mask, as a reference.
 
         enc_emb_dim (`int`, *optional*, defaults to 192):
             The dimension of the pre-trained speaker embedding.
@@ -85,6 +88,7 @@ class Qwen3TTSTokenizerV1DecoderDiTConfig(PretrainedConfig):
         num_embeds=8193,
         mel_dim=80,
         dropout=0.1,
+        block_sparse_attention=True,
         enc_emb_dim=192,
         enc_dim=128,
         enc_channels=[256, 256, 256, 256, 768],
@@ -110,6 +114,7 @@ class Qwen3TTSTokenizerV1DecoderDiTConfig(PretrainedConfig):
         self.num_embeds = num_embeds
         self.mel_dim = mel_dim
         self.dropout = dropout
+        self.block_sparse_attention = block_sparse_attention
         self.enc_emb_dim = enc_emb_dim
         self.enc_dim = enc_dim
         self.enc_channels = enc_channels
@@ -16,7 +16,7 @@
 
 import math
 from dataclasses import dataclass
-from typing import Optional, Union, List
+from typing import Iterator, List, Optional, Union
 
 import numpy as np
 import torch
@@ -430,6 +430,7 @@ class DiTInputEmbedding(nn.Module):
             config.mel_dim + config.enc_dim + config.enc_emb_dim + config.emb_dim,
             config.hidden_size,
         )
+        self.mel_dim = config.mel_dim
         self.spk_encoder = ECAPA_TimeDelayNet(config)
 
     def forward(
@@ -442,18 +443,43 @@ class DiTInputEmbedding(nn.Module):
         code_embed_uncond: Optional[bool] = None,
         apply_cfg: Optional[bool] = True,
     ):
+        conditioning = self.embed_conditioning(
+            speaker_embedding,
+            condition_vector,
+            code_embed,
+            drop_audio_cond=drop_audio_cond,
+            code_embed_uncond=code_embed_uncond,
+            apply_cfg=apply_cfg,
+        )
+        hidden_states = self.embed_noisy(hidden_states)
         if apply_cfg:
             hidden_states = torch.cat([hidden_states, hidden_states], dim=0)
+        return hidden_states + conditioning
+
+    def embed_noisy(self, hidden_states: torch.Tensor) -> torch.Tensor:
+        # the part of `proj` that sees the noisy mel, the only input that changes between ODE steps
+        return F.linear(hidden_states, self.proj.weight[:, : self.mel_dim])
+
+    def embed_conditioning(
+        self,
+        speaker_embedding: torch.Tensor,
+        condition_vector: torch.Tensor,
+        code_embed: torch.Tensor,
+        drop_audio_cond: Optional[bool] = False,
+        code_embed_uncond: Optional[bool] = None,
+        apply_cfg: Optional[bool] = True,
+    ) -> torch.Tensor:
+        # the rest of `proj` (bias included), with the unconditional rows after the conditional ones under CFG
+        if apply_cfg:
             speaker_embedding = torch.cat([speaker_embedding, torch.zeros_like(speaker_embedding)], dim=0)
             condition_vector = torch.cat([condition_vector, torch.zeros_like(condition_vector)], dim=0)
             code_embed = torch.cat([code_embed, code_embed_uncond], dim=0)
         elif drop_audio_cond:  # cfg for cond audio
             condition_vector = torch.zeros_like(condition_vector)
             speaker_embedding = torch.zeros_like(speaker_embedding)
-        condition_vector = self.spk_encoder(condition_vector).unsqueeze(1).repeat(1, hidden_states.size(1), 1)
-        hidden_states = self.proj(torch.cat((hidden_states, condition_vector, code_embed, speaker_embedding), dim=-1))
-
-        return hidden_states
+        condition_vector = self.spk_encoder(condition_vector).unsqueeze(1).expand(-1, code_embed.size(1), -1)
+        conditioning = torch.cat((condition_vector, code_embed, speaker_embedding), dim=-1)
+        return F.linear(conditioning, self.proj.weight[:, self.mel_dim :], self.proj.bias)
 
 
 # Transformer backbone using DiT blocks
@@ -567,6 +593,50 @@ def apply_rotary_pos_emb(q, k, cos, sin, position_ids=None, unsqueeze_dim=1):
     return q_embed, k_embed
 
 
+def block_band_qkv(query, key, value, block_size, look_backward_block, look_ahead_block):
+    """Regroups attention inputs so that every block of queries only sees its band of key blocks.
+
+    The sequence is right-padded to whole blocks and the blocks are folded into the head dimension: the query
+    `(batch, heads, seq_len, head_dim)` becomes `(batch, heads * num_blocks, block_size, head_dim)` and key / value
+    become `(batch, heads * num_blocks, window * block_size, head_dim)`, holding for every block the key blocks from
+    `look_backward_block` before to `look_ahead_block` after it. Attention then costs `O(seq_len * window)` instead
+    of `O(seq_len ** 2)`; the keys outside the sequence are masked by `create_block_band_mask`.
+    """
+    batch_size, heads, seq_len, head_dim = query.shape
+    num_blocks = -(-seq_len // block_size)
+    padding = num_blocks * block_size - seq_len
+    window = look_backward_block + 1 + look_ahead_block
+
+    def to_blocks(hidden_states):
+        hidden_states = F.pad(hidden_states, (0, 0, 0, padding))
+        return hidden_states.view(batch_size, heads, num_blocks, block_size, head_dim)
+
+    def to_bands(hidden_states):
+        hidden_states = to_blocks(hidden_states)
+        if window > 1:
+            hidden_states = F.pad(hidden_states, (0, 0, 0, 0, look_backward_block, look_ahead_block))
+            hidden_states = torch.cat([hidden_states[:, :, i : i + num_blocks] for i in range(window)], dim=3)
+        return hidden_states.reshape(batch_size, heads * num_blocks, window * block_size, head_dim)
+
+    query = to_blocks(query).reshape(batch_size, heads * num_blocks, block_size, head_dim)
+    return query, to_bands(key), to_bands(value)
+
+
+def create_block_band_mask(seq_len, block_size, look_backward_block, look_ahead_block, num_heads, device=None):
+    """Key mask of the block-banded attention of `block_band_qkv`, broadcastable to
+    `(batch, heads * num_blocks, block_size, window * block_size)`, or `None` if every key of every band is valid."""
+    num_blocks = -(-seq_len // block_size)
+    key_blocks = torch.arange(num_blocks, device=device).unsqueeze(1) + torch.arange(
+        -look_backward_block, look_ahead_block + 1, device=device
+    )
+    key_positions = key_blocks.unsqueeze(-1) * block_size + torch.arange(block_size, device=device)
+    mask = (key_blocks >= 0).unsqueeze(-1) & (key_positions < seq_len)
+    if bool(mask.all()):
+        return None
+    mask = mask.view(1, num_blocks, 1, -1).expand(num_heads, -1, -1, -1)
+    return mask.reshape(1, num_heads * num_blocks, 1, -1)
+
+
 class DiTAttention(nn.Module):
     def __init__(self, config: Qwen3TTSTokenizerV1DecoderBigVGANConfig):
         super().__init__()
@@ -589,8 +659,9 @@ class DiTAttention(nn.Module):
         hidden_states,  # noised input x
         position_embeddings=None,  # rotary position embedding for x
         attention_mask=None,
+        block_band=None,  # (block_size, look_backward_block, look_ahead_block) for block-banded attention
     ) -> torch.Tensor:
-        batch_size = hidden_states.shape[0]
+        batch_size, seq_len = hidden_states.shape[0], hidden_states.shape[1]
 
         # `sample` projections.
         query = self.to_q(hidden_states)
@@ -609,6 +680,9 @@ class DiTAttention(nn.Module):
         cos, sin = position_embeddings
         query, key = apply_rotary_pos_emb(query, key, cos, sin)
 
+        if block_band is not None:
+            query, key, value = block_band_qkv(query, key, value, *block_band)
+
         attention_interface = ALL_ATTENTION_FUNCTIONS[self.config._attn_implementation]
         attention_weights, _ = attention_interface(
             self,
@@ -619,6 +693,13 @@ class DiTAttention(nn.Module):
             is_causal=False,
         )
 
+        if block_band is not None:
+            # (batch, block_size, heads * num_blocks, head_dim) -> (batch, seq_len, heads, head_dim)
+            block_size = block_band[0]
+            attention_weights = attention_weights.view(batch_size, block_size, self.heads, -1, head_dim)
+            attention_weights = attention_weights.permute(0, 3, 1, 2, 4).reshape(batch_size, -1, self.heads, head_dim)
+            attention_weights = attention_weights[:, :seq_len]
+
         # mask. e.g. inference got a batch with different target durations, mask out the padding
         attention_weights = attention_weights.reshape(batch_size, -1, self.heads * head_dim)
         attention_weights = attention_weights.to(query.dtype)
@@ -672,18 +753,27 @@ class DiTDecoderLayer(nn.Module):
         self.ff = DiTMLP(dim=config.hidden_size, mult=config.ff_mult, dropout=config.dropout)
 
     def forward(
-        self, hidden_states, timestep, position_embeddings=None, block_diff=None
+        self, hidden_states, timestep, position_embeddings=None, block_diff=None, block_band=None
     ):  # x: noised input, t: time embedding
         # pre-norm & modulation for attention input
         norm, gate_msa, shift_mlp, scale_mlp, gate_mlp = self.attn_norm(hidden_states, emb=timestep)
 
         # attention
-        attn_output = self.attn(
-            hidden_states=norm,
-            position_embeddings=position_embeddings,
-            attention_mask=(block_diff >= -float(self.look_backward_block))
-            & (block_diff <= float(self.look_ahead_block)),
-        )
+        if block_band is not None:
+            block_size, band_masks = block_band
+            attn_output = self.attn(
+                hidden_states=norm,
+                position_embeddings=position_embeddings,
+                attention_mask=band_masks[(self.look_backward_block, self.look_ahead_block)],
+                block_band=(block_size, self.look_backward_block, self.look_ahead_block),
+            )
+        else:
+            attn_output = self.attn(
+                hidden_states=norm,
+                position_embeddings=position_embeddings,
+                attention_mask=(block_diff >= -float(self.look_backward_block))
+                & (block_diff <= float(self.look_ahead_block)),
+            )
 
         # process attention output for input x
         hidden_states = hidden_states + gate_msa.unsqueeze(1) * attn_output
@@ -1067,6 +1157,144 @@ class Qwen3TTSTokenizerV1DecoderBigVGANModel(Qwen3TTSTokenizerV1DecoderPreTraine
         return torch.clamp(output_waveform, min=-1.0, max=1.0).squeeze(1)
 
 
+class DiTODESolver:
+    """Fixed-step solver of the flow-matching ODE `dx/dt = function(t, x)` integrated by the DiT sampler.
+
+    Subclasses implement `step`. `num_steps_taken` counts the steps completed so far, which lets the ODE function
+    change behaviour after the first steps (e.g. stop classifier-free guidance).
+    """
+
+    # Evaluations of `function` chained within one step, each widening the receptive field of the result by one
+    # DiT forward pass (see `Qwen3TTSTokenizerV1DecoderDiTModel.receptive_field`).
+    function_evaluations_per_step = 1
+
+    def __init__(self, function, initial_value):
+        self.function = function
+        self.initial_value = initial_value
+        self.num_steps_taken = 0
+
+    def step(self, time_start, time_end, value):
+        raise NotImplementedError
+
+    def integrate(self, time_points):
+        value = self.initial_value
+        for time_start, time_end in zip(time_points[:-1], time_points[1:]):
+            value = self.step(time_start, time_end, value)
+            self.num_steps_taken += 1
+        return value
+
+
+class EulerODESolver(DiTODESolver):
+    def step(self, time_start, time_end, value):
+        return value + self.function(time_start, value) * (time_end - time_start)
+
+
+class MidpointODESolver(DiTODESolver):
+    function_evaluations_per_step = 2
+
+    def step(self, time_start, time_end, value):
+        time_step = time_end - time_start
+        k1 = self.function(time_start, value)
+        k2 = self.function(time_start + time_step / 2, value + k1 * (time_step / 2))
+        return value + k2 * time_step
+
+
+class HeunODESolver(DiTODESolver):
+    function_evaluations_per_step = 2
+
+    def step(self, time_start, time_end, value):
+        time_step = time_end - time_start
+        k1 = self.function(time_start, value)
+        k2 = self.function(time_end, value + k1 * time_step)
+        return value + (k1 + k2) * (time_step / 2)
+
+
+class RungeKutta4ODESolver(DiTODESolver):
+    function_evaluations_per_step = 4
+
+    def step(self, time_start, time_end, value):
+        time_step = time_end - time_start
+        k1 = self.function(time_start, value)
+        k2 = self.function(time_start + time_step / 2, value + k1 * (time_step / 2))
+        k3 = self.function(time_start + time_step / 2, value + k2 * (time_step / 2))
+        k4 = self.function(time_end, value + k3 * time_step)
+        return value + (k1 + 2 * k2 + 2 * k3 + k4) * (time_step / 6)
+
+
+class AdaptiveHeunODESolver(DiTODESolver):
+    """Heun's method with an embedded Euler error estimate and step size control.
+
+    Integrates from the first to the last of `time_points`, starting with the first interval of the schedule as
+    step size. A step is accepted when the RMS of its error, relative to `atol + rtol * |x|`, is at most 1; each
+    attempt costs two function evaluations. After `max_steps` steps the rest of the interval is taken in one step.
+    """
+
+    function_evaluations_per_step = 2
+
+    def __init__(self, function, initial_value, rtol=1e-2, atol=1e-2, max_steps=32):
+        super().__init__(function, initial_value)
+        self.rtol = rtol
+        self.atol = atol
+        self.max_steps = max_steps
+
+    def integrate(self, time_points):
+        time, time_end = float(time_points[0]), float(time_points[-1])
+        time_step = float(time_points[1] - time_points[0])
+        value = self.initial_value
+        k1 = self.function(time_points[0], value)
+        while time < time_end:
+            last_step = self.num_steps_taken + 1 >= self.max_steps
+            final_step = last_step or time_end - time <= time_step
+            if final_step:
+                time_step = time_end - time
+            next_time = time_points.new_tensor(time_end if final_step else time + time_step)
+            euler_value = value + k1 * time_step
+            k2 = self.function(next_time, euler_value)
+            heun_value = value + (k1 + k2) * (time_step / 2)
+
+            scale = self.atol + self.rtol * torch.maximum(value.abs(), heun_value.abs())
+            error = float(((heun_value - euler_value) / scale).pow(2).mean().sqrt())
+            if error <= 1.0 or last_step:
+                time, value = (time_end if final_step else time + time_step), heun_value
+                self.num_steps_taken += 1
+                if time < time_end:
+                    k1 = self.function(next_time, value)
+            time_step *= min(max(0.9 * max(error, 1e-10) ** -0.5, 0.2), 5.0)
+        return value
+
+
+DIT_ODE_SOLVERS = {
+    "euler": EulerODESolver,
+    "midpoint": MidpointODESolver,
+    "heun": HeunODESolver,
+    "rk4": RungeKutta4ODESolver,
+    "adaptive_heun": AdaptiveHeunODESolver,
+}
+
+
+@dataclass
+class DiTConditioning:
+    """
+    Inputs of the DiT that stay the same across the ODE steps of one `sample` call.
+
+    Args:
+        input_embeds (`torch.FloatTensor` of shape `(batch_size, seq_len, hidden_size)`):
+            Input projection of the speaker embedding, reference mel and codes. When prepared for classifier-free
+            guidance the unconditional rows follow the conditional ones, `2 * batch_size` rows in total.
+        position_embeddings (`tuple(torch.FloatTensor)`):
+            Rotary `(cos, sin)` tables of shape `(1, seq_len, head_dim)`.
+        block_diff (`torch.LongTensor`, *optional*):
+            Block distances of the dense attention path.
+        block_band (`tuple`, *optional*):
+            Band masks of the block-sparse attention path.
+    """
+
+    input_embeds: torch.Tensor
+    position_embeddings: tuple[torch.Tensor, torch.Tensor]
+    block_diff: Optional[torch.Tensor] = None
+    block_band: Optional[tuple] = None
+
+
 @auto_docstring
 class Qwen3TTSTokenizerV1DecoderDiTModel(Qwen3TTSTokenizerV1DecoderPreTrainedModel):
     config: Qwen3TTSTokenizerV1DecoderDiTConfig
@@ -1111,6 +1339,18 @@ class Qwen3TTSTokenizerV1DecoderDiTModel(Qwen3TTSTokenizerV1DecoderPreTrainedMod
 
         return block_diff.expand(batch, self.num_attention_heads, seq_len, seq_len)
 
+    def _create_block_band(self, seq_len, device=None):
+        """Band masks of all the `(look_backward_block, look_ahead_block)` windows used by the layers, built once
+        per sequence length and shared by every layer and ODE step."""
+        band_masks = {}
+        for transformer_block in self.transformer_blocks:
+            window = (transformer_block.look_backward_block, transformer_block.look_ahead_block)
+            if window not in band_masks:
+                band_masks[window] = create_block_band_mask(
+                    seq_len, self.block_size, *window, num_heads=self.num_attention_heads, device=device
+                )
+        return self.block_size, band_masks
+
     def forward(
         self,
         hidden_states,
@@ -1121,18 +1361,35 @@ class Qwen3TTSTokenizerV1DecoderDiTModel(Qwen3TTSTokenizerV1DecoderPreTrainedMod
         drop_audio_conditioning=False,
         drop_code=False,
         apply_cfg=True,
+        block_band=None,
     ):
-        batch_size = hidden_states.shape[0] * 2
-        if time_step.ndim == 0:
-            time_step = time_step.repeat(batch_size)
+        conditioning = self.prepare_conditioning(
+            speaker_embedding,
+            condition_vector,
+            quantized_code,
+            drop_audio_conditioning=drop_audio_conditioning,
+            drop_code=drop_code,
+            apply_cfg=apply_cfg,
+            block_band=block_band,
+        )
+        return self.denoise(hidden_states, time_step, conditioning, apply_cfg=apply_cfg)
 
-        # Compute embeddings
-        time_embedding = self.time_embed(time_step)
+    def prepare_conditioning(
+        self,
+        speaker_embedding,
+        condition_vector,
+        quantized_code,
+        drop_audio_conditioning=False,
+        drop_code=False,
+        apply_cfg=True,
+        block_band=None,
+    ):
+        """Computes the step-invariant `DiTConditioning`: code embeddings, speaker encoder and input projection of
+        the conditioning, rotary tables and attention masks."""
         text_embedding = self.text_embed(quantized_code, drop_code=False if apply_cfg else drop_code)
         text_embedding_unconditioned = self.text_embed(quantized_code, drop_code=True) if apply_cfg else None
 
-        hidden_states = self.input_embed(
-            hidden_states,
+        input_embeds = self.input_embed.embed_conditioning(
             speaker_embedding,
             condition_vector,
             text_embedding,
@@ -1142,16 +1399,44 @@ class Qwen3TTSTokenizerV1DecoderDiTModel(Qwen3TTSTokenizerV1DecoderPreTrainedMod
         )
 
         # Compute positional encodings
-        position_embeddings = self.rotary_embed(hidden_states)
-        blockwise_difference = self._create_block_diff(hidden_states)
+        position_embeddings = self.rotary_embed(input_embeds[:1])
+        block_diff = None
+        if self.config.block_sparse_attention:
+            if block_band is None:
+                block_band = self._create_block_band(input_embeds.shape[1], device=input_embeds.device)
+        else:
+            block_diff = self._create_block_diff(input_embeds[:1])
+            block_band = None
+
+        return DiTConditioning(
+            input_embeds=input_embeds,
+            position_embeddings=position_embeddings,
+            block_diff=block_diff,
+            block_band=block_band,
+        )
+
+    def denoise(self, hidden_states, time_step, conditioning, apply_cfg=True):
+        """Predicts the flow at `hidden_states`; with `apply_cfg` the conditional and unconditional predictions
+        are stacked along the batch, without copying `conditioning`."""
+        batch_size = hidden_states.shape[0]
+        noisy_embeds = self.input_embed.embed_noisy(hidden_states)
+        if apply_cfg:
+            input_embeds = conditioning.input_embeds.view(2, batch_size, *noisy_embeds.shape[1:])
+            hidden_states = (input_embeds + noisy_embeds.unsqueeze(0)).flatten(0, 1)
+        else:
+            hidden_states = noisy_embeds + conditioning.input_embeds[:batch_size]
+
+        # a scalar time step is embedded once and broadcast over the batch
+        time_embedding = self.time_embed(time_step.reshape(1) if time_step.ndim == 0 else time_step)
 
         # Transformer blocks
         for transformer_block in self.transformer_blocks:
             hidden_states = transformer_block(
                 hidden_states,
                 time_embedding,
-                position_embeddings=position_embeddings,
-                block_diff=blockwise_difference,
+                position_embeddings=conditioning.position_embeddings,
+                block_diff=conditioning.block_diff,
+                block_band=conditioning.block_band,
             )
 
         hidden_states = self.norm_out(hidden_states, time_embedding)
@@ -1168,6 +1453,19 @@ class Qwen3TTSTokenizerV1DecoderDiTModel(Qwen3TTSTokenizerV1DecoderPreTrainedMod
         st_star = dot_product / squared_norm
         return st_star
 
+    def sample_noise(self, batch_size, num_frames, dtype=None, device=None, generator=None):
+        return torch.randn([batch_size, num_frames, self.mel_dim], dtype=dtype, device=device, generator=generator)
+
+    def receptive_field(self, num_passes=1):
+        """Blocks seen before and after its own block by `num_passes` chained forward passes, summed over the layers.
+
+        Every ODE function evaluation of `sample` is one pass over the current state, so a mel frame produced with
+        `n` evaluations depends on `n` times the blocks of a single pass.
+        """
+        look_backward = sum(block.look_backward_block for block in self.transformer_blocks)
+        look_ahead = sum(block.look_ahead_block for block in self.transformer_blocks)
+        return look_backward * num_passes, look_ahead * num_passes
+
     @torch.no_grad()
     def sample(
         self,
@@ -1177,33 +1475,55 @@ class Qwen3TTSTokenizerV1DecoderDiTModel(Qwen3TTSTokenizerV1DecoderPreTrainedMod
         num_steps=10,
         guidance_scale=0.5,
         sway_coefficient=-1.0,
+        initial_state=None,
+        solver="euler",
+        cfg_steps=None,
+        solver_options=None,
+        generator=None,
     ):
-        noise_initialization = torch.randn([quantized_code.shape[0], 30000, self.mel_dim], dtype=reference_mel_spectrogram.dtype)
-        maximum_duration = quantized_code.shape[1] * self.repeats
-        initial_state = noise_initialization[:, :maximum_duration].to(quantized_code.device)
-        conditioning_vector = conditioning_vector.unsqueeze(1).repeat(1, maximum_duration, 1)
+        """Integrates the flow from noise to a mel spectrogram of `quantized_code.shape[1] * repeats` frames.
 
-        def ode_function(time_step, hidden_states):
-            if guidance_scale < 1e-5:
-                prediction = self(
-                    hidden_states=hidden_states,
-                    speaker_embedding=conditioning_vector,
-                    condition_vector=reference_mel_spectrogram,
-                    quantized_code=quantized_code,
-                    time_step=time_step,
-                    drop_audio_conditioning=False,
-                    drop_code=False,
-                )
-                return prediction
-
-            model_output = self(
-                hidden_states=hidden_states,
-                quantized_code=quantized_code,
-                speaker_embedding=conditioning_vector,
-                condition_vector=reference_mel_spectrogram,
-                time_step=time_step,
-                apply_cfg=True,
+        Args:
+            num_steps (`int`, defaults to 10):
+                Number of time points of the (sway-warped) schedule, i.e. `num_steps - 1` solver steps.
+            guidance_scale (`float`, defaults to 0.5):
+                Classifier-free guidance strength; below 1e-5 only the conditional branch is evaluated.
+            initial_state (`torch.Tensor`, *optional*):
+                Starting noise of shape `(batch, frames, mel_dim)`; drawn with `sample_noise` by default.
+            solver (`str` or `DiTODESolver` subclass, defaults to `"euler"`):
+                ODE solver, one of `DIT_ODE_SOLVERS` (`"euler"`, `"midpoint"`, `"heun"`, `"rk4"`, `"adaptive_heun"`).
+            cfg_steps (`int`, *optional*):
+                Only apply classifier-free guidance during the first `cfg_steps` solver steps, later steps run the
+                conditional branch alone at half the batch. All steps by default.
+            solver_options (`dict`, *optional*):
+                Extra solver arguments, e.g. `rtol` / `atol` / `max_steps` of `"adaptive_heun"`.
+            generator (`torch.Generator`, *optional*):
+                Random generator on the target device for the starting noise.
+        """
+        batch_size, maximum_duration = quantized_code.shape[0], quantized_code.shape[1] * self.repeats
+        if initial_state is None:
+            initial_state = self.sample_noise(
+                batch_size,
+                maximum_duration,
+                dtype=reference_mel_spectrogram.dtype,
+                device=quantized_code.device,
+                generator=generator,
             )
+
+        # everything but the noisy mel and the time step is computed once for all the ODE steps
+        apply_cfg = guidance_scale >= 1e-5
+        conditioning = self.prepare_conditioning(
+            speaker_embedding=conditioning_vector.unsqueeze(1).expand(-1, maximum_duration, -1),
+            condition_vector=reference_mel_spectrogram,
+            quantized_code=quantized_code,
+            apply_cfg=apply_cfg,
+        )
+
+        def ode_function(time_step, hidden_states):
+            if not apply_cfg or (cfg_steps is not None and ode_solver.num_steps_taken >= cfg_steps):
+                return self.denoise(hidden_states, time_step, conditioning, apply_cfg=False)
+
+            model_output = self.denoise(hidden_states, time_step, conditioning, apply_cfg=True)
             guided_prediction, null_prediction = torch.chunk(model_output, 2, dim=0)
 
             return guided_prediction + (guided_prediction - null_prediction) * guidance_scale
@@ -1216,11 +1536,9 @@ class Qwen3TTSTokenizerV1DecoderDiTModel(Qwen3TTSTokenizerV1DecoderPreTrainedMod
         if sway_coefficient is not None:
             time_embedding += sway_coefficient * (torch.cos(torch.pi / 2 * time_embedding) - 1 + time_embedding)
 
-        values = initial_state.clone()
-        for t0, t1 in zip(time_embedding[:-1], time_embedding[1:]):
-            dt = t1 - t0
-            vt = ode_function(t0, values)
-            values = values + vt * dt
+        solver_class = DIT_ODE_SOLVERS[solver] if isinstance(solver, str) else solver
+        ode_solver = solver_class(ode_function, initial_state.clone(), **(solver_options or {}))
+        values = ode_solver.integrate(time_embedding)
 
         generated_mel_spectrogram = values.permute(0, 2, 1)
         return generated_mel_spectrogram
@@ -1261,9 +1579,16 @@ class Qwen3TTSTokenizerV1Decoder(Qwen3TTSTokenizerV1DecoderPreTrainedModel):
         num_steps=10,
         guidance_scale=0.5,
         sway_coefficient=-1.0,
+        solver="euler",
+        cfg_steps=None,
+        solver_options=None,
+        generator=None,
         **kwargs,
     ):
-        """Generates a waveform from input code and conditioning parameters."""
+        """Generates a waveform from input code and conditioning parameters.
+
+        The sampling arguments are those of `Qwen3TTSTokenizerV1DecoderDiTModel.sample`.
+        """
 
         mel_spectrogram = self.dit.sample(
             conditioning,
@@ -1272,12 +1597,120 @@ class Qwen3TTSTokenizerV1Decoder(Qwen3TTSTokenizerV1DecoderPreTrainedModel):
             num_steps=num_steps,
             guidance_scale=guidance_scale,
             sway_coefficient=sway_coefficient,
+            solver=solver,
+            cfg_steps=cfg_steps,
+            solver_options=solver_options,
+            generator=generator,
         )
 
         waveform = self.bigvgan(mel_spectrogram)
 
         return waveform
 
+    @torch.no_grad()
+    def chunked_forward(
+        self,
+        code,
+        conditioning,
+        reference_mel,
+        chunk_size=48,
+        left_context=None,
+        right_context=None,
+        crossfade=None,
+        exact=False,
+        num_steps=10,
+        guidance_scale=0.5,
+        sway_coefficient=-1.0,
+        solver="euler",
+        cfg_steps=None,
+        solver_options=None,
+        generator=None,
+    ):
+        """Generates the waveform of `code` window by window, yielding `(batch, num_samples)` chunks.
+
+        Every chunk of `chunk_size` codes is rendered by the DiT and BigVGAN together with `left_context` codes
+        before and `right_context` codes after it. Windows start on DiT block boundaries and slice their noise from
+        one draw for the whole sequence, as a full-length `forward` would, so the block attention pattern and the
+        starting noise of every window match the full sequence. Consecutive chunks overlap by `crossfade` codes,
+        blended with a linear crossfade.
+
+        Args:
+            chunk_size (`int`, defaults to 48):
+                Codes per emitted chunk, rounded up to whole DiT blocks.
+            left_context (`int`, *optional*):
+                Codes of context before each chunk, rounded up to whole DiT blocks. Defaults to the backward
+                receptive field of a single DiT forward pass, or of the whole sampling run with `exact`.
+            right_context (`int`, *optional*):
+                Codes of context after each chunk, rounded up to whole DiT blocks. Defaults to the look-ahead
+                receptive field of a single DiT forward pass, or of the whole sampling run with `exact`.
+            crossfade (`int`, *optional*):
+                Codes blended across each seam, at most `left_context`. Defaults to a quarter of a DiT block.
+            exact (`bool`, defaults to `False`):
+                Default the contexts to the receptive field of all chained ODE function evaluations, so that the
+                chunks match a full-length `forward` up to float rounding (the adaptive solver picks its steps from
+                the whole window, so it only matches approximately).
+
+        The sampling arguments are those of `Qwen3TTSTokenizerV1DecoderDiTModel.sample`.
+
+        The default contexts keep every window close to `chunk_size`: with 24-frame blocks, a DiT that looks 2
+        blocks back and 1 ahead renders 24 codes before and 12 after each 48-code chunk, and the first chunk
+        only waits for 60 codes. The receptive field grows with every solver evaluation, so `exact` contexts for
+        10 Euler steps are 9 times larger (216 codes back, 108 ahead), costing several times the compute of a
+        full decode and delaying the first chunk accordingly; the seams of the default windows deviate slightly
+        from the full decode instead.
+        """
+        block_codes = self.dit.block_size // self.dit.repeats
+        num_passes = 1
+        if exact:
+            solver_class = DIT_ODE_SOLVERS[solver] if isinstance(solver, str) else solver
+            num_passes = solver_class.function_evaluations_per_step * max(num_steps - 1, 1)
+        look_backward, look_ahead = self.dit.receptive_field(num_passes)
+        left_context = look_backward * block_codes if left_context is None else left_context
+        right_context = look_ahead * block_codes if right_context is None else right_context
+        chunk_size = -(-max(chunk_size, 1) // block_codes) * block_codes
+        left_context = -(-left_context // block_codes) * block_codes
+        right_context = -(-right_context // block_codes) * block_codes
+        crossfade = max(block_codes // 4, 1) if crossfade is None else crossfade
+        crossfade = min(crossfade, left_context)
+
+        num_codes = code.shape[1]
+        samples_per_code = self.dit.repeats * int(np.prod(self.config.bigvgan_config.upsample_rates))
+        noise = self.dit.sample_noise(
+            code.shape[0], num_codes * self.dit.repeats, dtype=reference_mel.dtype, device=code.device, generator=generator
+        )
+        fade_in = torch.linspace(0, 1, crossfade * samples_per_code + 2, device=code.device)[1:-1]
+
+        tail = None
+        for start in range(0, num_codes, chunk_size):
+            end = min(start + chunk_size, num_codes)
+            window_start = max(start - left_context, 0)
+            window_end = min(end + right_context, num_codes)
+            mel_spectrogram = self.dit.sample(
+                conditioning,
+                reference_mel,
+                code[:, window_start:window_end],
+                num_steps=num_steps,
+                guidance_scale=guidance_scale,
+                sway_coefficient=sway_coefficient,
+                initial_state=noise[:, window_start * self.dit.repeats : window_end * self.dit.repeats],
+                solver=solver,
+                cfg_steps=cfg_steps,
+                solver_options=solver_options,
+            )
+            waveform = self.bigvgan(mel_spectrogram)
+
+            emit_start = start - crossfade if tail is not None else start
+            waveform = waveform[
+                :, (emit_start - window_start) * samples_per_code : (end - window_start) * samples_per_code
+            ]
+            if tail is not None:
+                head = waveform[:, : tail.shape[1]] * fade_in.to(waveform.dtype) + tail * fade_in.flip(0).to(tail.dtype)
+                waveform = torch.cat([head, waveform[:, tail.shape[1] :]], dim=1)
+            if end < num_codes and crossfade > 0:
+                tail = waveform[:, -crossfade * samples_per_code :]
+                waveform = waveform[:, : -crossfade * samples_per_code]
+            yield waveform
+
 
 class Qwen3TTSTokenizerV1Encoder(Qwen3TTSTokenizerV1EncoderPreTrainedModel):
     config: Qwen3TTSTokenizerV1EncoderConfig
@@ -1375,8 +1808,8 @@ class Qwen3TTSTokenizerV1Model(Qwen3TTSTokenizerV1PreTrainedModel):
 
         self.post_init()
     
-    def load_encoder_xvector_extractor(self, model_path):
-        self.encoder_xvector_extractor = XVectorExtractor(model_path)
+    def load_encoder_xvector_extractor(self, model_path, **extractor_kwargs):
+        self.encoder_xvector_extractor = XVectorExtractor(model_path, **extractor_kwargs)
     
     def get_model_type(self):
         return self.config.model_type
@@ -1407,8 +1840,15 @@ class Qwen3TTSTokenizerV1Model(Qwen3TTSTokenizerV1PreTrainedModel):
         revision="main",
         use_safetensors=None,
         weights_only=True,
+        xvector_extractor_kwargs: Optional[dict] = None,
         **kwargs,
     ):
+        """
+        Load the model and its CAM++ x-vector extractor (`campplus.onnx`).
+
+        `xvector_extractor_kwargs` are passed to `XVectorExtractor`, e.g.
+        `dict(intra_op_num_threads=4, num_workers=2)` for bulk encoding.
+        """
         model = super().from_pretrained(
             pretrained_model_name_or_path,
             *model_args,
@@ -1437,7 +1877,7 @@ class Qwen3TTSTokenizerV1Model(Qwen3TTSTokenizerV1PreTrainedModel):
         )
         if encoder_xvector_extractor_path is None:
             raise ValueError(f"""{pretrained_model_name_or_path}/{encoder_xvector_extractor_path} not exists""")
-        model.load_encoder_xvector_extractor(encoder_xvector_extractor_path)
+        model.load_encoder_xvector_extractor(encoder_xvector_extractor_path, **(xvector_extractor_kwargs or {}))
 
         return model
 
@@ -1466,14 +1906,9 @@ class Qwen3TTSTokenizerV1Model(Qwen3TTSTokenizerV1PreTrainedModel):
         codes, codes_lens = self.encoder.quantize_speech(wavs)
         codes = [c[:l] for c, l in zip(codes, codes_lens)]
 
-        xvectors = []
-        ref_mels = []
-        for wav in wavs:
-            xvector, ref_mel = self.encoder_xvector_extractor.extract_code(wav.cpu().numpy())
-            xvector = torch.tensor(xvector).to(wav.dtype).to(wav.device)
-            ref_mel = torch.tensor(ref_mel).to(wav.dtype).to(wav.device)
-            xvectors.append(xvector)
-            ref_mels.append(ref_mel)
+        xvectors, ref_mels = self.encoder_xvector_extractor.extract_codes([wav.float().cpu().numpy() for wav in wavs])
+        xvectors = [torch.from_numpy(xvector).to(wav.dtype).to(wav.device) for xvector, wav in zip(xvectors, wavs)]
+        ref_mels = [torch.from_numpy(ref_mel).to(wav.dtype).to(wav.device) for ref_mel, wav in zip(ref_mels, wavs)]
 
         if not return_dict:
             return (
@@ -1490,6 +1925,7 @@ class Qwen3TTSTokenizerV1Model(Qwen3TTSTokenizerV1PreTrainedModel):
         xvectors: torch.Tensor,
         ref_mels: torch.Tensor,
         return_dict: Optional[bool] = None,
+        **kwargs,
     ) -> Union[tuple[torch.Tensor, torch.Tensor], Qwen3TTSTokenizerV1DecoderOutput]:
         """
         Decodes the given frames into an output audio waveform.
@@ -1506,6 +1942,9 @@ class Qwen3TTSTokenizerV1Model(Qwen3TTSTokenizerV1PreTrainedModel):
                 Reference mel spectrogram computed using `model.encode`.
             return_dict (`bool`, *optional*):
                 Whether or not to return a [`~utils.ModelOutput`] instead of a plain tuple.
+            kwargs:
+                DiT sampling options (`num_steps`, `guidance_scale`, `sway_coefficient`, `solver`, `cfg_steps`,
+                `solver_options`, `generator`), see `Qwen3TTSTokenizerV1DecoderDiTModel.sample`.
 
         """
         return_dict = return_dict if return_dict is not None else self.config.return_dict
@@ -1514,7 +1953,8 @@ class Qwen3TTSTokenizerV1Model(Qwen3TTSTokenizerV1PreTrainedModel):
         audio_codes = torch.clamp(audio_codes, min=0)
         audio_values = self.decoder(code=audio_codes,
                                     reference_mel=ref_mels,
-                                    conditioning=xvectors)
+                                    conditioning=xvectors,
+                                    **kwargs)
         
         audio_values = [a[:l] for a, l in zip(audio_values, audio_lengths)]
 
@@ -1525,5 +1965,70 @@ class Qwen3TTSTokenizerV1Model(Qwen3TTSTokenizerV1PreTrainedModel):
 
         return Qwen3TTSTokenizerV1DecoderOutput(audio_values)
 
+    def chunked_decode(
+        self,
+        audio_codes: torch.Tensor,
+        xvectors: torch.Tensor,
+        ref_mels: torch.Tensor,
+        chunk_size: int = 48,
+        left_context: Optional[int] = None,
+        right_context: Optional[int] = None,
+        crossfade: Optional[int] = None,
+        exact: bool = False,
+        return_dict: Optional[bool] = None,
+        **kwargs,
+    ) -> Iterator[Union[tuple[torch.Tensor], Qwen3TTSTokenizerV1DecoderOutput]]:
+        """
+        Decodes the given frames window by window, yielding the waveform as soon as each chunk is rendered.
+
+        The DiT only attends a few blocks around each position and BigVGAN is convolutional, so each chunk of
+        `chunk_size` codes is rendered with a bounded amount of surrounding context and crossfaded into the previous
+        one. Memory no longer grows with the clip length and the first chunk is available after a single window.
+        Concatenating the chunks of a sample gives a waveform of the same length as `decode`.
+
+        Args:
+            audio_codes (`torch.LongTensor`  of shape `(batch_size, codes_length)`):
+                Discret code embeddings computed using `model.encode`, right-padded with -1.
+            xvectors (`torch.FloatTensor` of shape `(batch_size, xvector_dim)`):
+                X-vector embeddings computed using `model.encode`.
+            ref_mels (`torch.FloatTensor` of shape `(batch_size, mel_length, mel_dim)`):
+                Reference mel spectrogram computed using `model.encode`.
+            chunk_size, left_context, right_context, crossfade (`int`, *optional*):
+                Window layout in codes, see `Qwen3TTSTokenizerV1Decoder.chunked_forward`.
+            exact (`bool`, defaults to `False`):
+                Default the contexts to the receptive field of the whole sampling run, so that the chunks match
+                `decode`; see `Qwen3TTSTokenizerV1Decoder.chunked_forward`.
+            return_dict (`bool`, *optional*):
+                Whether or not to yield [`~utils.ModelOutput`] instead of plain tuples.
+            kwargs:
+                DiT sampling options, as in `decode`.
+
+        Yields:
+            The waveform chunk of every sample, empty for samples that already ended.
+        """
+        return_dict = return_dict if return_dict is not None else self.config.return_dict
+        audio_lengths = (audio_codes > -1).sum(1) * self.decode_upsample_rate
+
+        audio_codes = torch.clamp(audio_codes, min=0)
+        offset = 0
+        for chunk in self.decoder.chunked_forward(
+            code=audio_codes,
+            reference_mel=ref_mels,
+            conditioning=xvectors,
+            chunk_size=chunk_size,
+            left_context=left_context,
+            right_context=right_context,
+            crossfade=crossfade,
+            exact=exact,
+            **kwargs,
+        ):
+            audio_values = [a[: max(int(l) - offset, 0)] for a, l in zip(chunk, audio_lengths)]
+            offset += chunk.shape[1]
+
+            if not return_dict:
+                yield (audio_values,)
+            else:
+                yield Qwen3TTSTokenizerV1DecoderOutput(audio_values)
+
 
 __all__ = ["Qwen3TTSTokenizerV1Model", "Qwen3TTSTokenizerV1PreTrainedModel"]
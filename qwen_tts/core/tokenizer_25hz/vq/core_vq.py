@@ -101,6 +101,34 @@ def kmeans(samples, num_clusters: int, num_iters: int = 10):
     return means, bins
 
 
+# upper bound on the number of elements of one block of the (rows, codebook_size) distance matrix
+QUANTIZE_CHUNK_ELEMENTS = 2 ** 24
+
+
+def nearest_codeword(x, embed_t, embed_norm, chunk_elements: int = QUANTIZE_CHUNK_ELEMENTS):
+    """Index of the nearest codeword (Euclidean distance) of every row of `x`.
+    Args:
+        x (Tensor): Rows to quantize, shape (G, N, D) for G independent codebooks.
+        embed_t (Tensor): Transposed codebooks, shape (G, D, K).
+        embed_norm (Tensor): Squared codeword norms, shape (G, 1, K).
+        chunk_elements (int): Maximum size of one block of the distance matrix; rows are processed in
+            chunks so that peak memory does not grow with N.
+    Returns:
+        Tensor: Codeword indices of shape (G, N).
+    """
+    num_groups, num_rows, codebook_size = x.shape[0], x.shape[1], embed_t.shape[-1]
+    chunk_size = max(1, chunk_elements // (num_groups * codebook_size))
+    if num_rows <= chunk_size:
+        # ||x||^2 is the same for every codeword of a row and does not change the argmin
+        return torch.baddbmm(embed_norm, x, embed_t, alpha=-2).argmin(dim=-1)
+
+    embed_ind = torch.empty(num_groups, num_rows, dtype=torch.long, device=x.device)
+    for start in range(0, num_rows, chunk_size):
+        dist = torch.baddbmm(embed_norm, x[:, start:start + chunk_size], embed_t, alpha=-2)
+        embed_ind[:, start:start + chunk_size] = dist.argmin(dim=-1)
+    return embed_ind
+
+
 def preprocess(x):
     x = rearrange(x, "... d -> (...) d")
     return x
@@ -149,6 +177,9 @@ class EuclideanCodebook(nn.Module):
         self.embed_avg = None
         self.training = True
 
+        self._search_cache_key = None
+        self._search_cache = None
+
     def init_embed_(self, data):
         if self.inited:
             return
@@ -183,14 +214,42 @@ class EuclideanCodebook(nn.Module):
         # sync buffers outside for efficiency
         # distrib.broadcast_tensors(self.buffers())
 
+    def search_tensors(self, embed=None):
+        """Transposed codebook (1, D, K) and squared codeword norms (1, 1, K) for `nearest_codeword`.
+        Outside of training they are computed once and reused until the codebook tensor is replaced or moved;
+        in-place updates (state-dict loads, EMA updates in train mode) drop the cache through
+        `_load_from_state_dict` and `train`.
+        """
+        embed = self.embed if embed is None else embed
+        # No version counter in the key: inference tensors do not track one. The cached entry keeps `embed`
+        # alive, so its storage (and data_ptr) can not be recycled by another codebook while it is cached.
+        key = (embed.data_ptr(), embed.shape, embed.dtype, embed.device)
+        if self.training or self._search_cache is None or key != self._search_cache_key:
+            search_tensors = (embed.t().contiguous().unsqueeze(0), embed.pow(2).sum(1)[None, None])
+            if self.training:
+                return search_tensors
+            self._search_cache_key, self._search_cache = key, (embed, *search_tensors)
+        return self._search_cache[1:]
+
+    def clear_search_cache(self):
+        self._search_cache_key = None
+        self._search_cache = None
+
+    def train(self, mode: bool = True):
+        self.clear_search_cache()
+        return super().train(mode)
+
+    def _apply(self, fn, *args, **kwargs):
+        self.clear_search_cache()
+        return super()._apply(fn, *args, **kwargs)
+
+    def _load_from_state_dict(self, *args, **kwargs):
+        self.clear_search_cache()
+        return super()._load_from_state_dict(*args, **kwargs)
+
     def quantize(self, x):
-        embed = self.embed.t()
-        dist = -(
-            x.pow(2).sum(1, keepdim=True)
-            - 2 * x @ embed
-            + embed.pow(2).sum(0, keepdim=True)
-        )
-        embed_ind = dist.max(dim=-1).indices
+        embed_t, embed_norm = self.search_tensors()
+        embed_ind = nearest_codeword(x.unsqueeze(0), embed_t, embed_norm)[0]
         return embed_ind
 
     def dequantize(self, embed_ind):
@@ -516,7 +575,32 @@ class DistributedGroupResidualVectorQuantization(nn.Module):
 
     def encode(self, x: torch.Tensor, n_q: tp.Optional[int] = None) -> torch.Tensor:
         x_lst = torch.chunk(x, chunks=self.num_groups, dim=1)
-        return torch.stack([mod.encode(item, n_q) for mod, item in zip(self.rvqs, x_lst)], dim=1)
+        if self.num_groups == 1 or len(set(item.shape for item in x_lst)) > 1:
+            return torch.stack([mod.encode(item, n_q) for mod, item in zip(self.rvqs, x_lst)], dim=1)
+
+        # the groups are independent: run the nearest-codeword search of every residual level for all groups
+        # in one batched call, only the residual levels themselves stay sequential
+        residuals = list(x_lst)
+        all_indices = []
+        n_q = n_q or len(self.rvqs[0].layers)
+        for i in range(n_q):
+            layers = [mod.layers[i] for mod in self.rvqs]
+            buffers = [[mod.inited[i], mod.cluster_size[i], mod.embed[i], mod.embed_avg[i]] for mod in self.rvqs]
+            quant_in = [preprocess(layer.project_in(residual)) for layer, residual in zip(layers, residuals)]
+            search_tensors = [layer._codebook.search_tensors(buffer[2]) for layer, buffer in zip(layers, buffers)]
+            embed_ind = nearest_codeword(
+                torch.stack(quant_in, dim=0),
+                torch.cat([embed_t for embed_t, _ in search_tensors], dim=0),
+                torch.cat([embed_norm for _, embed_norm in search_tensors], dim=0),
+            )
+            indices = [postprocess_emb(ind, residual.shape) for ind, residual in zip(embed_ind, residuals)]
+            residuals = [
+                residual - layer.decode(ind, buffer)
+                for residual, layer, ind, buffer in zip(residuals, layers, indices, buffers)
+            ]
+            all_indices.append(torch.stack(indices, dim=0))
+        # (n_q, G, ...), as stacking the per-group (n_q, ...) indices along dim 1
+        return torch.stack(all_indices, dim=0)
 
     def decode(self, q_indices: torch.Tensor) -> torch.Tensor:
         q_indices_lst = torch.chunk(q_indices, chunks=self.num_groups, dim=1)
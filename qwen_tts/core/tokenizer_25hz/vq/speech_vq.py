@@ -13,23 +13,23 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import sox
-import copy
 import torch
 import operator
 import onnxruntime
 
+import numpy as np
 import torch.nn as nn
 import torch.nn.functional as F
 import torchaudio.compliance.kaldi as kaldi
 
+from concurrent.futures import ThreadPoolExecutor
 from librosa.filters import mel as librosa_mel_fn
 from itertools import accumulate
-from typing import List
+from typing import List, Optional, Tuple
 from torch import Tensor
 
 from .core_vq import DistributedGroupResidualVectorQuantization
-from .whisper_encoder import WhisperEncoder, Conv1d, ConvTranspose1d
+from .whisper_encoder import WhisperEncoder, Conv1d, ConvTranspose1d, VarlenAttentionLayout
 
 
 def dynamic_range_compression_torch(x, C=1, clip_val=1e-5):
@@ -89,20 +89,48 @@ class MelSpectrogramFeatures(nn.Module):
             feats = self.extract(audio, **kwargs) 
         return feats
     
-    def extract(self, audio, **kwargs):
+    def frame_lengths(self, lengths: Tensor) -> Tensor:
+        """
+        Number of valid frames of `extract` for signals of `lengths` samples.
+        """
+        padding = int((self.filter_length-self.hop_length)/2)
+        return (lengths + 2 * padding - self.filter_length) // self.hop_length + 1
+
+    def extract(self, audio, lengths: Optional[Tensor] = None, **kwargs):
+        """
+        Args:
+            audio (torch.Tensor):
+                `(batch, num_samples)` signals. A batch of signals of different lengths is right-padded, with the
+                valid sample counts given in `lengths`.
+            lengths (Optional[torch.Tensor]):
+                `(batch,)` valid samples per item. Every item is reflect-padded at its own end, so its first
+                `frame_lengths(lengths)[i]` frames equal the mel spectrogram of the item on its own.
+        """
 
         if len(audio.shape) == 3:
             audio = audio.squeeze(1) if audio.shape[1] == 1 else audio.squeeze(2)
         assert len(audio.shape) == 2
 
         y = audio
-        if len(list(self.mel_basis.keys())) == 0:
+        key = str(self.mel_fmax)+'_'+str(y.device)
+        if key not in self.mel_basis:
             mel = librosa_mel_fn(sr=self.sampling_rate, n_fft=self.filter_length, n_mels=self.n_mel_channels, fmin=self.mel_fmin, fmax=self.mel_fmax)
-            self.mel_basis[str(self.mel_fmax)+'_'+str(y.device)] = torch.from_numpy(mel).float().to(y.device)
+            self.mel_basis[key] = torch.from_numpy(mel).float().to(y.device)
             self.hann_window[str(y.device)] = torch.hann_window(self.win_length).to(y.device)
 
-        y = torch.nn.functional.pad(y.unsqueeze(1), (int((self.filter_length-self.hop_length)/2), int((self.filter_length-self.hop_length)/2)), mode='reflect')
-        y = y.squeeze(1)
+        padding = int((self.filter_length-self.hop_length)/2)
+        if lengths is None:
+            y = torch.nn.functional.pad(y.unsqueeze(1), (padding, padding), mode='reflect')
+            y = y.squeeze(1)
+        else:
+            # per-item reflect padding: left of the signal read y[|j|], right of it y[2 * (len - 1) - j],
+            # everything past the item's own padding stays zero
+            lengths = lengths.to(y.device).unsqueeze(1)
+            positions = torch.arange(y.shape[1] + 2 * padding, device=y.device) - padding
+            index = positions.abs().unsqueeze(0).expand(y.shape[0], -1)
+            index = torch.where(index < lengths, index, 2 * (lengths - 1) - index)
+            valid = positions.unsqueeze(0) < lengths + padding
+            y = y.gather(1, index.clamp(0, y.shape[1] - 1)) * valid.to(y.dtype)
 
         spec = torch.stft(y, self.filter_length, hop_length=self.hop_length, win_length=self.win_length, window=self.hann_window[str(y.device)],
                           center=False, pad_mode='reflect', normalized=False, onesided=True, return_complex=True)
@@ -115,17 +143,56 @@ class MelSpectrogramFeatures(nn.Module):
         return spec
         
 
+def peak_normalize(audio: np.ndarray, db_level: float = -6.0) -> np.ndarray:
+    """
+    Scale `audio` so that its peak sits at `db_level` dBFS, like `sox norm`; silent input is returned unchanged.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    peak = np.max(np.abs(audio)) if audio.size > 0 else 0.0
+    if peak == 0:
+        return audio
+    return audio * np.float32(10 ** (db_level / 20) / peak)
+
+
 class XVectorExtractor(nn.Module):
-    def __init__(self, audio_codec_with_xvector):
+    """
+    CAM++ speaker embedding (x-vector) and reference mel extraction for the 25Hz tokenizer.
+
+    Waveforms (16kHz) are peak-normalized to -6 dBFS, Kaldi fbank features of the whole batch are computed at once
+    and mean-normalized per item, and items with the same number of frames are embedded by one ONNX Runtime call,
+    so no item ever sees padding. `num_workers > 1` runs these calls concurrently.
+    """
+
+    def __init__(
+        self,
+        audio_codec_with_xvector,
+        intra_op_num_threads: int = 1,
+        num_workers: int = 1,
+        max_batch_size: int = 32,
+    ):
+        """
+        Args:
+            audio_codec_with_xvector (str):
+                Path of the CAM++ ONNX model.
+            intra_op_num_threads (int, default=1):
+                Threads used by ONNX Runtime inside one call.
+            num_workers (int, default=1):
+                Number of ONNX Runtime calls run concurrently.
+            max_batch_size (int, default=32):
+                Maximum number of items per ONNX Runtime call.
+        """
         super().__init__()
         option = onnxruntime.SessionOptions()
         option.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
-        option.intra_op_num_threads = 1
+        option.intra_op_num_threads = intra_op_num_threads
         providers = ["CPUExecutionProvider"]
         self.ort_session = onnxruntime.InferenceSession(audio_codec_with_xvector, sess_options=option, providers=providers)
-
-        self.tfm = sox.Transformer()
-        self.tfm.norm(db_level=-6)
+        self.input_name = self.ort_session.get_inputs()[0].name
+        # exported models with a fixed batch dimension only accept one item per call
+        batch_dim = self.ort_session.get_inputs()[0].shape[0]
+        self.max_batch_size = max_batch_size if not isinstance(batch_dim, int) else batch_dim
+        self.num_workers = num_workers
+        self._executor = None
 
         self.mel_ext = MelSpectrogramFeatures(
             filter_length=1024,
@@ -137,27 +204,121 @@ class XVectorExtractor(nn.Module):
             sampling_rate=16000
         )
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        return state
+
     def extract_code(self, audio):
+        norm_embeddings, ref_mels = self.extract_codes([audio])
+        return norm_embeddings[0], ref_mels[0]
+
+    def extract_codes(self, audios: List[np.ndarray]) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """
+        Batched `extract_code`.
+
+        Args:
+            audios (List[np.ndarray]):
+                1-D 16kHz waveforms of any lengths.
+
+        Returns:
+            Tuple[List[np.ndarray], List[np.ndarray]]: per item, the L2-normalized x-vector of shape `(192,)` and
+            the reference mel of shape `(num_frames, 80)`.
+        """
+        if len(audios) == 0:
+            return [], []
         with torch.no_grad():
-            norm_audio = self.sox_norm(audio)
-
-            norm_audio = torch.from_numpy(copy.deepcopy(norm_audio)).unsqueeze(0)
-            feat = kaldi.fbank(norm_audio,
-                            num_mel_bins=80,
-                            dither=0,
-                            sample_frequency=16000)
-            feat = feat - feat.mean(dim=0, keepdim=True)
-            norm_embedding = self.ort_session.run(None, {self.ort_session.get_inputs()[0].name: feat.unsqueeze(dim=0).cpu().numpy()})[0].flatten()
-            norm_embedding = F.normalize(torch.from_numpy(norm_embedding), dim=0)
-            
-            ref_mel = self.mel_ext.extract(audio=norm_audio)
-        
-        return norm_embedding.numpy(), ref_mel.permute(0,2,1).squeeze(0).numpy()
-    
-    def sox_norm(self, audio):
-        wav_norm = self.tfm.build_array(input_array=audio, sample_rate_in=16000)
-        return wav_norm
+            norm_audios = [torch.from_numpy(self.sox_norm(audio)) for audio in audios]
+            lengths = torch.tensor([len(audio) for audio in norm_audios])
+            norm_audio = torch.nn.utils.rnn.pad_sequence(norm_audios, batch_first=True)
+
+            feats, feat_lengths = self.fbank(norm_audio, lengths)
+            norm_embeddings = self.embed(feats, feat_lengths)
 
+            ref_mel = self.mel_ext.extract(audio=norm_audio, lengths=lengths)
+            mel_lengths = self.mel_ext.frame_lengths(lengths).tolist()
+
+        ref_mels = [ref_mel[i, :, :mel_lengths[i]].permute(1, 0).numpy() for i in range(len(audios))]
+        return list(norm_embeddings.numpy()), ref_mels
+
+    @staticmethod
+    def fbank(waveforms: Tensor, lengths: Tensor) -> Tuple[Tensor, Tensor]:
+        """
+        Mean-normalized 80-bin Kaldi fbank (`kaldi.fbank(..., num_mel_bins=80, dither=0)`) of a right-padded batch.
+
+        Frames never reach past their item's end (Kaldi's `snip_edges`), so each item's valid frames equal its
+        unbatched features; the mean is taken over the valid frames only.
+
+        Returns:
+            Tuple[Tensor, Tensor]: features of shape `(batch, max_frames, 80)` and the valid frames per item.
+        """
+        window_size, window_shift, padded_window_size = 400, 160, 512
+        if waveforms.shape[1] < window_size:
+            waveforms = F.pad(waveforms, (0, window_size - waveforms.shape[1]))
+        feat_lengths = torch.where(lengths < window_size, 0, 1 + (lengths - window_size) // window_shift)
+
+        frames = waveforms.unfold(1, window_size, window_shift)  # B,T,W
+        frames = frames - frames.mean(dim=-1, keepdim=True)
+        frames = frames - 0.97 * F.pad(frames, (1, 0), mode="replicate")[..., :-1]
+        frames = frames * torch.hann_window(window_size, periodic=False, dtype=frames.dtype).pow(0.85)
+        frames = F.pad(frames, (0, padded_window_size - window_size))
+        spectrum = torch.fft.rfft(frames).abs().pow(2.0)
+
+        mel_banks, _ = kaldi.get_mel_banks(80, padded_window_size, 16000.0, 20.0, 0.0, 100.0, -500.0, 1.0)
+        mel_banks = F.pad(mel_banks.to(spectrum.dtype), (0, 1))
+        feats = torch.matmul(spectrum, mel_banks.T)
+        feats = torch.max(feats, torch.tensor(torch.finfo(feats.dtype).eps, dtype=feats.dtype)).log()
+
+        mask = (torch.arange(feats.shape[1])[None, :] < feat_lengths[:, None]).unsqueeze(-1).to(feats.dtype)
+        mean = (feats * mask).sum(dim=1, keepdim=True) / feat_lengths.clamp(min=1)[:, None, None].to(feats.dtype)
+        return (feats - mean) * mask, feat_lengths
+
+    def embed(self, feats: Tensor, feat_lengths: Tensor) -> Tensor:
+        """
+        L2-normalized CAM++ embeddings of the valid frames of every item.
+
+        Items are grouped by frame count and each group runs in calls of at most `max_batch_size` items.
+
+        Returns:
+            Tensor: embeddings of shape `(batch, embedding_dim)`.
+        """
+        groups = {}
+        for i, num_frames in enumerate(feat_lengths.tolist()):
+            groups.setdefault(num_frames, []).append(i)
+        calls = [
+            (num_frames, ids[start:start + self.max_batch_size])
+            for num_frames, ids in groups.items()
+            for start in range(0, len(ids), self.max_batch_size)
+        ]
+
+        def run(call):
+            num_frames, ids = call
+            inputs = feats[ids, :num_frames].contiguous().numpy()
+            return self.ort_session.run(None, {self.input_name: inputs})[0].reshape(len(ids), -1)
+
+        if self.num_workers > 1 and len(calls) > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="xvector")
+            outputs = list(self._executor.map(run, calls))
+        else:
+            outputs = [run(call) for call in calls]
+
+        embeddings = [None] * len(feat_lengths)
+        for (_, ids), output in zip(calls, outputs):
+            for i, embedding in zip(ids, output):
+                embeddings[i] = torch.from_numpy(embedding)
+        return F.normalize(torch.stack(embeddings, dim=0), dim=-1)
+
+    def close(self) -> None:
+        """
+        Shut down the worker threads started by `embed`, if any.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def sox_norm(self, audio):
+        return peak_normalize(audio, db_level=-6)
 
 class WhisperEncoderVQ(WhisperEncoder):
     def __init__(
@@ -281,25 +442,13 @@ class WhisperEncoderVQ(WhisperEncoder):
             the mel spectrogram of the audio
         """
 
-        aftercnn_x_list = []
-        pe_for_vq_list = []
-        for each_x in x_list:
-            each_x_split_list = each_x.split(self.n_window * 2, dim=1)
-            for each_x_split in each_x_split_list:
-                each_x_split = F.gelu(self.conv1(each_x_split))
-                each_x_split = F.gelu(self.conv2(each_x_split))
-                each_x_split = each_x_split.permute(1, 0) # L,D
-
-                each_positional_embedding_split = self.positional_embedding[:each_x_split.shape[0]]
-                aftercnn_x_list.append(each_x_split+each_positional_embedding_split.to(each_x_split.dtype))
-
-                pe_for_vq_split = self.positional_embedding[:each_x_split.shape[0] // self.audio_vq_ds_rate]
-                pe_for_vq_list.append(pe_for_vq_split.to(each_x_split.dtype))
-
-        pe_for_vq = torch.cat(pe_for_vq_list, dim=0)
-        x = torch.cat(aftercnn_x_list, dim=0)
+        x, split_lens = self._conv_front_end(x_list)
         src_len = x.size(0)
 
+        vq_lens = torch.tensor(split_lens) // self.audio_vq_ds_rate
+        vq_positions = torch.arange(int(vq_lens.sum())) - torch.repeat_interleave(torch.cumsum(vq_lens, dim=0) - vq_lens, vq_lens)
+        pe_for_vq = self.positional_embedding[vq_positions.to(x.device)].to(x.dtype)
+
         output_list = []
         for item in audio_aftercnnlens:
             while item > self.n_window:
@@ -307,15 +456,15 @@ class WhisperEncoderVQ(WhisperEncoder):
                 item -= self.n_window
             output_list.append(item)
 
-        cu_seqlens = list(accumulate(output_list, func=operator.add,initial=0))
-        cu_seqlens = torch.Tensor(cu_seqlens).to(device=x.device, dtype=torch.int32)
+        varlen_layout = VarlenAttentionLayout(output_list, device=x.device)
+        cu_seqlens = varlen_layout.cu_seqlens
 
         layer_id = 0
 
         for block in self.blocks:
             layer_id+=1
 
-            x = block(x, cu_seqlens=cu_seqlens)
+            x = block(x, cu_seqlens=cu_seqlens, varlen_layout=varlen_layout)
             
             if self.audio_vq_layers == layer_id: # vq inside encoder
                 x, indices, vq_stats = self._do_quantize(x, pe_for_vq)
@@ -323,14 +472,7 @@ class WhisperEncoderVQ(WhisperEncoder):
                     return x, indices
 
         if self.avg_pooler:
-            x_list = x.split(audio_aftercnnlens, dim=0)
-            token_x_list = []
-            for x in x_list:
-                x = x.permute(1, 0)
-                x = self.avg_pooler(x)
-                x = x.permute(1, 0)
-                token_x_list.append(x)
-            x = torch.cat(token_x_list, dim=0)
+            x = self._avg_pool_items(x, audio_aftercnnlens)
 
         x = self.ln_post(x)
 
@@ -158,6 +158,38 @@ class Linear(nn.Linear):
         return F.linear(x, self.weight.to(x.dtype), None if self.bias is None else self.bias.to(x.dtype) )
 
 
+class VarlenAttentionLayout:
+    """
+    Layout of a packed batch of variable-length sequences, built once per encoder forward from the host-side
+    lengths and shared by every attention layer.
+
+    Besides `cu_seqlens` / `max_seqlen` for flash-attn, it holds the position of every packed row in a padded
+    `(num_seqs, max_seqlen)` layout and the matching key padding mask, so the SDPA fallback scatters into and
+    gathers out of the padded layout with single index ops, without host syncs or Python loops per layer.
+    """
+
+    def __init__(self, seqlens: List[int], device=None):
+        self.seqlens = list(seqlens)
+        self.num_seqs = len(self.seqlens)
+        self.max_seqlen = max(self.seqlens)
+        # everything is computed on the host and moved once, reading back from the device would sync per forward
+        cu_seqlens = torch.tensor(list(accumulate(self.seqlens, func=operator.add, initial=0)))
+        self.cu_seqlens = cu_seqlens.to(device=device, dtype=torch.int32)
+
+        lengths = torch.tensor(self.seqlens)
+        seq_ids = torch.repeat_interleave(torch.arange(self.num_seqs), lengths)
+        positions = torch.arange(len(seq_ids)) - cu_seqlens[:-1][seq_ids]
+        self.pad_index = (seq_ids * self.max_seqlen + positions).to(device)
+        self.attention_mask = (torch.arange(self.max_seqlen)[None, :] < lengths[:, None]).view(
+            self.num_seqs, 1, 1, self.max_seqlen
+        ).to(device)
+
+    @classmethod
+    def from_cu_seqlens(cls, cu_seqlens: Tensor) -> "VarlenAttentionLayout":
+        cu_seqlens = cu_seqlens.tolist()
+        return cls([end - start for start, end in zip(cu_seqlens[:-1], cu_seqlens[1:])], device=None)
+
+
 class MultiHeadAttention(nn.Module):
     def __init__(self, n_state: int, n_head: int):
         super().__init__()
@@ -173,6 +205,7 @@ class MultiHeadAttention(nn.Module):
         self,
         x: Tensor,
         cu_seqlens = None,
+        varlen_layout: Optional[VarlenAttentionLayout] = None,
     ):
         q = self.query(x)
         k = self.key(x)
@@ -180,21 +213,21 @@ class MultiHeadAttention(nn.Module):
         
         if self.use_flash_attention:
             if flash_attn_varlen_func is None:
-                x = self.qkv_attention_manual(q, k, v, cu_seqlens=cu_seqlens)
+                x = self.qkv_attention_manual(q, k, v, cu_seqlens=cu_seqlens, varlen_layout=varlen_layout)
             else:
                 if q.dtype not in [torch.float16, torch.bfloat16]:
-                    x = self.qkv_attention_manual(q, k, v, cu_seqlens=cu_seqlens)
+                    x = self.qkv_attention_manual(q, k, v, cu_seqlens=cu_seqlens, varlen_layout=varlen_layout)
                     self.use_flash_attention = False
                 else:
-                    x = self.qkv_flash_attention(q, k, v, cu_seqlens=cu_seqlens)
+                    x = self.qkv_flash_attention(q, k, v, cu_seqlens=cu_seqlens, varlen_layout=varlen_layout)
         else:
-            x = self.qkv_attention_manual(q, k, v, cu_seqlens=cu_seqlens)
+            x = self.qkv_attention_manual(q, k, v, cu_seqlens=cu_seqlens, varlen_layout=varlen_layout)
 
         output = self.out(x)
         return output
 
     def qkv_flash_attention(
-        self, q: Tensor, k: Tensor, v: Tensor, cu_seqlens=None
+        self, q: Tensor, k: Tensor, v: Tensor, cu_seqlens=None, varlen_layout: Optional[VarlenAttentionLayout] = None
     ):
         n_ctx, n_state = q.shape
         # scale = (n_state // self.n_head) ** -0.25
@@ -202,7 +235,10 @@ class MultiHeadAttention(nn.Module):
         k = k.view(n_ctx, self.n_head, -1)
         v = v.view(n_ctx, self.n_head, -1)
 
-        max_seqlen = (cu_seqlens[1:] - cu_seqlens[:-1]).max().item()
+        if varlen_layout is not None:
+            max_seqlen = varlen_layout.max_seqlen
+        else:
+            max_seqlen = (cu_seqlens[1:] - cu_seqlens[:-1]).max().item()
 
 
         x = flash_attn_varlen_func(
@@ -212,54 +248,27 @@ class MultiHeadAttention(nn.Module):
         return x
 
     def qkv_attention_manual(
-        self, q: Tensor, k: Tensor, v: Tensor, cu_seqlens: Tensor
+        self, q: Tensor, k: Tensor, v: Tensor, cu_seqlens: Tensor, varlen_layout: Optional[VarlenAttentionLayout] = None
     ):
         n_ctx, n_state = q.shape
         head_dim = n_state // self.n_head
-        scale = head_dim ** -0.5
-
-        q = q.view(n_ctx, self.n_head, head_dim)
-        k = k.view(n_ctx, self.n_head, head_dim)
-        v = v.view(n_ctx, self.n_head, head_dim)
-
-        seqlens = (cu_seqlens[1:] - cu_seqlens[:-1]).tolist()
-        batch_size = len(seqlens)
-        max_seqlen = max(seqlens)
-
-        q_padded = torch.zeros(batch_size, max_seqlen, self.n_head, head_dim, dtype=q.dtype, device=q.device)
-        k_padded = torch.zeros_like(q_padded)
-        v_padded = torch.zeros_like(q_padded)
-
-        for i in range(batch_size):
-            start_idx = cu_seqlens[i]
-            end_idx = cu_seqlens[i+1]
-            seq_len = seqlens[i]
-            q_padded[i, :seq_len] = q[start_idx:end_idx]
-            k_padded[i, :seq_len] = k[start_idx:end_idx]
-            v_padded[i, :seq_len] = v[start_idx:end_idx]
-        
-        q_padded = q_padded.transpose(1, 2)
-        k_padded = k_padded.transpose(1, 2)
-        v_padded = v_padded.transpose(1, 2)
-
-        attn_mask = torch.arange(max_seqlen, device=q.device)[None, :] < torch.tensor(seqlens, device=q.device)[:, None]
-        attn_mask = attn_mask.unsqueeze(1).unsqueeze(2)
-
-        attn_mask = attn_mask.masked_fill(attn_mask == 0, -torch.finfo(q.dtype).max)
 
-        attn_scores = torch.matmul(q_padded, k_padded.transpose(-2, -1)) * scale
-        attn_scores = attn_scores + attn_mask
-        attn_weights = F.softmax(attn_scores, dim=-1)
+        if varlen_layout is None:
+            varlen_layout = VarlenAttentionLayout.from_cu_seqlens(cu_seqlens)
+        batch_size, max_seqlen = varlen_layout.num_seqs, varlen_layout.max_seqlen
+        pad_index = varlen_layout.pad_index.to(q.device)
 
-        context = torch.matmul(attn_weights, v_padded)
-        
-        context = context.transpose(1, 2).contiguous().view(batch_size, max_seqlen, n_state)
+        def to_padded(t):
+            padded = t.new_zeros(batch_size * max_seqlen, n_state)
+            padded.index_copy_(0, pad_index, t)
+            return padded.view(batch_size, max_seqlen, self.n_head, head_dim).transpose(1, 2)
 
-        output_packed = torch.cat([context[i, :seqlens[i]] for i in range(batch_size)], dim=0)
+        context = F.scaled_dot_product_attention(
+            to_padded(q), to_padded(k), to_padded(v), attn_mask=varlen_layout.attention_mask.to(q.device)
+        )
+        context = context.transpose(1, 2).reshape(batch_size * max_seqlen, n_state)
 
-        assert output_packed.shape == (n_ctx, n_state)
-        
-        return output_packed
+        return context.index_select(0, pad_index)
 
 
 class ResidualAttentionBlock(nn.Module):
@@ -278,9 +287,10 @@ class ResidualAttentionBlock(nn.Module):
     def forward(
         self,
         x: Tensor,
-        cu_seqlens = None
+        cu_seqlens = None,
+        varlen_layout: Optional[VarlenAttentionLayout] = None,
     ):
-        x = x + self.attn(self.attn_ln(x), cu_seqlens=cu_seqlens)
+        x = x + self.attn(self.attn_ln(x), cu_seqlens=cu_seqlens, varlen_layout=varlen_layout)
         x = x + self.mlp(self.mlp_ln(x))
         return x
 
@@ -335,23 +345,67 @@ class WhisperEncoder(nn.Module):
             if not name.startswith("blocks"):
                 setattr(param, "audio_sync", True)
 
+    def _conv_front_end(self, x_list: List[Tensor]):
+        """
+        Run conv1 / conv2 over every `n_window * 2` mel split and add the positional embeddings.
+
+        Splits of equal length are stacked and go through the convs as one batch, so the number of conv calls
+        follows the number of distinct split lengths (usually two) instead of the number of splits. No padding is
+        involved, so the result is the same as convolving each split on its own. The outputs are packed back in
+        split order with one `index_copy_` per group.
+
+        Returns:
+            Tuple[Tensor, List[int]]: packed features of shape `(sum(split_lens), n_state)` and the per-split lengths.
+        """
+        splits = [each_x_split for each_x in x_list for each_x_split in each_x.split(self.n_window * 2, dim=1)]
+
+        groups = {}
+        for i, each_x_split in enumerate(splits):
+            groups.setdefault(each_x_split.shape[1], []).append(i)
+
+        split_lens = [0] * len(splits)
+        group_outputs = []
+        for ids in groups.values():
+            each_x = torch.stack([splits[i] for i in ids], dim=0)
+            each_x = F.gelu(self.conv1(each_x))
+            each_x = F.gelu(self.conv2(each_x))
+            each_x = each_x.transpose(1, 2) # G,L,D
+            each_x = each_x + self.positional_embedding[:each_x.shape[1]].to(each_x.dtype)
+            for i in ids:
+                split_lens[i] = each_x.shape[1]
+            group_outputs.append((ids, each_x))
+
+        split_starts = list(accumulate(split_lens, func=operator.add, initial=0))
+        x = group_outputs[0][1].new_empty(split_starts[-1], group_outputs[0][1].shape[-1])
+        for ids, each_x in group_outputs:
+            starts = torch.tensor([split_starts[i] for i in ids])
+            rows = (starts[:, None] + torch.arange(each_x.shape[1])[None, :]).flatten()
+            x.index_copy_(0, rows.to(x.device), each_x.flatten(0, 1))
+        return x, split_lens
+
+    def _avg_pool_items(self, x: Tensor, lengths: List[int]) -> Tensor:
+        """
+        Apply `avg_pooler` to every item of the packed `x` (split by `lengths`) in a single call.
+
+        Each item drops its last frame when its length is odd, exactly as pooling the items one by one.
+        """
+        lengths_t = torch.tensor(lengths)
+        pooled_lens = lengths_t // 2
+        item_starts = torch.cumsum(lengths_t, dim=0) - lengths_t
+        pooled_starts = torch.cumsum(pooled_lens, dim=0) - pooled_lens
+        item_ids = torch.repeat_interleave(torch.arange(len(lengths)), pooled_lens)
+        positions = torch.arange(len(item_ids)) - pooled_starts[item_ids]
+        first = (item_starts[item_ids] + 2 * positions).to(x.device)
+        pairs = torch.stack([x.index_select(0, first), x.index_select(0, first + 1)], dim=-1) # T,D,2
+        return self.avg_pooler(pairs).squeeze(-1)
+
     def forward(self, x_list: List[Tensor], audio_mellens:List[int], audio_aftercnnlens:List[int], audio_seqlens:List[int]):
         """
         x : torch.Tensor, shape = (n_mels, n_ctx)
             the mel spectrogram of the audio
         """
 
-        aftercnn_x_list = []
-        for each_x in x_list:
-            each_x_split_list = each_x.split(self.n_window * 2, dim=1)
-            for each_x_split in each_x_split_list:
-                each_x_split = F.gelu(self.conv1(each_x_split))
-                each_x_split = F.gelu(self.conv2(each_x_split))
-                each_x_split = each_x_split.permute(1, 0) # L,D
-                each_positional_embedding_split = self.positional_embedding[:each_x_split.shape[0]]
-                aftercnn_x_list.append(each_x_split+each_positional_embedding_split.to(each_x_split.dtype))
-
-        x = torch.cat(aftercnn_x_list, dim=0)
+        x, _ = self._conv_front_end(x_list)
         src_len = x.size(0)
 
         output_list = []
@@ -361,23 +415,16 @@ class WhisperEncoder(nn.Module):
                 item -= self.n_window
             output_list.append(item)
 
-        cu_seqlens = list(accumulate(output_list, func=operator.add,initial=0))
-        cu_seqlens = torch.Tensor(cu_seqlens).to(device=x.device, dtype=torch.int32)
+        varlen_layout = VarlenAttentionLayout(output_list, device=x.device)
+        cu_seqlens = varlen_layout.cu_seqlens
 
         layer_id = 0
         for block in self.blocks:
             layer_id+=1
-            x = block(x, cu_seqlens=cu_seqlens)
+            x = block(x, cu_seqlens=cu_seqlens, varlen_layout=varlen_layout)
 
         if self.avg_pooler:
-            x_list = x.split(audio_aftercnnlens, dim=0)
-            token_x_list = []
-            for x in x_list:
-                x = x.permute(1, 0)
-                x = self.avg_pooler(x)
-                x = x.permute(1, 0)
-                token_x_list.append(x)
-            x = torch.cat(token_x_list, dim=0)
+            x = self._avg_pool_items(x, audio_aftercnnlens)
 
         x = self.ln_post(x)
         x = self.proj(x)
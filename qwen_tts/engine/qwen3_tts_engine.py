@@ -0,0 +1,461 @@
+# coding=utf-8
+# Copyright 2026 The Alibaba Qwen team.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Iterator, List, Optional
+
+import numpy as np
+import torch
+from torch.nn import functional as F
+
+from ..core.models.block_kv_cache import KVCacheUsage, BlockKVCache
+from ..core.models.modeling_qwen3_tts import Qwen3TTSResidualCodesCache, sample_next_token
+from ..inference.qwen3_tts_model import Qwen3TTSModel
+
+
+@dataclass
+class TTSRequestOutput:
+    """
+    Result of one finished engine request.
+    """
+    request_id: str
+    wav: np.ndarray                                  # (num_samples,) float32
+    sample_rate: int
+    audio_codes: torch.Tensor                        # (T, num_code_groups) generated codec codes
+
+
+@dataclass
+class _Sequence:
+    request_id: str
+    talker_input_embeds: torch.Tensor                # (1, L, H)
+    attention_mask: torch.Tensor                     # (1, L)
+    trailing_text_hidden: torch.Tensor               # (1, T, H)
+    tts_pad_embed: torch.Tensor                      # (1, 1, H)
+    max_new_tokens: int
+    prefix_len: int = 0                              # leading prompt positions that do not depend on the text
+    prefix_key: Optional[str] = None                 # their prefix cache key, None while the cache is disabled
+    ref_code: Optional[torch.Tensor] = None
+    frames: List[torch.Tensor] = field(default_factory=list)
+    num_sampled: int = 0
+
+
+class Qwen3TTSEngine:
+    """
+    Continuous-batching scheduler on top of a `Qwen3TTSModel`.
+
+    Instead of left-padding a fixed batch and running it until its longest member finishes, the engine keeps a pool
+    of running sequences that all advance by one codec frame per `step()`:
+      - waiting requests join the pool as soon as a slot is free (at most `max_batch_size`); those admitted in the
+        same `step()` are prefilled together in one forward pass
+      - a sequence retires as soon as it samples the codec EOS (or reaches its `max_new_tokens`); its codes are
+        decoded by the speech tokenizer and returned from that `step()`
+      - every running sequence owns its own `generation_step`, `trailing_text_hidden` and rope position, so
+        sequences of any length can be mixed
+      - the talker KV cache is a `BlockKVCache`: it grows by blocks with the frames actually generated, up to
+        `max_num_kv_blocks`, and drops the rows and leading padding of retired sequences
+      - with `model.enable_prefix_cache()`, the voice prefix of a prompt is prefilled once and the keys/values of
+        every later request with the same voice are copied from `model.talker_prefix_cache`
+
+    Typical use:
+
+        engine = Qwen3TTSEngine(tts, max_batch_size=16)
+        engine.add_request(text="...", language="English", voice_clone_prompt=prompt_items)
+        while engine.has_unfinished_requests():
+            for out in engine.step():
+                sf.write(f"{out.request_id}.wav", out.wav, out.sample_rate)
+
+    `add_request` takes the same arguments as the `generate_*` method of the loaded model type, for a single text.
+    Sampling parameters are shared by all requests and fixed at construction; they follow the same defaults and
+    logits pipeline as `generate_*`.
+    """
+
+    def __init__(
+        self,
+        model: Qwen3TTSModel,
+        max_batch_size: int = 16,
+        block_size: int = 16,
+        max_num_kv_blocks: int = 4096,
+        **kwargs,
+    ):
+        """
+        Args:
+            model (Qwen3TTSModel):
+                Loaded wrapper of a 12Hz-tokenizer based model.
+            max_batch_size (int, default=16):
+                Maximum number of sequences decoded together.
+            block_size (int, default=16):
+                Tokens by which the talker KV cache grows.
+            max_num_kv_blocks (int, default=4096):
+                Cap on the talker KV cache, in blocks of one layer counting the padding of every row. A waiting
+                request is only admitted while all running requests and itself can reach their `max_new_tokens`
+                within the cap, so running requests never run out of blocks.
+            **kwargs:
+                Generation parameters (do_sample, top_k, top_p, temperature, repetition_penalty, subtalker_dosample,
+                subtalker_top_k, subtalker_top_p, subtalker_temperature, max_new_tokens), merged with the model's
+                `generate_config.json` the same way as `generate_*`.
+        """
+        self.tts = model
+        self.model = model.model
+        self.talker = self.model.talker
+        self.max_batch_size = max_batch_size
+
+        gen_kwargs = model._merge_generate_kwargs(**kwargs)
+        self.max_new_tokens = gen_kwargs["max_new_tokens"]
+        self.do_sample = gen_kwargs["do_sample"]
+        self.top_k = gen_kwargs["top_k"]
+        self.top_p = gen_kwargs["top_p"]
+        self.temperature = gen_kwargs["temperature"]
+        self.repetition_penalty = gen_kwargs["repetition_penalty"]
+        self.subtalker_kwargs = dict(
+            subtalker_dosample=gen_kwargs["subtalker_dosample"],
+            subtalker_top_k=gen_kwargs["subtalker_top_k"],
+            subtalker_top_p=gen_kwargs["subtalker_top_p"],
+            subtalker_temperature=gen_kwargs["subtalker_temperature"],
+            # the code predictor caches of this engine, one per running batch size
+            residual_codes_cache=Qwen3TTSResidualCodesCache(self.talker.code_predictor.config),
+        )
+
+        talker_config = self.model.config.talker_config
+        self.eos_token_id = talker_config.codec_eos_token_id
+        self.num_code_groups = talker_config.num_code_groups
+        self.suppress_mask = torch.zeros(talker_config.vocab_size, dtype=torch.bool, device=self.model.device)
+        self.suppress_mask[talker_config.vocab_size - 1024 :] = True
+        self.suppress_mask[self.eos_token_id] = False
+
+        self.block_size = block_size
+        self.max_num_kv_blocks = max_num_kv_blocks
+        self.kv_cache = self._new_kv_cache()
+
+        self._request_counter = itertools.count()
+        self.waiting: Deque[_Sequence] = deque()
+        self.running: List[_Sequence] = []
+        self._reset_batch_state()
+
+    def _reset_batch_state(self) -> None:
+        # batched state of `self.running`, row i belongs to self.running[i]
+        self.attention_mask: Optional[torch.Tensor] = None        # (B, kv_length) real columns of self.kv_cache
+        self.logits: Optional[torch.Tensor] = None                # (B, V) logits of the next first-codebook token
+        self.past_hidden: Optional[torch.Tensor] = None           # (B, 1, H)
+        self.generation_step: Optional[torch.Tensor] = None       # (B,)
+        self.rope_positions: Optional[torch.Tensor] = None        # (B,) rope position of the next talker input
+        self.seen_tokens: Optional[torch.Tensor] = None           # (B, V) tokens sampled so far, for repetition penalty
+        self.trailing_text_hidden: Optional[torch.Tensor] = None  # (B, T_max + 1, H), padded with tts_pad_embed
+
+    def add_request(
+        self,
+        text: str,
+        request_id: Optional[str] = None,
+        non_streaming_mode: Optional[bool] = None,
+        max_new_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> str:
+        """
+        Queue a request. It is prefilled and joins the running batch in the next `step()` with a free slot.
+
+        Args:
+            text (str):
+                Text to synthesize.
+            request_id (Optional[str]):
+                Identifier returned with the output. Generated when not given.
+            non_streaming_mode (Optional[bool]):
+                Same as in `generate_*`; defaults to that method's default for the loaded model type.
+            max_new_tokens (Optional[int]):
+                Per-request override of the engine's `max_new_tokens`.
+            **kwargs:
+                Voice arguments of the matching `generate_*` method, e.g. `language` + `voice_clone_prompt` for Base,
+                `language` + `instruct` for VoiceDesign, `language` + `speaker` (+ `instruct`) for CustomVoice.
+
+        Returns:
+            str: the request id.
+        """
+        self.tts._ensure_single_text(text, "Qwen3TTSEngine.add_request")
+        tts_model_type = self.model.tts_model_type
+        if tts_model_type == "base":
+            model_inputs = self.tts._prepare_voice_clone_inputs(text=text, **kwargs)
+            non_streaming_mode = False if non_streaming_mode is None else non_streaming_mode
+        elif tts_model_type == "voice_design":
+            model_inputs = self.tts._prepare_voice_design_inputs(text=text, **kwargs)
+            non_streaming_mode = True if non_streaming_mode is None else non_streaming_mode
+        else:
+            model_inputs = self.tts._prepare_custom_voice_inputs(text=text, **kwargs)
+            non_streaming_mode = True if non_streaming_mode is None else non_streaming_mode
+
+        ref_code = None
+        if model_inputs.get("voice_clone_prompt") is not None:
+            ref_code_list = model_inputs["voice_clone_prompt"].get("ref_code", None)
+            ref_code = ref_code_list[0] if ref_code_list is not None else None
+
+        talker_input_embeds, attention_mask, trailing_text_hidden, tts_pad_embed, prefix_lens, prefix_keys = (
+            self.model._build_talker_inputs(
+                non_streaming_mode=non_streaming_mode,
+                return_prefix_lens=True,
+                **model_inputs,
+            )
+        )
+
+        max_new_tokens = max_new_tokens if max_new_tokens is not None else self.max_new_tokens
+        if not self.kv_cache.can_allocate(1, talker_input_embeds.shape[1] + max_new_tokens):
+            raise ValueError(
+                f"A prompt of {talker_input_embeds.shape[1]} positions plus {max_new_tokens} new tokens does not fit "
+                f"in `max_num_kv_blocks`={self.max_num_kv_blocks} blocks of {self.block_size} tokens."
+            )
+        request_id = request_id if request_id is not None else str(next(self._request_counter))
+        self.waiting.append(
+            _Sequence(
+                request_id=request_id,
+                talker_input_embeds=talker_input_embeds,
+                attention_mask=attention_mask,
+                trailing_text_hidden=trailing_text_hidden,
+                tts_pad_embed=tts_pad_embed,
+                max_new_tokens=max_new_tokens,
+                prefix_len=prefix_lens[0],
+                prefix_key=prefix_keys[0],
+                ref_code=ref_code,
+            )
+        )
+        return request_id
+
+    def abort_request(self, request_id: str) -> bool:
+        """
+        Drop a waiting or running request without producing an output.
+
+        Returns:
+            bool: whether the request was found.
+        """
+        for seq in self.waiting:
+            if seq.request_id == request_id:
+                self.waiting.remove(seq)
+                return True
+        for i, seq in enumerate(self.running):
+            if seq.request_id == request_id:
+                keep = [j for j in range(len(self.running)) if j != i]
+                self._select_rows(keep)
+                return True
+        return False
+
+    def has_unfinished_requests(self) -> bool:
+        return bool(self.waiting) or bool(self.running)
+
+    def num_running_requests(self) -> int:
+        return len(self.running)
+
+    def num_waiting_requests(self) -> int:
+        return len(self.waiting)
+
+    def kv_cache_usage(self) -> KVCacheUsage:
+        """
+        Occupancy of the talker KV cache (blocks allocated, blocks the cached tokens fill, cached tokens).
+        """
+        return self.kv_cache.usage(self.attention_mask)
+
+    @torch.no_grad()
+    def step(self) -> List[TTSRequestOutput]:
+        """
+        Admit waiting requests, advance every running sequence by one codec frame and retire the finished ones.
+
+        Returns:
+            List[TTSRequestOutput]: requests that finished in this step, in no particular order.
+        """
+        admitted: List[_Sequence] = []
+        while self.waiting and len(self.running) + len(admitted) < self.max_batch_size:
+            # running sequences are never preempted, so a request only joins when every row, itself included, can
+            # reach its `max_new_tokens`: all rows share the cache length, which grows by one per step
+            rows = self.running + admitted + [self.waiting[0]]
+            kv_length = max(self._kv_length(), self._prefill_length(admitted + [self.waiting[0]]))
+            max_steps = max(seq.max_new_tokens - seq.num_sampled for seq in rows)
+            if len(rows) > 1 and not self.kv_cache.can_allocate(len(rows), kv_length + max_steps):
+                break
+            admitted.append(self.waiting.popleft())
+        if admitted:
+            self._prefill(admitted)
+        if not self.running:
+            return []
+
+        next_ids = self._sample_next_ids()
+        self.seen_tokens.scatter_(1, next_ids[:, None], True)
+        finished_rows, keep_rows = [], []
+        for i, seq in enumerate(self.running):
+            seq.num_sampled += 1
+            if int(next_ids[i]) == self.eos_token_id or seq.num_sampled >= seq.max_new_tokens:
+                finished_rows.append(i)
+            else:
+                keep_rows.append(i)
+
+        finished = [self.running[i] for i in finished_rows]
+        if finished_rows:
+            next_ids = next_ids[keep_rows]
+            self._select_rows(keep_rows)
+
+        if self.running:
+            self._decode(next_ids)
+
+        return self._finish(finished)
+
+    def run(self) -> Iterator[TTSRequestOutput]:
+        """
+        Step until all queued requests are done, yielding outputs as they finish.
+        """
+        while self.has_unfinished_requests():
+            yield from self.step()
+
+    def _new_kv_cache(self) -> BlockKVCache:
+        return BlockKVCache.from_config(
+            self.model.config.talker_config, block_size=self.block_size, max_num_blocks=self.max_num_kv_blocks
+        )
+
+    def _kv_length(self) -> int:
+        return self.attention_mask.shape[1] if self.running else 0
+
+    def _prefill_length(self, seqs: List[_Sequence]) -> int:
+        # width of the batch `_prefill` builds, see `_prepare_talker_prefill`
+        prompt_lens = [seq.talker_input_embeds.shape[1] for seq in seqs]
+        prefix_lens = [seq.prefix_len for seq in seqs]
+        if self.model.talker_prefix_cache is None or max(prefix_lens) == 0:
+            return max(prompt_lens)
+        return max(prefix_lens) + max(length - prefix for length, prefix in zip(prompt_lens, prefix_lens))
+
+    def _prefill(self, seqs: List[_Sequence]) -> None:
+        # the admitted prompts are prefilled together as a left-padded batch, like in `generate`
+        max_len = max(seq.talker_input_embeds.shape[1] for seq in seqs)
+        talker_input_embeds = torch.cat(
+            [F.pad(seq.talker_input_embeds, (0, 0, max_len - seq.talker_input_embeds.shape[1], 0)) for seq in seqs]
+        )
+        attention_mask = torch.cat(
+            [F.pad(seq.attention_mask, (max_len - seq.attention_mask.shape[1], 0)) for seq in seqs]
+        )
+        talker_input_embeds, attention_mask, prefix_kv, prefix_len = self.model._prepare_talker_prefill(
+            talker_input_embeds, attention_mask, [seq.prefix_len for seq in seqs], [seq.prefix_key for seq in seqs]
+        )
+        device = talker_input_embeds.device
+        past_key_values = self._new_kv_cache()
+        self.model._write_prefix_kv(past_key_values, prefix_kv)
+        outputs = self.talker(
+            inputs_embeds=talker_input_embeds[:, prefix_len:],
+            attention_mask=attention_mask,
+            past_key_values=past_key_values,
+            use_cache=True,
+            cache_position=torch.arange(prefix_len, talker_input_embeds.shape[1], device=device),
+            **self.subtalker_kwargs,
+        )
+
+        row_state = dict(
+            logits=outputs.logits[:, -1, :],
+            past_hidden=outputs.past_hidden,
+            generation_step=torch.zeros(len(seqs), dtype=torch.long, device=device),
+            rope_positions=attention_mask.sum(dim=-1).long(),
+            seen_tokens=torch.zeros_like(outputs.logits[:, -1, :], dtype=torch.bool),
+        )
+        if not self.running:
+            self.kv_cache = past_key_values
+            self.attention_mask = attention_mask
+            for name, value in row_state.items():
+                setattr(self, name, value)
+        else:
+            # the new rows join right-aligned: whichever side is shorter is left-padded
+            self.kv_cache.append_rows(past_key_values)
+            kv_length = max(self.attention_mask.shape[1], attention_mask.shape[1])
+            self.attention_mask = torch.cat(
+                [F.pad(mask, (kv_length - mask.shape[1], 0)) for mask in (self.attention_mask, attention_mask)]
+            )
+            for name, value in row_state.items():
+                setattr(self, name, torch.cat([getattr(self, name), value]))
+
+        self.running.extend(seqs)
+        self._update_trailing_text_hidden()
+
+    def _select_rows(self, rows: List[int]) -> None:
+        self.running = [self.running[i] for i in rows]
+        if not self.running:
+            self.kv_cache = self._new_kv_cache()
+            self._reset_batch_state()
+            return
+
+        index = torch.tensor(rows, dtype=torch.long, device=self.logits.device)
+        # leading columns that only retired rows attended to are cut off
+        attention_mask = self.attention_mask.index_select(0, index)
+        start = int(attention_mask.any(dim=0).long().argmax())
+        self.kv_cache.batch_select_indices(index, start)
+        self.attention_mask = attention_mask[:, start:]
+        for name in ("logits", "past_hidden", "generation_step", "rope_positions", "seen_tokens"):
+            setattr(self, name, getattr(self, name).index_select(0, index))
+        self._update_trailing_text_hidden()
+
+    def _update_trailing_text_hidden(self) -> None:
+        # one extra tts_pad position at the end serves every step past the end of the text
+        max_len = max(seq.trailing_text_hidden.shape[1] for seq in self.running) + 1
+        self.trailing_text_hidden = torch.cat(
+            [
+                torch.cat(
+                    [
+                        seq.trailing_text_hidden,
+                        seq.tts_pad_embed.expand(1, max_len - seq.trailing_text_hidden.shape[1], -1),
+                    ],
+                    dim=1,
+                )
+                for seq in self.running
+            ]
+        )
+
+    def _sample_next_ids(self) -> torch.Tensor:
+        # same pipeline as `generate`: repetition penalty, min_new_tokens=2, suppressed control tokens, sampling
+        scores = self.logits.to(torch.float32)
+        if self.repetition_penalty is not None and self.repetition_penalty != 1.0:
+            penalized = torch.where(scores < 0, scores * self.repetition_penalty, scores / self.repetition_penalty)
+            scores = torch.where(self.seen_tokens, penalized, scores)
+        too_short = torch.tensor([seq.num_sampled < 2 for seq in self.running], device=scores.device)
+        scores[:, self.eos_token_id] = scores[:, self.eos_token_id].masked_fill(too_short, -float("inf"))
+        scores = scores.masked_fill(self.suppress_mask, -float("inf"))
+        return sample_next_token(
+            scores, do_sample=self.do_sample, top_k=self.top_k, top_p=self.top_p, temperature=self.temperature
+        )
+
+    def _decode(self, next_ids: torch.Tensor) -> None:
+        # every row's cache is left-padded, the new frame goes in the last column
+        self.attention_mask = torch.cat(
+            [self.attention_mask, self.attention_mask.new_ones((self.attention_mask.shape[0], 1))], dim=1
+        )
+        cache_position = torch.full((1,), self.attention_mask.shape[1] - 1, dtype=torch.long, device=next_ids.device)
+        self.logits, codec_ids, self.past_hidden = self.talker.decode_step(
+            input_ids=next_ids[:, None],
+            past_hidden=self.past_hidden,
+            generation_step=self.generation_step,
+            cache_position=cache_position,
+            attention_mask=self.attention_mask,
+            rope_deltas=(self.rope_positions - cache_position).unsqueeze(1),
+            trailing_text_hidden=self.trailing_text_hidden,
+            past_key_values=self.kv_cache,
+            **self.subtalker_kwargs,
+        )
+        self.generation_step = self.generation_step + 1
+        self.rope_positions = self.rope_positions + 1
+        for seq, frame in zip(self.running, codec_ids):
+            seq.frames.append(frame)
+
+    def _finish(self, finished: List[_Sequence]) -> List[TTSRequestOutput]:
+        outputs: List[TTSRequestOutput] = []
+        to_decode = [seq for seq in finished if seq.frames]
+        if to_decode:
+            codes_list = [torch.stack(seq.frames) for seq in to_decode]
+            wavs, fs = self.tts._decode_talker_codes(codes_list, [seq.ref_code for seq in to_decode])
+            for seq, codes, wav in zip(to_decode, codes_list, wavs):
+                outputs.append(TTSRequestOutput(seq.request_id, wav, fs, codes))
+        fs = int(self.model.speech_tokenizer.get_output_sample_rate())
+        for seq in finished:
+            if not seq.frames:
+                empty_codes = torch.zeros((0, self.num_code_groups), dtype=torch.long)
+                outputs.append(TTSRequestOutput(seq.request_id, np.zeros(0, dtype=np.float32), fs, empty_codes))
+        return outputs
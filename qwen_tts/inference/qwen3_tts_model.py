@@ -17,7 +17,7 @@ import base64
 import io
 import urllib.request
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
 import librosa
@@ -28,6 +28,9 @@ from transformers import AutoConfig, AutoModel, AutoProcessor
 
 from ..core.models import Qwen3TTSConfig, Qwen3TTSForConditionalGeneration, Qwen3TTSProcessor
 
+if TYPE_CHECKING:
+    from .voice_prompt_store import VoicePromptStore
+
 AudioLike = Union[
     str,                     # wav path, URL, base64
     np.ndarray,              # waveform (requires sr)
@@ -36,13 +39,20 @@ AudioLike = Union[
 
 MaybeList = Union[Any, List[Any]]
 
+# speaking rate assumed by the sub-batch planner when there is no reference to measure it on
+_TEXT_TOKENS_PER_SECOND = 3.0
+# default sub-batch budgets of the `generate_*` methods; batches within both still run as one `model.generate` call
+_DEFAULT_MAX_BATCH_SIZE = 32
+_DEFAULT_MAX_BATCH_TOKENS = 32 * 1024
+
 
 @dataclass
 class VoiceClonePromptItem:
     """
     Container for one sample's voice-clone prompt information that can be fed to the model.
 
-    Fields are aligned with `Qwen3TTSForConditionalGeneration.generate(..., voice_clone_prompt=...)`.
+    Fields are aligned with `Qwen3TTSForConditionalGeneration.generate(..., voice_clone_prompt=...)`. Tensors made
+    by `create_voice_clone_prompt` are on the CPU.
     """
     ref_code: Optional[torch.Tensor]                 # (T, Q) or (T,) depending on tokenizer 25Hz/12Hz
     ref_spk_embedding: torch.Tensor                  # (D,)
@@ -59,6 +69,8 @@ class Qwen3TTSModel:
           * CustomVoice: generate_custom_voice()
           * VoiceDesign: generate_voice_design()
           * Base: generate_voice_clone() + create_voice_clone_prompt()
+      - streaming counterparts stream_custom_voice() / stream_voice_design() / stream_voice_clone()
+        that yield waveform chunks while the talker is still generating
       - consistent output: (wavs: List[np.ndarray], sample_rate: int)
 
     Notes:
@@ -71,6 +83,8 @@ class Qwen3TTSModel:
         self.model = model
         self.processor = processor
         self.generate_defaults = generate_defaults or {}
+        self.draft: Optional["Qwen3TTSModel"] = None
+        self.num_draft_frames = 4
 
         self.device = getattr(model, "device", None)
         if self.device is None:
@@ -120,6 +134,15 @@ class Qwen3TTSModel:
         generate_defaults = model.generate_config
         return cls(model=model, processor=processor, generate_defaults=generate_defaults)
 
+    def _check_model_type(self, expected: str, api_name: str) -> None:
+        if self.model.tts_model_type != expected:
+            raise ValueError(
+                f"model with \ntokenizer_type: {self.model.tokenizer_type}\n"
+                f"tts_model_size: {self.model.tts_model_size}\n"
+                f"tts_model_type: {self.model.tts_model_type}\n"
+                f"does not support {api_name}, Please check Model Card or Readme for more details."
+            )
+
     def _supported_languages_set(self) -> Optional[set]:
         langs = getattr(self.model, "get_supported_languages", None)
         if callable(langs):
@@ -263,6 +286,28 @@ class Qwen3TTSModel:
                 out[i] = (a[0], a[1])
         return out
 
+    def _resample_batch(self, wavs: List[np.ndarray], srs: List[int], target_sr: int) -> List[np.ndarray]:
+        """
+        Resample waveforms to `target_sr` with one `librosa.resample` call per distinct source rate.
+
+        Waveforms of a group are zero-padded into one 2-D array; the result of every row, cut to its own length, is
+        the same as resampling it alone.
+        """
+        out: List[Optional[np.ndarray]] = [None] * len(wavs)
+        for sr in set(srs):
+            group = [i for i, s in enumerate(srs) if s == sr]
+            if sr == target_sr:
+                for i in group:
+                    out[i] = wavs[i].astype(np.float32)
+                continue
+            batch = np.zeros((len(group), max(len(wavs[i]) for i in group)), dtype=np.float32)
+            for row, i in enumerate(group):
+                batch[row, : len(wavs[i])] = wavs[i]
+            resampled = librosa.resample(y=batch, orig_sr=int(sr), target_sr=int(target_sr), axis=-1)
+            for row, i in enumerate(group):
+                out[i] = resampled[row, : int(np.ceil(len(wavs[i]) * target_sr / sr))]
+        return out
+
     def _ensure_list(self, x: MaybeList) -> List[Any]:
         return x if isinstance(x, list) else [x]
 
@@ -279,7 +324,8 @@ class Qwen3TTSModel:
         input_ids = []
         for text in texts:
             input = self.processor(text=text, return_tensors="pt", padding=True)
-            input_id = input["input_ids"].to(self.device)
+            # kept on the host: the model moves them to its device and keys its prefix cache on them without a sync
+            input_id = input["input_ids"]
             input_id = input_id.unsqueeze(0) if input_id.dim() == 1 else input_id
             input_ids.append(input_id)
         return input_ids
@@ -358,6 +404,7 @@ class Qwen3TTSModel:
         ref_audio: Union[AudioLike, List[AudioLike]],
         ref_text: Optional[Union[str, List[Optional[str]]]] = None,
         x_vector_only_mode: Union[bool, List[bool]] = False,
+        prompt_store: Optional["VoicePromptStore"] = None,
     ) -> List[VoiceClonePromptItem]:
         """
         Build voice-clone prompt items from reference audio (and optionally reference text) using Base model.
@@ -383,11 +430,14 @@ class Qwen3TTSModel:
             ref_audio:
                 Reference audio(s) used to extract:
                   - ref_code via `model.speech_tokenizer.encode(...)`
-                  - ref_spk_embedding via `model.extract_speaker_embedding(...)` (resampled to 24k)
+                  - ref_spk_embedding via `model.extract_speaker_embeddings(...)` (resampled to 24k)
             ref_text:
                 Reference transcript(s). Required when x_vector_only_mode=False (ICL mode).
             x_vector_only_mode:
                 Whether to use speaker embedding only. If False, ICL mode will be used.
+            prompt_store:
+                Optional `VoicePromptStore`. References already in the store are returned from it; only the others
+                are encoded, and their prompts are added to the store.
 
         Returns:
             List[VoiceClonePromptItem]:
@@ -398,13 +448,7 @@ class Qwen3TTSModel:
                 - If x_vector_only_mode=False but ref_text is missing.
                 - If batch lengths mismatch.
         """
-        if self.model.tts_model_type != "base":
-            raise ValueError(
-                f"model with \ntokenizer_type: {self.model.tokenizer_type}\n"
-                f"tts_model_size: {self.model.tts_model_size}\n"
-                f"tts_model_type: {self.model.tts_model_type}\n"
-                "does not support create_voice_clone_prompt, Please check Model Card or Readme for more details."
-            )
+        self._check_model_type("base", "create_voice_clone_prompt")
         
         ref_audio_list = self._ensure_list(ref_audio)
         ref_text_list = self._ensure_list(ref_text) if isinstance(ref_text, list) else ([ref_text] * len(ref_audio_list))
@@ -417,44 +461,45 @@ class Qwen3TTSModel:
 
         normalized = self._normalize_audio_inputs(ref_audio_list)
 
-        ref_wavs_for_code: List[np.ndarray] = []
-        ref_sr_for_code: List[int] = []
-        for wav, sr in normalized:
-            ref_wavs_for_code.append(wav)
-            ref_sr_for_code.append(sr)
-
-        if len(set(ref_sr_for_code)) == 1:
-            enc = self.model.speech_tokenizer.encode(ref_wavs_for_code, sr=ref_sr_for_code[0])
-            ref_codes = enc.audio_codes
-        else:
-            ref_codes = []
-            for wav, sr in normalized:
-                ref_codes.append(self.model.speech_tokenizer.encode(wav, sr=sr).audio_codes[0])
-
-        items: List[VoiceClonePromptItem] = []
-        for i, ((wav, sr), code, rtext, xvec_only) in enumerate(zip(normalized, ref_codes, ref_text_list, xvec_list)):
+        for i, (rtext, xvec_only) in enumerate(zip(ref_text_list, xvec_list)):
             if not xvec_only:
                 if rtext is None or rtext == "":
                     raise ValueError(f"ref_text is required when x_vector_only_mode=False (ICL mode). Bad index={i}")
 
-            wav_resample = wav
-            if sr != self.model.speaker_encoder_sample_rate:
-                wav_resample = librosa.resample(y=wav_resample.astype(np.float32), 
-                                           orig_sr=int(sr), 
-                                           target_sr=self.model.speaker_encoder_sample_rate)
-
-            spk_emb = self.model.extract_speaker_embedding(audio=wav_resample,
-                                                           sr=self.model.speaker_encoder_sample_rate)
-
-            items.append(
-                VoiceClonePromptItem(
-                    ref_code=None if xvec_only else code,
-                    ref_spk_embedding=spk_emb,
-                    x_vector_only_mode=bool(xvec_only),
-                    icl_mode=bool(not xvec_only),
-                    ref_text=rtext,
-                )
+        items: List[Optional[VoiceClonePromptItem]] = [None] * len(normalized)
+        keys: List[Optional[str]] = [None] * len(normalized)
+        if prompt_store is not None:
+            model_id = getattr(self.model.config, "_name_or_path", "") or ""
+            for i, ((wav, sr), rtext, xvec_only) in enumerate(zip(normalized, ref_text_list, xvec_list)):
+                keys[i] = prompt_store.make_key(wav, sr, rtext, bool(xvec_only), model_id)
+                items[i] = prompt_store.get(keys[i])
+        missing = [i for i, item in enumerate(items) if item is None]
+        if not missing:
+            return items
+
+        # resample once per source rate, then a single tokenizer encode and batched speaker embeddings
+        wavs = [normalized[i][0] for i in missing]
+        srs = [normalized[i][1] for i in missing]
+        code_sr = int(self.model.speech_tokenizer.feature_extractor.sampling_rate)
+        code_wavs = self._resample_batch(wavs, srs, code_sr)
+        ref_codes = self.model.speech_tokenizer.encode(code_wavs, sr=code_sr).audio_codes
+
+        spk_sr = self.model.speaker_encoder_sample_rate
+        spk_wavs = code_wavs if spk_sr == code_sr else self._resample_batch(wavs, srs, spk_sr)
+        spk_embs = self.model.extract_speaker_embeddings(spk_wavs, sr=spk_sr)
+
+        for i, code, spk_emb in zip(missing, ref_codes, spk_embs):
+            rtext, xvec_only = ref_text_list[i], xvec_list[i]
+            # prompts live on the host, like the ones from a `VoicePromptStore`; the model moves them when used
+            items[i] = VoiceClonePromptItem(
+                ref_code=None if xvec_only else code.cpu(),
+                ref_spk_embedding=spk_emb.cpu(),
+                x_vector_only_mode=bool(xvec_only),
+                icl_mode=bool(not xvec_only),
+                ref_text=rtext,
             )
+            if prompt_store is not None:
+                prompt_store.put(keys[i], items[i], metadata={"model_id": model_id})
         return items
 
     def _prompt_items_to_voice_clone_prompt(self, items: List[VoiceClonePromptItem]) -> Dict[str, Any]:
@@ -476,6 +521,9 @@ class Qwen3TTSModel:
         x_vector_only_mode: Union[bool, List[bool]] = False,
         voice_clone_prompt: Optional[Union[Dict[str, Any], List[VoiceClonePromptItem]]] = None,
         non_streaming_mode: bool = False,
+        max_batch_size: Optional[int] = _DEFAULT_MAX_BATCH_SIZE,
+        max_batch_tokens: Optional[int] = _DEFAULT_MAX_BATCH_TOKENS,
+        draft_voice_clone_prompt: Optional[List[VoiceClonePromptItem]] = None,
         **kwargs,
     ) -> Tuple[List[np.ndarray], int]:
         """
@@ -510,9 +558,19 @@ class Qwen3TTSModel:
                 If False, ICL mode is used automatically.
             voice_clone_prompt:
                 list[VoiceClonePromptItem] from `create_voice_clone_prompt`.
+            draft_voice_clone_prompt:
+                With speculative decoding enabled, the prompt items of the draft model matching `voice_clone_prompt`.
+                Built from `ref_audio` when omitted.
             non_streaming_mode:
                 Using non-streaming text input, this option currently only simulates streaming text input when set to `false`, 
                 rather than enabling true streaming input or streaming generation.
+            max_batch_size:
+                Maximum number of samples per `model.generate` call (default 32). Larger batches are split into
+                sub-batches of similar length and the outputs are returned in the input order. None means no limit.
+            max_batch_tokens:
+                Maximum padded talker length of a sub-batch, i.e. sub-batch size times the longest estimated prompt
+                plus output length in codec frames (default 32768). Bounds the KV cache of every `model.generate`
+                call. None means no limit.
             do_sample:
                 Whether to use sampling, recommended to be set to `true` for most use cases.
             top_k:
@@ -545,14 +603,231 @@ class Qwen3TTSModel:
             ValueError:
                 If batch sizes mismatch or required prompt inputs are missing.
         """
-        if self.model.tts_model_type != "base":
-            raise ValueError(
-                f"model with \ntokenizer_type: {self.model.tokenizer_type}\n"
-                f"tts_model_size: {self.model.tts_model_size}\n"
-                f"tts_model_type: {self.model.tts_model_type}\n"
-                "does not support generate_voice_clone, Please check Model Card or Readme for more details."
+        self._check_model_type("base", "generate_voice_clone")
+
+        model_inputs = self._prepare_voice_clone_inputs(
+            text=text,
+            language=language,
+            ref_audio=ref_audio,
+            ref_text=ref_text,
+            x_vector_only_mode=x_vector_only_mode,
+            voice_clone_prompt=voice_clone_prompt,
+        )
+        if self.draft is not None:
+            if draft_voice_clone_prompt is None and voice_clone_prompt is None:
+                draft_voice_clone_prompt = self.draft.create_voice_clone_prompt(
+                    ref_audio=ref_audio, ref_text=ref_text, x_vector_only_mode=x_vector_only_mode
+                )
+            if draft_voice_clone_prompt is not None:
+                num_samples = len(model_inputs["input_ids"])
+                if len(draft_voice_clone_prompt) == 1 and num_samples > 1:
+                    draft_voice_clone_prompt = draft_voice_clone_prompt * num_samples
+                if len(draft_voice_clone_prompt) != num_samples:
+                    raise ValueError(
+                        f"Batch size mismatch: draft prompt={len(draft_voice_clone_prompt)}, text={num_samples}"
+                    )
+                model_inputs["draft_voice_clone_prompt"] = self._prompt_items_to_voice_clone_prompt(
+                    draft_voice_clone_prompt
+                )
+
+        gen_kwargs = self._merge_generate_kwargs(**kwargs)
+
+        return self._generate_in_sub_batches(
+            model_inputs,
+            non_streaming_mode=non_streaming_mode,
+            gen_kwargs=gen_kwargs,
+            max_batch_size=max_batch_size,
+            max_batch_tokens=max_batch_tokens,
+            decode=lambda codes, inputs: self._decode_talker_codes(
+                codes, inputs["voice_clone_prompt"].get("ref_code", None)
+            ),
+        )
+
+    def _estimate_lengths(self, model_inputs: Dict[str, Any], max_new_tokens: int) -> Tuple[List[int], List[int]]:
+        """
+        Estimate the talker prompt length and the number of generated codec frames of every sample.
+
+        The output length is the text length times a frames-per-text-token rate, measured on the reference
+        (codes per reference text token) for ICL voice clone samples and derived from `_TEXT_TOKENS_PER_SECOND`
+        and the codec frame rate otherwise.
+
+        Returns:
+            Tuple[List[int], List[int]]: `(prompt_lens, output_lens)`.
+        """
+        speech_tokenizer = self.model.speech_tokenizer
+        frame_rate = speech_tokenizer.get_output_sample_rate() / speech_tokenizer.get_decode_upsample_rate()
+        default_rate = frame_rate / _TEXT_TOKENS_PER_SECOND
+
+        num_samples = len(model_inputs["input_ids"])
+        instruct_ids = model_inputs.get("instruct_ids") or [None] * num_samples
+        ref_ids = model_inputs.get("ref_ids") or [None] * num_samples
+        voice_clone_prompt = model_inputs.get("voice_clone_prompt") or {}
+        ref_codes = voice_clone_prompt.get("ref_code") or [None] * num_samples
+        icl_modes = voice_clone_prompt.get("icl_mode") or [False] * num_samples
+
+        prompt_lens, output_lens = [], []
+        for i, input_id in enumerate(model_inputs["input_ids"]):
+            text_len = input_id.shape[-1]
+            prompt_len = text_len
+            rate = default_rate
+            if instruct_ids[i] is not None:
+                prompt_len += instruct_ids[i].shape[-1]
+            if icl_modes[i] and ref_codes[i] is not None and ref_ids[i] is not None:
+                prompt_len += ref_ids[i].shape[-1] + ref_codes[i].shape[0]
+                rate = ref_codes[i].shape[0] / max(ref_ids[i].shape[-1], 1)
+            prompt_lens.append(prompt_len)
+            output_lens.append(min(int(text_len * rate) + 1, max_new_tokens))
+        return prompt_lens, output_lens
+
+    @staticmethod
+    def _plan_sub_batches(
+        prompt_lens: List[int],
+        output_lens: List[int],
+        max_batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+    ) -> List[List[int]]:
+        """
+        Split samples into sub-batches of similar length.
+
+        Samples are sorted by estimated total length, longest first, and added to the current sub-batch while it
+        stays within `max_batch_size` samples and `max_batch_tokens` padded positions (size times the longest
+        prompt plus the longest output). A sample over the token budget on its own gets a sub-batch of its own.
+        When all samples fit in one sub-batch they are kept in their input order.
+
+        Returns:
+            List[List[int]]: sample indices of every sub-batch.
+        """
+        order = list(range(len(prompt_lens)))
+        if not order:
+            return []
+        if max_batch_size is not None and max_batch_size <= 0:
+            raise ValueError("`max_batch_size` must be positive.")
+        fits_whole = max_batch_size is None or len(order) <= max_batch_size
+        if max_batch_tokens is not None:
+            fits_whole = fits_whole and len(order) * (max(prompt_lens) + max(output_lens)) <= max_batch_tokens
+        if fits_whole:
+            return [order]
+        order.sort(key=lambda i: prompt_lens[i] + output_lens[i], reverse=True)
+
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        max_prompt = max_output = 0
+        for i in order:
+            new_prompt = max(max_prompt, prompt_lens[i])
+            new_output = max(max_output, output_lens[i])
+            fits = max_batch_size is None or len(batch) < max_batch_size
+            if max_batch_tokens is not None:
+                fits = fits and (len(batch) + 1) * (new_prompt + new_output) <= max_batch_tokens
+            if batch and not fits:
+                batches.append(batch)
+                batch = []
+                new_prompt, new_output = prompt_lens[i], output_lens[i]
+            batch.append(i)
+            max_prompt, max_output = new_prompt, new_output
+        if batch:
+            batches.append(batch)
+        return batches
+
+    @staticmethod
+    def _select_model_inputs(model_inputs: Dict[str, Any], index: List[int]) -> Dict[str, Any]:
+        selected: Dict[str, Any] = {}
+        for name, value in model_inputs.items():
+            if isinstance(value, dict):
+                selected[name] = {k: [v[i] for i in index] if isinstance(v, list) else v for k, v in value.items()}
+            elif isinstance(value, list):
+                selected[name] = [value[i] for i in index]
+            else:
+                selected[name] = value
+        return selected
+
+    def _generate_in_sub_batches(
+        self,
+        model_inputs: Dict[str, Any],
+        non_streaming_mode: bool,
+        gen_kwargs: Dict[str, Any],
+        max_batch_size: Optional[int],
+        max_batch_tokens: Optional[int],
+        decode: Callable[[List[torch.Tensor], Dict[str, Any]], Tuple[List[np.ndarray], int]],
+    ) -> Tuple[List[np.ndarray], int]:
+        """
+        Run `model.generate` and `decode` on the sub-batches planned by `_plan_sub_batches`.
+
+        Returns:
+            Tuple[List[np.ndarray], int]: waveforms in the order of `model_inputs`, and the sample rate.
+        """
+        prompt_lens, output_lens = self._estimate_lengths(model_inputs, gen_kwargs["max_new_tokens"])
+        batches = self._plan_sub_batches(prompt_lens, output_lens, max_batch_size, max_batch_tokens)
+
+        if self.draft is not None:
+            gen_kwargs = dict(gen_kwargs, draft_model=self.draft.model, num_draft_frames=self.num_draft_frames)
+
+        wavs: List[Optional[np.ndarray]] = [None] * len(prompt_lens)
+        fs = None
+        for index in batches:
+            inputs = self._select_model_inputs(model_inputs, index)
+            talker_codes_list, _ = self.model.generate(
+                non_streaming_mode=non_streaming_mode,
+                **inputs,
+                **gen_kwargs,
             )
-        
+            batch_wavs, fs = decode(talker_codes_list, inputs)
+            for i, wav in zip(index, batch_wavs):
+                wavs[i] = wav
+        return wavs, fs
+
+    def _decode_talker_codes(
+        self,
+        talker_codes_list: List[torch.Tensor],
+        ref_code_list: Optional[List[Optional[torch.Tensor]]] = None,
+    ) -> Tuple[List[np.ndarray], int]:
+        """
+        Decode generated codec codes to waveforms.
+
+        For ICL voice clone samples the reference codes are the decoder context of the generated ones. With the 12Hz
+        tokenizer the decoder is warmed up once per reference and only the generated frames are vocoded (see
+        `Qwen3TTSTokenizer.decode_with_context`); otherwise the reference codes are decoded in front of the generated
+        ones and the part of the waveform that belongs to them is cut off again.
+        """
+        has_context = ref_code_list is not None and any(c is not None for c in ref_code_list)
+        if has_context and self.model.speech_tokenizer.get_model_type() == "qwen3_tts_tokenizer_12hz":
+            return self.model.speech_tokenizer.decode_with_context(talker_codes_list, ref_code_list)
+
+        codes_for_decode = []
+        for i, codes in enumerate(talker_codes_list):
+            if ref_code_list is not None and ref_code_list[i] is not None:
+                codes_for_decode.append(torch.cat([ref_code_list[i].to(codes.device), codes], dim=0))
+            else:
+                codes_for_decode.append(codes)
+
+        wavs_all, fs = self.model.speech_tokenizer.decode([{"audio_codes": c} for c in codes_for_decode])
+
+        wavs_out: List[np.ndarray] = []
+        for i, wav in enumerate(wavs_all):
+            if ref_code_list is not None and ref_code_list[i] is not None:
+                ref_len = int(ref_code_list[i].shape[0])
+                total_len = int(codes_for_decode[i].shape[0])
+                cut = int(ref_len / max(total_len, 1) * wav.shape[0])
+                wavs_out.append(wav[cut:])
+            else:
+                wavs_out.append(wav)
+
+        return wavs_out, fs
+
+    def _prepare_voice_clone_inputs(
+        self,
+        text: Union[str, List[str]],
+        language: Union[str, List[str]] = None,
+        ref_audio: Optional[Union[AudioLike, List[AudioLike]]] = None,
+        ref_text: Optional[Union[str, List[Optional[str]]]] = None,
+        x_vector_only_mode: Union[bool, List[bool]] = False,
+        voice_clone_prompt: Optional[Union[Dict[str, Any], List[VoiceClonePromptItem]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Validate voice clone arguments and build the inputs of `model.generate` / `model.stream_generate`.
+
+        Returns:
+            Dict[str, Any]: `input_ids`, `ref_ids`, `voice_clone_prompt` (dict form) and `languages`.
+        """
         texts = self._ensure_list(text)
         languages = self._ensure_list(language) if isinstance(language, list) else ([language] * len(texts) if language is not None else ["Auto"] * len(texts))
         if len(languages) == 1 and len(texts) > 1:
@@ -598,40 +873,13 @@ class Qwen3TTSModel:
                     ref_tok = self._tokenize_texts([self._build_ref_text(rt)])[0]
                     ref_ids.append(ref_tok)
 
-        gen_kwargs = self._merge_generate_kwargs(**kwargs)
-
-        talker_codes_list, _ = self.model.generate(
+        return dict(
             input_ids=input_ids,
             ref_ids=ref_ids,
             voice_clone_prompt=voice_clone_prompt_dict,
             languages=languages,
-            non_streaming_mode=non_streaming_mode,
-            **gen_kwargs,
         )
 
-        codes_for_decode = []
-        for i, codes in enumerate(talker_codes_list):
-            ref_code_list = voice_clone_prompt_dict.get("ref_code", None)
-            if ref_code_list is not None and ref_code_list[i] is not None:
-                codes_for_decode.append(torch.cat([ref_code_list[i].to(codes.device), codes], dim=0))
-            else:
-                codes_for_decode.append(codes)
-
-        wavs_all, fs = self.model.speech_tokenizer.decode([{"audio_codes": c} for c in codes_for_decode])
-
-        wavs_out: List[np.ndarray] = []
-        for i, wav in enumerate(wavs_all):
-            ref_code_list = voice_clone_prompt_dict.get("ref_code", None)
-            if ref_code_list is not None and ref_code_list[i] is not None:
-                ref_len = int(ref_code_list[i].shape[0])
-                total_len = int(codes_for_decode[i].shape[0])
-                cut = int(ref_len / max(total_len, 1) * wav.shape[0])
-                wavs_out.append(wav[cut:])
-            else:
-                wavs_out.append(wav)
-
-        return wavs_out, fs
-
     # voice design model
     @torch.no_grad()
     def generate_voice_design(
@@ -640,6 +888,8 @@ class Qwen3TTSModel:
         instruct: Union[str, List[str]],
         language: Union[str, List[str]] = None,
         non_streaming_mode: bool = True,
+        max_batch_size: Optional[int] = _DEFAULT_MAX_BATCH_SIZE,
+        max_batch_tokens: Optional[int] = _DEFAULT_MAX_BATCH_TOKENS,
         **kwargs,
     ) -> Tuple[List[np.ndarray], int]:
         """
@@ -655,6 +905,13 @@ class Qwen3TTSModel:
             non_streaming_mode:
                 Using non-streaming text input, this option currently only simulates streaming text input when set to `false`, 
                 rather than enabling true streaming input or streaming generation.
+            max_batch_size:
+                Maximum number of samples per `model.generate` call (default 32). Larger batches are split into
+                sub-batches of similar length and the outputs are returned in the input order. None means no limit.
+            max_batch_tokens:
+                Maximum padded talker length of a sub-batch, i.e. sub-batch size times the longest estimated prompt
+                plus output length in codec frames (default 32768). Bounds the KV cache of every `model.generate`
+                call. None means no limit.
             do_sample:
                 Whether to use sampling, recommended to be set to `true` for most use cases.
             top_k:
@@ -683,14 +940,33 @@ class Qwen3TTSModel:
             Tuple[List[np.ndarray], int]:
                 (wavs, sample_rate)
         """
-        if self.model.tts_model_type != "voice_design":
-            raise ValueError(
-                f"model with \ntokenizer_type: {self.model.tokenizer_type}\n"
-                f"tts_model_size: {self.model.tts_model_size}\n"
-                f"tts_model_type: {self.model.tts_model_type}\n"
-                "does not support generate_voice_design, Please check Model Card or Readme for more details."
-            )
-        
+        self._check_model_type("voice_design", "generate_voice_design")
+
+        model_inputs = self._prepare_voice_design_inputs(text=text, instruct=instruct, language=language)
+
+        gen_kwargs = self._merge_generate_kwargs(**kwargs)
+
+        return self._generate_in_sub_batches(
+            model_inputs,
+            non_streaming_mode=non_streaming_mode,
+            gen_kwargs=gen_kwargs,
+            max_batch_size=max_batch_size,
+            max_batch_tokens=max_batch_tokens,
+            decode=lambda codes, inputs: self.model.speech_tokenizer.decode([{"audio_codes": c} for c in codes]),
+        )
+
+    def _prepare_voice_design_inputs(
+        self,
+        text: Union[str, List[str]],
+        instruct: Union[str, List[str]],
+        language: Union[str, List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Validate voice design arguments and build the inputs of `model.generate` / `model.stream_generate`.
+
+        Returns:
+            Dict[str, Any]: `input_ids`, `instruct_ids` and `languages`.
+        """
         texts = self._ensure_list(text)
         languages = self._ensure_list(language) if isinstance(language, list) else ([language] * len(texts) if language is not None else ["Auto"] * len(texts))
         instructs = self._ensure_list(instruct)
@@ -714,19 +990,12 @@ class Qwen3TTSModel:
             else:
                 instruct_ids.append(self._tokenize_texts([self._build_instruct_text(ins)])[0])
 
-        gen_kwargs = self._merge_generate_kwargs(**kwargs)
-
-        talker_codes_list, _ = self.model.generate(
+        return dict(
             input_ids=input_ids,
             instruct_ids=instruct_ids,
             languages=languages,
-            non_streaming_mode=non_streaming_mode,
-            **gen_kwargs,
         )
 
-        wavs, fs = self.model.speech_tokenizer.decode([{"audio_codes": c} for c in talker_codes_list])
-        return wavs, fs
-
     # custom voice model
     @torch.no_grad()
     def generate_custom_voice(
@@ -736,6 +1005,8 @@ class Qwen3TTSModel:
         language: Union[str, List[str]] = None,
         instruct: Optional[Union[str, List[str]]] = None,
         non_streaming_mode: bool = True,
+        max_batch_size: Optional[int] = _DEFAULT_MAX_BATCH_SIZE,
+        max_batch_tokens: Optional[int] = _DEFAULT_MAX_BATCH_TOKENS,
         **kwargs,
     ) -> Tuple[List[np.ndarray], int]:
         """
@@ -753,6 +1024,13 @@ class Qwen3TTSModel:
             non_streaming_mode:
                 Using non-streaming text input, this option currently only simulates streaming text input when set to `false`, 
                 rather than enabling true streaming input or streaming generation.
+            max_batch_size:
+                Maximum number of samples per `model.generate` call (default 32). Larger batches are split into
+                sub-batches of similar length and the outputs are returned in the input order. None means no limit.
+            max_batch_tokens:
+                Maximum padded talker length of a sub-batch, i.e. sub-batch size times the longest estimated prompt
+                plus output length in codec frames (default 32768). Bounds the KV cache of every `model.generate`
+                call. None means no limit.
             do_sample:
                 Whether to use sampling, recommended to be set to `true` for most use cases.
             top_k:
@@ -785,14 +1063,34 @@ class Qwen3TTSModel:
             ValueError:
                 If any speaker/language is unsupported or batch sizes mismatch.
         """
-        if self.model.tts_model_type != "custom_voice":
-            raise ValueError(
-                f"model with \ntokenizer_type: {self.model.tokenizer_type}\n"
-                f"tts_model_size: {self.model.tts_model_size}\n"
-                f"tts_model_type: {self.model.tts_model_type}\n"
-                "does not support generate_custom_voice, Please check Model Card or Readme for more details."
-            )
+        self._check_model_type("custom_voice", "generate_custom_voice")
+
+        model_inputs = self._prepare_custom_voice_inputs(text=text, speaker=speaker, language=language, instruct=instruct)
+
+        gen_kwargs = self._merge_generate_kwargs(**kwargs)
+
+        return self._generate_in_sub_batches(
+            model_inputs,
+            non_streaming_mode=non_streaming_mode,
+            gen_kwargs=gen_kwargs,
+            max_batch_size=max_batch_size,
+            max_batch_tokens=max_batch_tokens,
+            decode=lambda codes, inputs: self.model.speech_tokenizer.decode([{"audio_codes": c} for c in codes]),
+        )
+
+    def _prepare_custom_voice_inputs(
+        self,
+        text: Union[str, List[str]],
+        speaker: Union[str, List[str]],
+        language: Union[str, List[str]] = None,
+        instruct: Optional[Union[str, List[str]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Validate custom voice arguments and build the inputs of `model.generate` / `model.stream_generate`.
 
+        Returns:
+            Dict[str, Any]: `input_ids`, `instruct_ids`, `languages` and `speakers`.
+        """
         texts = self._ensure_list(text)
         languages = self._ensure_list(language) if isinstance(language, list) else ([language] * len(texts) if language is not None else ["Auto"] * len(texts))
         speakers = self._ensure_list(speaker)
@@ -824,20 +1122,216 @@ class Qwen3TTSModel:
             else:
                 instruct_ids.append(self._tokenize_texts([self._build_instruct_text(ins)])[0])
 
-        gen_kwargs = self._merge_generate_kwargs(**kwargs)
-
-        talker_codes_list, _ = self.model.generate(
+        return dict(
             input_ids=input_ids,
             instruct_ids=instruct_ids,
             languages=languages,
             speakers=speakers,
+        )
+
+    # streaming generation
+    def _ensure_single_text(self, text: Union[str, List[str]], api_name: str) -> None:
+        if isinstance(text, list) and len(text) != 1:
+            raise ValueError(f"{api_name} only supports a single text, got batch of {len(text)}.")
+
+    def _stream_decode(
+        self,
+        model_inputs: Dict[str, Any],
+        non_streaming_mode: bool,
+        chunk_size: int,
+        context_codes: Optional[torch.Tensor] = None,
+        **kwargs,
+    ) -> Iterator[Tuple[np.ndarray, int]]:
+        gen_kwargs = self._merge_generate_kwargs(**kwargs)
+        eos_token_id = self.model.config.talker_config.codec_eos_token_id
+
+        def _frames():
+            for codes in self.model.stream_generate(
+                non_streaming_mode=non_streaming_mode,
+                **model_inputs,
+                **gen_kwargs,
+            ):
+                if int(codes[0, 0]) == eos_token_id:
+                    break
+                yield codes[0]
+
+        fs = int(self.model.speech_tokenizer.get_output_sample_rate())
+        for wav in self.model.speech_tokenizer.decode_streaming(
+            _frames(),
+            chunk_size=chunk_size,
+            context_codes=context_codes,
+        ):
+            yield wav, fs
+
+    @torch.no_grad()
+    def stream_voice_clone(
+        self,
+        text: Union[str, List[str]],
+        language: Union[str, List[str]] = None,
+        ref_audio: Optional[Union[AudioLike, List[AudioLike]]] = None,
+        ref_text: Optional[Union[str, List[Optional[str]]]] = None,
+        x_vector_only_mode: Union[bool, List[bool]] = False,
+        voice_clone_prompt: Optional[Union[Dict[str, Any], List[VoiceClonePromptItem]]] = None,
+        non_streaming_mode: bool = False,
+        chunk_size: int = 4,
+        **kwargs,
+    ) -> Iterator[Tuple[np.ndarray, int]]:
+        """
+        Streaming version of `generate_voice_clone` for a single text.
+
+        Codec frames are decoded in chunks of `chunk_size` frames while the talker is still generating, so the first
+        audio is available long before the utterance is finished. In ICL mode the reference codes warm up the
+        streaming decoder first, mirroring how `generate_voice_clone` decodes `ref_code + codes`.
+
+        Args:
+            text, language, ref_audio, ref_text, x_vector_only_mode, voice_clone_prompt, non_streaming_mode:
+                Same as `generate_voice_clone`, restricted to one sample.
+            chunk_size:
+                Number of codec frames decoded per yielded chunk.
+            **kwargs:
+                Generation parameters, same as `generate_voice_clone`.
+
+        Yields:
+            Tuple[np.ndarray, int]:
+                (wav_chunk, sample_rate)
+        """
+        self._check_model_type("base", "stream_voice_clone")
+        self._ensure_single_text(text, "stream_voice_clone")
+
+        model_inputs = self._prepare_voice_clone_inputs(
+            text=text,
+            language=language,
+            ref_audio=ref_audio,
+            ref_text=ref_text,
+            x_vector_only_mode=x_vector_only_mode,
+            voice_clone_prompt=voice_clone_prompt,
+        )
+        ref_code_list = model_inputs["voice_clone_prompt"].get("ref_code", None)
+        context_codes = ref_code_list[0] if ref_code_list is not None else None
+
+        yield from self._stream_decode(
+            model_inputs,
             non_streaming_mode=non_streaming_mode,
-            **gen_kwargs,
+            chunk_size=chunk_size,
+            context_codes=context_codes,
+            **kwargs,
         )
 
-        wavs, fs = self.model.speech_tokenizer.decode([{"audio_codes": c} for c in talker_codes_list])
-        return wavs, fs
+    @torch.no_grad()
+    def stream_voice_design(
+        self,
+        text: Union[str, List[str]],
+        instruct: Union[str, List[str]],
+        language: Union[str, List[str]] = None,
+        non_streaming_mode: bool = True,
+        chunk_size: int = 4,
+        **kwargs,
+    ) -> Iterator[Tuple[np.ndarray, int]]:
+        """
+        Streaming version of `generate_voice_design` for a single text.
+
+        Args:
+            text, instruct, language, non_streaming_mode:
+                Same as `generate_voice_design`, restricted to one sample.
+            chunk_size:
+                Number of codec frames decoded per yielded chunk.
+            **kwargs:
+                Generation parameters, same as `generate_voice_design`.
+
+        Yields:
+            Tuple[np.ndarray, int]:
+                (wav_chunk, sample_rate)
+        """
+        self._check_model_type("voice_design", "stream_voice_design")
+        self._ensure_single_text(text, "stream_voice_design")
+
+        model_inputs = self._prepare_voice_design_inputs(text=text, instruct=instruct, language=language)
+
+        yield from self._stream_decode(
+            model_inputs,
+            non_streaming_mode=non_streaming_mode,
+            chunk_size=chunk_size,
+            **kwargs,
+        )
+
+    @torch.no_grad()
+    def stream_custom_voice(
+        self,
+        text: Union[str, List[str]],
+        speaker: Union[str, List[str]],
+        language: Union[str, List[str]] = None,
+        instruct: Optional[Union[str, List[str]]] = None,
+        non_streaming_mode: bool = True,
+        chunk_size: int = 4,
+        **kwargs,
+    ) -> Iterator[Tuple[np.ndarray, int]]:
+        """
+        Streaming version of `generate_custom_voice` for a single text.
+
+        Args:
+            text, speaker, language, instruct, non_streaming_mode:
+                Same as `generate_custom_voice`, restricted to one sample.
+            chunk_size:
+                Number of codec frames decoded per yielded chunk.
+            **kwargs:
+                Generation parameters, same as `generate_custom_voice`.
+
+        Yields:
+            Tuple[np.ndarray, int]:
+                (wav_chunk, sample_rate)
+        """
+        self._check_model_type("custom_voice", "stream_custom_voice")
+        self._ensure_single_text(text, "stream_custom_voice")
+
+        model_inputs = self._prepare_custom_voice_inputs(text=text, speaker=speaker, language=language, instruct=instruct)
+
+        yield from self._stream_decode(
+            model_inputs,
+            non_streaming_mode=non_streaming_mode,
+            chunk_size=chunk_size,
+            **kwargs,
+        )
+
+    def enable_prefix_cache(self, max_entries: int = 32, cache_dir: Optional[str] = None) -> None:
+        """
+        Cache the talker KV state of voice prefixes so repeated voices only prefill the new text.
+
+        The prefix covers every prompt position before the target text: role tokens, codec think/language tags,
+        speaker embedding and, for ICL voice clone prompts, the reference transcript. It is computed once per
+        distinct voice / language / `non_streaming_mode` combination and reused by `generate_*`, `stream_*` and
+        `Qwen3TTSEngine`. The reference codes of an ICL prompt follow the target text and are still prefilled.
+
+        Args:
+            max_entries (int, default=32):
+                Number of prefixes kept in memory (least recently used dropped first).
+            cache_dir (Optional[str]):
+                Also persist prefixes there as safetensors files, reloaded on a memory miss.
+        """
+        self.model.enable_prefix_cache(max_entries=max_entries, cache_dir=cache_dir)
+
+    def disable_prefix_cache(self) -> None:
+        self.model.disable_prefix_cache()
+
+    def enable_speculative_decoding(self, draft: "Qwen3TTSModel", num_draft_frames: int = 4) -> None:
+        """
+        Let a smaller model of the same type draft codec frames for `generate_*`, e.g. the 0.6B checkpoint for the
+        1.7B one. The output is distributed as without a draft; the speedup depends on how often the drafts are
+        accepted and is largest for small, latency-bound batches, see `examples/benchmark_speculative_decoding.py`.
+
+        Voice clone prompts hold model-specific speaker embeddings: when `generate_voice_clone` gets prompt items
+        instead of `ref_audio`, also pass `draft_voice_clone_prompt` created with `draft.create_voice_clone_prompt`.
+
+        Args:
+            draft (Qwen3TTSModel):
+                Draft model sharing the codec vocabulary of this one.
+            num_draft_frames (int, default=4):
+                Frames drafted per target forward.
+        """
+        self.draft = draft
+        self.num_draft_frames = num_draft_frames
 
+    def disable_speculative_decoding(self) -> None:
+        self.draft = None
 
     def get_supported_speakers(self) -> Optional[List[str]]:
         """
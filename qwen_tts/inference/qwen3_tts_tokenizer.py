@@ -14,9 +14,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import base64
+import hashlib
 import io
 import urllib.request
-from typing import List, Optional, Tuple, Union
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
 import librosa
@@ -54,11 +56,15 @@ class Qwen3TTSTokenizer:
     - Returned audio is float32 numpy arrays and the output sample rate.
     """
 
+    # decoder states warmed up on the tail of a context (e.g. a voice's reference codes), least recently used first
+    context_cache_size = 64
+
     def __init__(self):
         self.model = None
         self.feature_extractor = None
         self.config = None
         self.device = None
+        self._context_states = OrderedDict()
 
     @classmethod
     def from_pretrained(cls, pretrained_model_name_or_path: str, **kwargs) -> "Qwen3TTSTokenizer":
@@ -259,7 +265,9 @@ class Qwen3TTSTokenizer:
     def decode(
         self,
         encoded,
-    ) -> Tuple[List[np.ndarray], int]:
+        chunk_size: Optional[int] = None,
+        **kwargs,
+    ) -> Union[Tuple[List[np.ndarray], int], Iterator[Tuple[List[np.ndarray], int]]]:
         """
         Decode back to waveform.
 
@@ -277,11 +285,22 @@ class Qwen3TTSTokenizer:
                 - ModelOutput returned by `encode()`, OR
                 - dict, OR
                 - list[dict]
+            chunk_size (Optional[int], default=None):
+                If set, return a generator that decodes `chunk_size` codes at a time and yields the waveform as soon
+                as each chunk is ready. 25Hz models render overlapping DiT/BigVGAN windows with crossfaded seams,
+                12Hz models use the stateful streaming decoder. Memory stays bounded by the chunk size.
+            **kwargs:
+                25Hz only: DiT sampling options such as `num_steps` (default 10), `guidance_scale` (default 0.5),
+                `solver` ("euler", "midpoint", "heun", "rk4" or "adaptive_heun"), `cfg_steps` (apply guidance on
+                the first k solver steps only), `solver_options` and a seeded `generator` on the model device.
+                Fewer steps trade quality for latency.
 
         Returns:
             Tuple[List[np.ndarray], int]:
                 - wavs: list of 1-D float32 numpy arrays
                 - sample_rate: int, model output sampling rate
+            With `chunk_size`, an iterator of such tuples holding the next chunk of every sample (empty once a
+            sample has ended); concatenating the chunks gives the full waveforms.
         """
         model_type = self.model.get_model_type()
 
@@ -328,42 +347,225 @@ class Qwen3TTSTokenizer:
             audio_codes_list = [_to_tensor(c, dtype=torch.long) for c in audio_codes_list]
             audio_codes_padded = pad_sequence(audio_codes_list, batch_first=True, padding_value=-1).to(self.device)
 
+        xvectors_batch, ref_mels_padded = None, None
+        if model_type == "qwen3_tts_tokenizer_25hz":
+            if xvectors_list is None or ref_mels_list is None:
+                raise ValueError("25Hz decode requires `xvectors` and `ref_mels`.")
+
+            if isinstance(xvectors_list, torch.Tensor):
+                xvectors_batch = xvectors_list
+                if xvectors_batch.dim() == 1:  # (D,) -> (1, D)
+                    xvectors_batch = xvectors_batch.unsqueeze(0)
+                xvectors_batch = xvectors_batch.to(self.device).to(self.model.dtype)
+            else:
+                xvectors_list = [_to_tensor(x, dtype=torch.float32) for x in xvectors_list]
+                xvectors_batch = torch.stack(xvectors_list, dim=0).to(self.device).to(self.model.dtype)
+
+            if isinstance(ref_mels_list, torch.Tensor):
+                ref_mels_padded = ref_mels_list
+                if ref_mels_padded.dim() == 2:  # (T, M) -> (1, T, M)
+                    ref_mels_padded = ref_mels_padded.unsqueeze(0)
+                ref_mels_padded = ref_mels_padded.to(self.device).to(self.model.dtype)
+            else:
+                ref_mels_list = [_to_tensor(m, dtype=torch.float32) for m in ref_mels_list]
+                ref_mels_padded = pad_sequence(ref_mels_list, batch_first=True, padding_value=0).to(self.device).to(self.model.dtype)
+
+        elif model_type != "qwen3_tts_tokenizer_12hz":
+            raise ValueError(f"Unknown model type: {model_type}")
+        elif kwargs:
+            raise ValueError(f"Sampling options {sorted(kwargs)} are only supported by 25Hz tokenizers.")
+
+        if chunk_size is not None:
+            return self._decode_chunks(audio_codes_padded, xvectors_batch, ref_mels_padded, chunk_size, **kwargs)
+
         with torch.inference_mode():
             if model_type == "qwen3_tts_tokenizer_25hz":
-                if xvectors_list is None or ref_mels_list is None:
-                    raise ValueError("25Hz decode requires `xvectors` and `ref_mels`.")
-
-                if isinstance(xvectors_list, torch.Tensor):
-                    xvectors_batch = xvectors_list
-                    if xvectors_batch.dim() == 1:  # (D,) -> (1, D)
-                        xvectors_batch = xvectors_batch.unsqueeze(0)
-                    xvectors_batch = xvectors_batch.to(self.device).to(self.model.dtype)
-                else:
-                    xvectors_list = [_to_tensor(x, dtype=torch.float32) for x in xvectors_list]
-                    xvectors_batch = torch.stack(xvectors_list, dim=0).to(self.device).to(self.model.dtype)
-
-                if isinstance(ref_mels_list, torch.Tensor):
-                    ref_mels_padded = ref_mels_list
-                    if ref_mels_padded.dim() == 2:  # (T, M) -> (1, T, M)
-                        ref_mels_padded = ref_mels_padded.unsqueeze(0)
-                    ref_mels_padded = ref_mels_padded.to(self.device).to(self.model.dtype)
-                else:
-                    ref_mels_list = [_to_tensor(m, dtype=torch.float32) for m in ref_mels_list]
-                    ref_mels_padded = pad_sequence(ref_mels_list, batch_first=True, padding_value=0).to(self.device).to(self.model.dtype)
-
-                dec = self.model.decode(audio_codes_padded, xvectors_batch, ref_mels_padded, return_dict=True)
-                wav_tensors = dec.audio_values
-
-            elif model_type == "qwen3_tts_tokenizer_12hz":
-                dec = self.model.decode(audio_codes_padded, return_dict=True)
-                wav_tensors = dec.audio_values
-
+                dec = self.model.decode(audio_codes_padded, xvectors_batch, ref_mels_padded, return_dict=True, **kwargs)
             else:
-                raise ValueError(f"Unknown model type: {model_type}")
+                dec = self.model.decode(audio_codes_padded, return_dict=True)
+            wav_tensors = dec.audio_values
 
         wavs = [w.to(torch.float32).detach().cpu().numpy() for w in wav_tensors]
         return wavs, int(self.model.get_output_sample_rate())
 
+    def _decode_chunks(
+        self,
+        audio_codes: torch.Tensor,
+        xvectors: Optional[torch.Tensor],
+        ref_mels: Optional[torch.Tensor],
+        chunk_size: int,
+        **kwargs,
+    ) -> Iterator[Tuple[List[np.ndarray], int]]:
+        if xvectors is not None:
+            chunks = (
+                dec.audio_values
+                for dec in self.model.chunked_decode(
+                    audio_codes, xvectors, ref_mels, chunk_size=chunk_size, return_dict=True, **kwargs
+                )
+            )
+        else:
+            chunks = self._streaming_decode_batch(audio_codes, chunk_size)
+
+        sample_rate = int(self.model.get_output_sample_rate())
+        while True:
+            # inference mode only around the decoder work, never across a yield to the caller
+            with torch.inference_mode():
+                wav_tensors = next(chunks, None)
+            if wav_tensors is None:
+                return
+            yield [w.to(torch.float32).detach().cpu().numpy() for w in wav_tensors], sample_rate
+
+    def _streaming_decode_batch(self, audio_codes: torch.Tensor, chunk_size: int) -> Iterator[List[torch.Tensor]]:
+        audio_lengths = (audio_codes[..., 0] > -1).sum(1) * int(self.model.get_decode_upsample_rate())
+        streaming_state = None
+        offset = 0
+        for start in range(0, audio_codes.shape[1], chunk_size):
+            dec = self.model.streaming_decode(
+                audio_codes[:, start : start + chunk_size], streaming_state=streaming_state, return_dict=True
+            )
+            streaming_state = dec.streaming_state
+            yield [a[: max(int(l) - offset, 0)] for a, l in zip(dec.audio_values, audio_lengths)]
+            offset += dec.audio_values.shape[1]
+
+    def decode_with_context(
+        self,
+        audio_codes: List[torch.Tensor],
+        context_codes: List[Optional[torch.Tensor]],
+        context_frames: int = 72,
+        chunk_size: int = 300,
+    ) -> Tuple[List[np.ndarray], int]:
+        """
+        Decode 12Hz codes that continue preceding `context_codes`, without decoding the context itself.
+
+        For every distinct context, the stateful decoder is run once over its last `context_frames` frames and the
+        resulting state (causal convolution tails and transformer KV cache) is cached. Each sample continues from a
+        copy of that state, so only its own frames are vocoded and its waveform is exactly
+        `len(codes) * decode_upsample_rate` samples long. Samples whose contexts leave states of the same length
+        are decoded as one batch.
+
+        Args:
+            audio_codes (List[torch.Tensor]):
+                `(T_i, num_quantizers)` codes to decode.
+            context_codes (List[Optional[torch.Tensor]]):
+                `(C_i, num_quantizers)` codes preceding each sample (e.g. the `ref_code` of a voice clone prompt), or
+                None to decode the sample without context.
+            context_frames (int, default=72):
+                Number of trailing context frames the decoder is warmed up on; the default is one sliding attention
+                window of the decoder transformer.
+            chunk_size (int, default=300):
+                Number of frames decoded per decoder call, bounding peak memory on long samples.
+
+        Returns:
+            Tuple[List[np.ndarray], int]:
+                - wavs: list of 1-D float32 numpy arrays
+                - sample_rate: int, model output sampling rate
+        """
+        if self.model.get_model_type() != "qwen3_tts_tokenizer_12hz":
+            raise ValueError(f"Context decode is not supported for {self.model.get_model_type()}.")
+
+        upsample = int(self.model.get_decode_upsample_rate())
+        wavs: List[Optional[np.ndarray]] = [None] * len(audio_codes)
+        groups = OrderedDict()
+        with torch.inference_mode():
+            for i, context in enumerate(context_codes):
+                state = self._context_state(context, context_frames)
+                groups.setdefault(state.num_frames, []).append((i, state))
+
+            for items in groups.values():
+                indices = [i for i, _ in items]
+                streaming_state = type(items[0][1]).concat([state for _, state in items])
+                codes = pad_sequence([audio_codes[i].to(self.device).long() for i in indices], batch_first=True)
+                audio_values = []
+                for start in range(0, codes.shape[1], chunk_size):
+                    dec = self.model.streaming_decode(
+                        codes[:, start : start + chunk_size], streaming_state=streaming_state, return_dict=True
+                    )
+                    streaming_state = dec.streaming_state
+                    audio_values.append(dec.audio_values)
+                audio_values = torch.cat(audio_values, dim=-1) if audio_values else codes.new_zeros(len(indices), 0)
+                # the decoder is causal, so the padding behind shorter samples does not change their audio
+                for i, wav in zip(indices, audio_values):
+                    wavs[i] = wav[: audio_codes[i].shape[0] * upsample].to(torch.float32).detach().cpu().numpy()
+
+        return wavs, int(self.model.get_output_sample_rate())
+
+    def _context_state(self, context_codes: Optional[torch.Tensor], context_frames: int):
+        """
+        Decoder streaming state after the last `context_frames` frames of `context_codes` (a fresh state if None),
+        taken from the LRU cache or computed and cached. The returned state must not be advanced; use a copy.
+        """
+        if context_codes is None or context_codes.shape[0] == 0:
+            return self.model.decoder.init_streaming_state()
+
+        context_codes = context_codes[-context_frames:].to(self.device).long()
+        context_bytes = context_codes.cpu().numpy().tobytes()
+        key = (hashlib.sha1(context_bytes).hexdigest(), tuple(context_codes.shape))
+        state = self._context_states.get(key)
+        if state is None:
+            state = self.model.streaming_decode(context_codes.unsqueeze(0), return_dict=True).streaming_state
+            self._context_states[key] = state
+            while len(self._context_states) > self.context_cache_size:
+                self._context_states.popitem(last=False)
+        self._context_states.move_to_end(key)
+        return state
+
+    def decode_streaming(
+        self,
+        audio_codes: Iterable[torch.Tensor],
+        chunk_size: int = 4,
+        context_codes: Optional[torch.Tensor] = None,
+        context_frames: int = 72,
+    ) -> Iterator[np.ndarray]:
+        """
+        Incrementally decode a stream of 12Hz codec frames into waveform chunks.
+
+        Frames are buffered until `chunk_size` of them are available and then decoded with a stateful decoder that
+        keeps its convolution context and transformer KV cache between chunks, so no frame is decoded twice and the
+        concatenated chunks match a one-pass decode of the whole sequence.
+
+        Args:
+            audio_codes (Iterable[torch.Tensor]):
+                Codec frames in generation order, each `(num_quantizers,)` or `(n, num_quantizers)`.
+            chunk_size (int, default=4):
+                Number of new frames decoded per emitted chunk. Remaining frames are flushed at the end.
+            context_codes (Optional[torch.Tensor], default=None):
+                `(T, num_quantizers)` codes that precede the stream (e.g. the `ref_code` of a voice clone prompt).
+                They are only used to warm up the decoder state and are not emitted; the warmed-up state is cached
+                per context, see `decode_with_context`.
+            context_frames (int, default=72):
+                Number of trailing context frames the decoder is warmed up on.
+
+        Yields:
+            np.ndarray: 1-D float32 waveform chunk at `get_output_sample_rate()`.
+        """
+        if self.model.get_model_type() != "qwen3_tts_tokenizer_12hz":
+            raise ValueError(f"Streaming decode is not supported for {self.model.get_model_type()}.")
+
+        num_quantizers = int(self.config.decoder_config.num_quantizers)
+        streaming_state = None
+        if context_codes is not None and context_codes.shape[0] > 0:
+            with torch.inference_mode():
+                streaming_state = self._context_state(context_codes, context_frames).copy()
+
+        def _render(new_codes: torch.Tensor) -> torch.Tensor:
+            nonlocal streaming_state
+            with torch.inference_mode():
+                dec = self.model.streaming_decode(new_codes.unsqueeze(0), streaming_state=streaming_state, return_dict=True)
+            streaming_state = dec.streaming_state
+            return dec.audio_values[0]
+
+        pending: List[torch.Tensor] = []
+        num_pending = 0
+        for frame in audio_codes:
+            frame = frame.to(self.device).long().view(-1, num_quantizers)
+            pending.append(frame)
+            num_pending += frame.shape[0]
+            if num_pending >= chunk_size:
+                yield _render(torch.cat(pending, dim=0)).to(torch.float32).detach().cpu().numpy()
+                pending, num_pending = [], 0
+        if num_pending > 0:
+            yield _render(torch.cat(pending, dim=0)).to(torch.float32).detach().cpu().numpy()
+
     def get_model_type(self) -> str:
         """
         Get the underlying tokenizer model type.
@@ -0,0 +1,232 @@
+# coding=utf-8
+# Copyright 2026 The Alibaba Qwen team.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import torch
+from safetensors import safe_open
+from safetensors.torch import save_file
+
+from .qwen3_tts_model import VoiceClonePromptItem
+
+_PROMPT_FORMAT = "qwen3_tts_voice_clone_prompt"
+
+
+def save_voice_clone_prompt(
+    items: List[VoiceClonePromptItem],
+    path: str,
+    metadata: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    Write voice-clone prompt items to a safetensors file.
+
+    Tensors are stored as `{i}.ref_spk_embedding` / `{i}.ref_code`, the remaining fields of every item go to the
+    file's string metadata, so the file can be memory-mapped and read without unpickling.
+
+    Args:
+        items (List[VoiceClonePromptItem]):
+            Prompt items, e.g. from `Qwen3TTSModel.create_voice_clone_prompt`.
+        path (str):
+            Output path, conventionally ending in `.safetensors`.
+        metadata (Optional[Dict[str, str]]):
+            Extra string metadata stored alongside (e.g. the model id).
+    """
+    tensors: Dict[str, torch.Tensor] = {}
+    fields = []
+    for i, item in enumerate(items):
+        tensors[f"{i}.ref_spk_embedding"] = item.ref_spk_embedding.detach().cpu().contiguous()
+        if item.ref_code is not None:
+            tensors[f"{i}.ref_code"] = item.ref_code.detach().cpu().contiguous()
+        fields.append(
+            dict(
+                x_vector_only_mode=bool(item.x_vector_only_mode),
+                icl_mode=bool(item.icl_mode),
+                ref_text=item.ref_text,
+            )
+        )
+    file_metadata = dict(metadata or {})
+    file_metadata["format"] = _PROMPT_FORMAT
+    file_metadata["items"] = json.dumps(fields, ensure_ascii=False)
+    save_file(tensors, path, metadata=file_metadata)
+
+
+def load_voice_clone_prompt(path: str, device: str = "cpu") -> List[VoiceClonePromptItem]:
+    """
+    Read prompt items written by `save_voice_clone_prompt`.
+
+    Files that do not end in `.safetensors` are read as the `torch.save` payload `{"items": [asdict(item), ...]}`
+    of earlier versions of the demo, with `weights_only=True`.
+
+    Raises:
+        ValueError: If the file is not a voice-clone prompt file.
+    """
+    if not path.endswith(".safetensors"):
+        return _load_legacy_voice_clone_prompt(path, device)
+    with safe_open(path, framework="pt", device=str(device)) as f:
+        metadata = f.metadata() or {}
+        if metadata.get("format") != _PROMPT_FORMAT:
+            raise ValueError(f"{path} is not a voice clone prompt file.")
+        names = set(f.keys())
+        items = []
+        for i, fields in enumerate(json.loads(metadata["items"])):
+            ref_code_name = f"{i}.ref_code"
+            items.append(
+                VoiceClonePromptItem(
+                    ref_code=f.get_tensor(ref_code_name) if ref_code_name in names else None,
+                    ref_spk_embedding=f.get_tensor(f"{i}.ref_spk_embedding"),
+                    x_vector_only_mode=fields["x_vector_only_mode"],
+                    icl_mode=fields["icl_mode"],
+                    ref_text=fields["ref_text"],
+                )
+            )
+    return items
+
+
+def _load_legacy_voice_clone_prompt(path: str, device: str) -> List[VoiceClonePromptItem]:
+    payload = torch.load(path, map_location=str(device), weights_only=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get("items"), list) or not payload["items"]:
+        raise ValueError(f"{path} is not a voice clone prompt file.")
+    items = []
+    for fields in payload["items"]:
+        if not isinstance(fields, dict) or fields.get("ref_spk_embedding") is None:
+            raise ValueError(f"{path} holds an invalid voice clone prompt item.")
+        ref_code = fields.get("ref_code")
+        x_vector_only_mode = bool(fields.get("x_vector_only_mode", False))
+        items.append(
+            VoiceClonePromptItem(
+                ref_code=None if ref_code is None else torch.as_tensor(ref_code, device=device),
+                ref_spk_embedding=torch.as_tensor(fields["ref_spk_embedding"], device=device),
+                x_vector_only_mode=x_vector_only_mode,
+                icl_mode=bool(fields.get("icl_mode", not x_vector_only_mode)),
+                ref_text=fields.get("ref_text"),
+            )
+        )
+    return items
+
+
+def _to_cpu(item: VoiceClonePromptItem) -> VoiceClonePromptItem:
+    return replace(
+        item,
+        ref_code=None if item.ref_code is None else item.ref_code.detach().cpu(),
+        ref_spk_embedding=item.ref_spk_embedding.detach().cpu(),
+    )
+
+
+class VoicePromptStore:
+    """
+    Content-addressed cache of voice-clone prompts.
+
+    A prompt is identified by a hash of the decoded reference audio samples and sample rate, the reference text,
+    `x_vector_only_mode` and the model id, so the same voice is recognised whatever path, URL or base64 string it
+    was given as. Prompts live in an in-memory LRU and, when `root_dir` is set, in one safetensors file per key under
+    `root_dir`, which outlives the process and is memory-mapped on load. Stored and returned tensors are always on
+    the CPU, whichever layer a prompt comes from; the model moves them to its device when they are used.
+
+    Pass it to `Qwen3TTSModel.create_voice_clone_prompt(..., prompt_store=store)`: only references missing from the
+    store go through the speech tokenizer and the speaker encoder.
+    """
+
+    def __init__(self, root_dir: Optional[str] = None, max_items: int = 1024):
+        """
+        Args:
+            root_dir (Optional[str]):
+                Directory of the on-disk layer. `None` keeps the store in memory only.
+            max_items (int, default=1024):
+                Number of prompts kept in memory; the least recently used one is dropped first.
+        """
+        self.root_dir = root_dir
+        self.max_items = max_items
+        self.items: "OrderedDict[str, VoiceClonePromptItem]" = OrderedDict()
+        if root_dir is not None:
+            os.makedirs(root_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(
+        wav: np.ndarray,
+        sr: int,
+        ref_text: Optional[str],
+        x_vector_only_mode: bool,
+        model_id: str = "",
+    ) -> str:
+        h = hashlib.sha256()
+        h.update(np.ascontiguousarray(wav, dtype=np.float32).tobytes())
+        h.update(json.dumps([int(sr), ref_text, bool(x_vector_only_mode), model_id]).encode("utf-8"))
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root_dir, f"{key}.safetensors")
+
+    def get(self, key: str) -> Optional[VoiceClonePromptItem]:
+        if key in self.items:
+            self.items.move_to_end(key)
+            return self.items[key]
+        if self.root_dir is None or not os.path.exists(self._path(key)):
+            return None
+        item = load_voice_clone_prompt(self._path(key))[0]
+        self._insert(key, item)
+        return item
+
+    def put(self, key: str, item: VoiceClonePromptItem, metadata: Optional[Dict[str, str]] = None) -> None:
+        item = _to_cpu(item)
+        self._insert(key, item)
+        if self.root_dir is not None:
+            save_voice_clone_prompt([item], self._path(key), metadata=metadata)
+
+    def _insert(self, key: str, item: VoiceClonePromptItem) -> None:
+        self.items[key] = item
+        self.items.move_to_end(key)
+        while len(self.items) > self.max_items:
+            self.items.popitem(last=False)
+
+    def keys(self) -> List[str]:
+        """
+        Keys of all stored prompts, on disk and in memory.
+        """
+        keys = list(self.items.keys())
+        if self.root_dir is not None:
+            names = os.listdir(self.root_dir)
+            on_disk = [name[: -len(".safetensors")] for name in names if name.endswith(".safetensors")]
+            keys += [key for key in sorted(on_disk) if key not in self.items]
+        return keys
+
+    def preload(self, keys: Optional[Iterable[str]] = None) -> int:
+        """
+        Load prompts from disk into the memory layer, e.g. a whole voice catalog at startup.
+
+        Args:
+            keys (Optional[Iterable[str]]):
+                Keys to load; all files under `root_dir` by default. At most `max_items` are kept.
+
+        Returns:
+            int: number of prompts loaded.
+        """
+        keys = self.keys() if keys is None else list(keys)
+        loaded = 0
+        for key in keys[: self.max_items]:
+            if self.get(key) is not None:
+                loaded += 1
+        return loaded
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.items or (self.root_dir is not None and os.path.exists(self._path(key)))
+
+    def __len__(self) -> int:
+        return len(self.keys())
@@ -1,10 +1,46 @@
 import os
+import queue
+import threading
 import torch
 import soundfile as sf
 import numpy as np
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Callable
 from qwen_tts import Qwen3TTSModel, VoiceClonePromptItem
 
+
+class BackgroundWriter:
+    """Run file writes (and the final merge) on a worker thread, in submission order.
+
+    A failing task does not stop the thread; it is recorded in `errors` as `(fn, args, exception)`.
+    """
+
+    def __init__(self):
+        self.tasks = queue.Queue()
+        self.errors: List[Tuple[Callable, tuple, Exception]] = []
+        self.thread = threading.Thread(target=self._run, name="dialogue_writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        self.tasks.put((fn, args, kwargs))
+
+    def close(self):
+        """Wait until all submitted tasks are done and stop the thread."""
+        self.tasks.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                break
+            fn, args, kwargs = task
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                print(f"Error in background writer: {e}")
+                self.errors.append((fn, args, e))
+
+
 class BatchDialogueSynthesizer:
     def __init__(
         self, 
@@ -39,50 +75,108 @@ class BatchDialogueSynthesizer:
         self, 
         dialogues: List[Dict[str, Any]], 
         output_dir: str,
-        default_lang: str = "Chinese"
+        default_lang: str = "Chinese",
+        batch_size: int = 8,
+        merger=None,
+        merge_path: Optional[str] = None,
     ) -> Tuple[List[str], List[Dict[str, Any]]]:
         """Synthesize each dialogue line and save to wav files. Intermediate segments are preserved.
-        
+
+        Lines are sorted by text length and synthesized in batches of up to `batch_size`, mixing speakers in one
+        batch through per-line voice clone prompts. Wav files are written on a background thread while the next
+        batch is generated. If a batch fails, its lines are retried one by one, so an error only drops the line
+        that caused it. Lines whose wav file could not be written are dropped the same way.
+
+        Args:
+            batch_size: Maximum number of lines per batch, at least 1.
+            merger: Optional `AudioMerger`; when given together with `merge_path`, the generated files are merged
+                on the background thread once all of them are written. Raises `RuntimeError` if the merge fails.
+
         Returns:
-            Tuple of (generated_files, dialogue_info) where dialogue_info contains metadata for each file
+            Tuple of (generated_files, dialogue_info) in the original line order, where dialogue_info contains
+            metadata for each file
         """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
         os.makedirs(output_dir, exist_ok=True)
-        generated_files = []
-        dialogue_info = []
+        output_paths: Dict[int, str] = {}
 
+        pending = []
         for i, line in enumerate(dialogues):
-            role = line["role"]
-            text = line["text"]
-            lang = line.get("language") or default_lang
-            
-            print(f"[{i+1}/{len(dialogues)}] Generating audio for {role}: {text[:30]}...")
-            
-            # Use cached prompt
-            prompt = self.prompts.get(role)
-            if not prompt:
-                raise ValueError(f"No prompt prepared for role: {role}")
+            if not self.prompts.get(line["role"]):
+                raise ValueError(f"No prompt prepared for role: {line['role']}")
+            pending.append(i)
+        # similar lengths in one batch keep padding and early-finished rows low
+        pending.sort(key=lambda i: len(dialogues[i]["text"]), reverse=True)
+        batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
 
-            try:
-                wavs, sr = self.tts.generate_voice_clone(
-                    text=text,
-                    language=lang,
-                    voice_clone_prompt=prompt
-                )
-                
-                # Filename logic: include index and role. If it's a segment, add seg suffix.
-                if line.get("is_segment"):
-                    # Use original line index if possible, but for simplicity we use loop index
-                    # Actually, a better way would be to track original indices.
-                    # For now, i is unique enough.
-                    filename = f"{i:04d}_{role}_part{line.get('segment_idx', 0)}.wav"
-                else:
-                    filename = f"{i:04d}_{role}.wav"
-                
-                output_path = os.path.join(output_dir, filename)
-                sf.write(output_path, wavs[0], sr)
-                generated_files.append(output_path)
-                dialogue_info.append(line)  # Store dialogue metadata
-            except Exception as e:
-                print(f"Error synthesizing line {i}: {e}")
-        
-        return generated_files, dialogue_info
+        writer = BackgroundWriter()
+        done = 0
+        try:
+            for batch in batches:
+                print(f"[{done + len(batch)}/{len(dialogues)}] Generating {len(batch)} lines...")
+                try:
+                    results = self._generate(dialogues, batch, default_lang)
+                except Exception as e:
+                    if len(batch) == 1:
+                        print(f"Error synthesizing line {batch[0]}: {e}")
+                        results = []
+                    else:
+                        print(f"Error synthesizing batch, retrying its lines one by one: {e}")
+                        results = []
+                        for i in batch:
+                            try:
+                                results += self._generate(dialogues, [i], default_lang)
+                            except Exception as line_error:
+                                print(f"Error synthesizing line {i}: {line_error}")
+
+                for i, wav, sr in results:
+                    output_path = os.path.join(output_dir, self._filename(i, dialogues[i]))
+                    writer.submit(sf.write, output_path, wav, sr)
+                    output_paths[i] = output_path
+                done += len(batch)
+
+            if merger is not None and merge_path is not None and output_paths:
+                # runs on the writer thread after every write, so it can leave out the files that failed
+                def merge_written():
+                    files, info = self._written_files(output_paths, dialogues, writer)
+                    if files:
+                        merger.merge(files, merge_path, dialogue_info=info)
+
+                writer.submit(merge_written)
+        finally:
+            writer.close()
+
+        merge_errors = [error for fn, _, error in writer.errors if fn is not sf.write]
+        if merge_errors:
+            raise RuntimeError(f"Failed to merge the generated files into {merge_path}") from merge_errors[0]
+        for _, args, _ in writer.errors:
+            print(f"Dropping {args[0]}, it could not be written")
+        return self._written_files(output_paths, dialogues, writer)
+
+    @staticmethod
+    def _written_files(
+        output_paths: Dict[int, str], dialogues: List[Dict[str, Any]], writer: BackgroundWriter
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Generated files whose write succeeded, with their dialogue lines, in the original line order."""
+        failed = {args[0] for fn, args, _ in writer.errors if fn is sf.write}
+        written = [i for i in sorted(output_paths) if output_paths[i] not in failed]
+        return [output_paths[i] for i in written], [dialogues[i] for i in written]
+
+    def _generate(self, dialogues: List[Dict[str, Any]], indices: List[int], default_lang: str) -> List[Tuple[int, np.ndarray, int]]:
+        lines = [dialogues[i] for i in indices]
+        for i, line in zip(indices, lines):
+            print(f"  line {i + 1}, {line['role']}: {line['text'][:30]}...")
+        wavs, sr = self.tts.generate_voice_clone(
+            text=[line["text"] for line in lines],
+            language=[line.get("language") or default_lang for line in lines],
+            voice_clone_prompt=[self.prompts[line["role"]][0] for line in lines],
+        )
+        return [(i, wav, sr) for i, wav in zip(indices, wavs)]
+
+    @staticmethod
+    def _filename(i: int, line: Dict[str, Any]) -> str:
+        # Filename logic: include the line index and role. If it's a segment, add seg suffix.
+        if line.get("is_segment"):
+            return f"{i:04d}_{line['role']}_part{line.get('segment_idx', 0)}.wav"
+        return f"{i:04d}_{line['role']}.wav"
@@ -16,6 +16,7 @@ def main():
     parser.add_argument("--merge", action="store_true", help="Merge generated clips into one file (original clips are kept)")
     parser.add_argument("--silence", type=int, default=500, help="Silence duration (ms) between clips when merging")
     parser.add_argument("--max-chars", type=int, default=100, help="Max characters per synthesis segment (default 100)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Lines synthesized together in one batch (default 8)")
 
     args = parser.parse_args()
 
@@ -55,21 +56,23 @@ def main():
     )
     synthesizer.prepare_speakers(speakers)
     
+    # 4. Merge if requested, done by the synthesizer's writer thread once all clips are written
+    merger, merge_path = None, None
+    if args.merge:
+        merger = AudioMerger(silence_duration_ms=args.silence)
+        output_name = metadata.get("title", "combined_dialogue").replace(" ", "_") + ".wav"
+        merge_path = os.path.join(args.output_dir, output_name)
+
     print("Step 4: Starting batch synthesis...")
-    generated_files = synthesizer.synthesize(
+    generated_files, dialogue_info = synthesizer.synthesize(
         processed_dialogues, 
         args.output_dir,
-        default_lang=default_lang
+        default_lang=default_lang,
+        batch_size=args.batch_size,
+        merger=merger,
+        merge_path=merge_path,
     )
 
-    # 4. Merge if requested
-    if args.merge and generated_files:
-        print("Step 5: Merging audio files into single track...")
-        merger = AudioMerger(silence_duration_ms=args.silence)
-        output_name = metadata.get("title", "combined_dialogue").replace(" ", "_") + ".wav"
-        output_path = os.path.join(args.output_dir, output_name)
-        merger.merge(generated_files, output_path)
-
     print("\nBatch synthesis completed successfully!")
     print(f"Intermediate segments and final result (if merged) are in: {os.path.abspath(args.output_dir)}")
 
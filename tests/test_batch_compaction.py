@@ -0,0 +1,23 @@
+import pytest
+import torch
+
+from tiny_models import tiny_prompt, tiny_tts, voice_clone_inputs
+
+TEXTS = ["abc def", "ghij klmnop qrs tuv", "t"]
+
+
+@pytest.fixture(scope="module")
+def tts():
+    return tiny_tts()
+
+
+def test_batched_generate_matches_single_samples(tts):
+    # finished rows are dropped from the batch mid-generation; the survivors must not notice
+    prompts = [tiny_prompt(8, seed=0), tiny_prompt(12, seed=1), tiny_prompt(8, seed=2, icl=False)]
+    inputs = voice_clone_inputs(tts, TEXTS, prompts)
+    kwargs = tts._merge_generate_kwargs(do_sample=False, subtalker_dosample=False, max_new_tokens=60)
+    codes, _ = tts.model.generate(**inputs, **kwargs)
+    assert len({len(c) for c in codes}) > 1
+    for i, batched in enumerate(codes):
+        single, _ = tts.model.generate(**tts._select_model_inputs(inputs, [i]), **kwargs)
+        assert torch.equal(single[0], batched)
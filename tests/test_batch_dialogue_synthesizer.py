@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from scripts.batch_dialogue_tts.audio_merger import AudioMerger
+from scripts.batch_dialogue_tts.batch_synthesizer import BatchDialogueSynthesizer
+
+SR = 8000
+DIALOGUES = [
+    {"role": "a", "text": "first line"},
+    {"role": "b", "text": "second, longer line"},
+    {"role": "a", "text": "third"},
+]
+
+
+class FakeTTS:
+    """One second of silence per line; the text length sets the amplitude."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def generate_voice_clone(self, text, language, voice_clone_prompt):
+        self.batch_sizes.append(len(text))
+        return [np.full(SR, len(t) / 100, dtype=np.float32) for t in text], SR
+
+
+def synthesizer():
+    synth = BatchDialogueSynthesizer.__new__(BatchDialogueSynthesizer)
+    synth.tts = FakeTTS()
+    synth.prompts = {"a": [object()], "b": [object()]}
+    return synth
+
+
+@pytest.mark.parametrize("batch_size", [0, -1])
+def test_non_positive_batch_size_is_rejected(tmp_path, batch_size):
+    with pytest.raises(ValueError):
+        synthesizer().synthesize(DIALOGUES, str(tmp_path), batch_size=batch_size)
+
+
+def test_lines_are_batched_and_merged(tmp_path):
+    synth = synthesizer()
+    merge_path = str(tmp_path / "merged.wav")
+    files, info = synth.synthesize(
+        DIALOGUES, str(tmp_path), batch_size=2, merger=AudioMerger(silence_duration_ms=0), merge_path=merge_path
+    )
+    assert synth.tts.batch_sizes == [2, 1]
+    assert info == DIALOGUES
+    assert [sf.read(path)[0][0] for path in files] == pytest.approx([0.1, 0.19, 0.05], abs=1e-3)
+    assert len(sf.read(merge_path)[0]) == 3 * SR
+
+
+def test_failed_writes_are_dropped_before_merging(tmp_path):
+    # a directory in place of the second line's wav makes its write fail
+    os.makedirs(tmp_path / BatchDialogueSynthesizer._filename(1, DIALOGUES[1]))
+    merge_path = str(tmp_path / "merged.wav")
+    files, info = synthesizer().synthesize(
+        DIALOGUES, str(tmp_path), batch_size=8, merger=AudioMerger(silence_duration_ms=0), merge_path=merge_path
+    )
+    assert info == [DIALOGUES[0], DIALOGUES[2]]
+    assert [os.path.basename(path) for path in files] == ["0000_a.wav", "0002_a.wav"]
+    assert len(sf.read(merge_path)[0]) == 2 * SR
+
+
+def test_failed_merge_raises(tmp_path):
+    os.makedirs(tmp_path / "merged.wav")
+    with pytest.raises(RuntimeError):
+        synthesizer().synthesize(
+            DIALOGUES, str(tmp_path), merger=AudioMerger(), merge_path=str(tmp_path / "merged.wav")
+        )
@@ -0,0 +1,88 @@
+import pytest
+import torch
+from transformers.cache_utils import DynamicCache
+
+from qwen_tts.engine import BlockKVCache
+
+NUM_LAYERS, NUM_HEADS, HEAD_DIM = 2, 2, 4
+
+
+def new_cache(**kwargs):
+    kwargs.setdefault("block_size", 4)
+    return BlockKVCache(num_layers=NUM_LAYERS, **kwargs)
+
+
+def update(cache, states):
+    return [cache.update(layer_states, -layer_states, layer_idx) for layer_idx, layer_states in enumerate(states)]
+
+
+def random_states(batch_size, num_tokens):
+    return [torch.randn(batch_size, NUM_HEADS, num_tokens, HEAD_DIM) for _ in range(NUM_LAYERS)]
+
+
+def test_update_matches_dynamic_cache_and_grows_by_block():
+    torch.manual_seed(0)
+    cache, reference = new_cache(), DynamicCache()
+    data_ptrs = []
+    for num_tokens in [7] + [1] * 6:
+        states = random_states(3, num_tokens)
+        for (keys, values), (expected_keys, expected_values) in zip(update(cache, states), update(reference, states)):
+            assert torch.equal(keys, expected_keys) and torch.equal(values, expected_values)
+        data_ptrs.append(cache.layers[0].keys.data_ptr())
+        assert cache.get_seq_length() == reference.get_seq_length()
+    # 7 tokens take two blocks, the buffers are reallocated once the 9th token needs a third one
+    assert [cache.layers[0].capacity, cache.get_seq_length()] == [16, 13]
+    assert data_ptrs[0] == data_ptrs[1] and data_ptrs[1] != data_ptrs[2] and len(set(data_ptrs[2:])) == 2
+    usage = cache.usage()
+    assert usage.num_blocks == 3 * 4 and usage.num_used_blocks == 3 * 4 and usage.num_tokens == 3 * 13
+
+
+def test_select_and_append_rows_keep_the_left_padded_layout():
+    torch.manual_seed(0)
+    cache, joining = new_cache(), new_cache()
+    states, joining_states = random_states(3, 6), random_states(2, 9)
+    update(cache, states)
+    update(joining, joining_states)
+
+    # drop row 1 and the first two columns, then append two rows longer than the rest
+    cache.batch_select_indices(torch.tensor([0, 2]), start=2)
+    cache.append_rows(joining)
+    assert cache.get_seq_length() == 9 and cache.layers[0].batch_size == 4
+    for layer_idx, layer in enumerate(cache.layers):
+        expected = torch.zeros(4, NUM_HEADS, 9, HEAD_DIM)
+        expected[:2, :, 5:] = states[layer_idx][[0, 2], :, 2:]
+        expected[2:] = joining_states[layer_idx]
+        torch.testing.assert_close(layer.keys[:, :, :9], expected)
+        torch.testing.assert_close(layer.values[:, :, :9], -expected)
+
+    attention_mask = torch.ones(4, 9, dtype=torch.long)
+    attention_mask[:2, :5] = 0
+    usage = cache.usage(attention_mask)
+    assert usage.num_sequences == 4 and usage.num_tokens == 2 * 4 + 2 * 9
+    assert usage.num_used_blocks == 2 * 1 + 2 * 3 and usage.num_blocks == 4 * 3
+
+
+def test_cache_refuses_to_grow_past_its_cap():
+    cache = new_cache(max_num_blocks=6)
+    assert cache.can_allocate(3, 8) and not cache.can_allocate(3, 9)
+    update(cache, random_states(3, 8))
+    with pytest.raises(RuntimeError, match="max_num_blocks"):
+        update(cache, random_states(3, 1))
+
+    cache = BlockKVCache.for_batch(type("Config", (), {"num_hidden_layers": NUM_LAYERS}), 3, 9, block_size=4)
+    assert cache.max_num_blocks == 9
+
+
+def test_crop_rewrites_the_dropped_columns():
+    torch.manual_seed(0)
+    cache, reference = new_cache(), DynamicCache()
+    for num_tokens, crop in [(6, None), (3, 7), (2, None)]:
+        states = random_states(2, num_tokens)
+        outputs = update(cache, states)
+        expected = update(reference, states)
+        for (keys, _), (expected_keys, _) in zip(outputs, expected):
+            assert torch.equal(keys, expected_keys)
+        if crop is not None:
+            cache.crop(crop)
+            reference.crop(crop)
+    assert cache.get_seq_length() == 9
@@ -0,0 +1,56 @@
+import torch
+
+from qwen_tts.core.tokenizer_25hz.vq.core_vq import DistributedGroupResidualVectorQuantization
+
+
+def _tiny_vq(num_groups=2, num_quantizers=3):
+    torch.manual_seed(0)
+    vq = DistributedGroupResidualVectorQuantization(
+        num_groups=num_groups, num_quantizers=num_quantizers, dim=32, codebook_size=64, codebook_dim=None,
+        kmeans_init=False, threshold_ema_dead_code=0.1,
+    )
+    with torch.no_grad():
+        for buf in vq.buffers():
+            if buf.is_floating_point():
+                buf.normal_()
+    return vq.eval()
+
+
+def _reference_encode(vq, x):
+    """Brute-force residual search, one group and one level at a time."""
+    indices = []
+    for mod, residual in zip(vq.rvqs, torch.chunk(x, vq.num_groups, dim=1)):
+        group = []
+        for i, layer in enumerate(mod.layers):
+            feats = layer.project_in(residual)
+            embed = mod.embed[i]
+            ind = torch.cdist(feats.reshape(-1, feats.shape[-1]), embed).argmin(-1).view(feats.shape[:-1])
+            residual = residual - layer.project_out(embed[ind])
+            group.append(ind)
+        indices.append(torch.stack(group, dim=0))
+    return torch.stack(indices, dim=1)
+
+
+def test_encode_under_inference_mode_matches_reference():
+    with torch.inference_mode():
+        vq = _tiny_vq()
+        x = torch.randn(2, 20, 32)
+        first = vq.encode(x)
+        second = vq.encode(x)
+    assert torch.equal(first, second)
+    assert torch.equal(first, _reference_encode(vq, x))
+
+
+def test_search_cache_follows_state_dict_load():
+    vq = _tiny_vq()
+    x = torch.randn(2, 20, 32)
+    with torch.inference_mode():
+        vq.encode(x)
+    other = _tiny_vq()
+    with torch.no_grad():
+        for buf in other.buffers():
+            if buf.is_floating_point():
+                buf.normal_()
+    vq.load_state_dict(other.state_dict())
+    with torch.inference_mode():
+        assert torch.equal(vq.encode(x), _reference_encode(vq, x))
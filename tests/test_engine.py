@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import torch
+
+from qwen_tts.engine import Qwen3TTSEngine
+from tiny_models import tiny_prompt, tiny_tts
+
+TEXTS = ["abc def", "ghij klmnop qrs", "t", "uvw xyz abc def ghi", "hello", "a b c d e f"]
+GENERATE_KWARGS = dict(do_sample=False, subtalker_dosample=False, max_new_tokens=40)
+
+
+@pytest.fixture(scope="module")
+def tts():
+    return tiny_tts()
+
+
+@pytest.fixture(scope="module")
+def prompts():
+    return [tiny_prompt(8 + i, seed=i, icl=i % 2 == 0) for i in range(len(TEXTS))]
+
+
+@pytest.fixture(scope="module")
+def expected(tts, prompts):
+    """Codes and waveform of every request generated on its own."""
+    results = []
+    for text, prompt in zip(TEXTS, prompts):
+        inputs = tts._prepare_voice_clone_inputs(text=text, language="English", voice_clone_prompt=[prompt])
+        codes, _ = tts.model.generate(**inputs, **tts._merge_generate_kwargs(**GENERATE_KWARGS))
+        wavs, _ = tts._decode_talker_codes(codes, inputs["voice_clone_prompt"]["ref_code"])
+        results.append((codes[0], wavs[0]))
+    return results
+
+
+def run_engine(engine, prompts, texts=TEXTS):
+    ids = [engine.add_request(text=t, language="English", voice_clone_prompt=[p]) for t, p in zip(texts, prompts)]
+    outputs = {output.request_id: output for output in engine.run()}
+    assert not engine.has_unfinished_requests()
+    return [outputs[request_id] for request_id in ids]
+
+
+@pytest.mark.parametrize("max_batch_size", [1, 3, 16])
+def test_engine_matches_generate(tts, prompts, expected, max_batch_size):
+    engine = Qwen3TTSEngine(tts, max_batch_size=max_batch_size, block_size=4, **GENERATE_KWARGS)
+    outputs = run_engine(engine, prompts)
+    assert len({len(codes) for codes, _ in expected}) > 1
+    for output, (codes, wav) in zip(outputs, expected):
+        assert torch.equal(output.audio_codes, codes)
+        np.testing.assert_allclose(output.wav, wav, atol=1e-5)
+    # every retired sequence gave its blocks back
+    assert engine.kv_cache_usage().num_blocks == 0
+
+
+def test_engine_with_prefix_cache_matches_generate(tts, prompts, expected):
+    tts.enable_prefix_cache()
+    try:
+        engine = Qwen3TTSEngine(tts, max_batch_size=2, block_size=4, **GENERATE_KWARGS)
+        # every voice twice: the second request copies the prefix the first one left in the prefix cache
+        outputs = run_engine(engine, prompts * 2, TEXTS * 2)
+    finally:
+        tts.disable_prefix_cache()
+    for output, (codes, _) in zip(outputs, expected * 2):
+        assert torch.equal(output.audio_codes, codes)
+    assert engine.kv_cache_usage().num_sequences == 0
+
+
+def test_engine_caps_the_kv_cache(tts, prompts, expected):
+    # far less than all six requests need at once: admitting them greedily would run out of blocks mid-generation
+    engine = Qwen3TTSEngine(tts, max_batch_size=16, block_size=4, max_num_kv_blocks=64, **GENERATE_KWARGS)
+    ids = [engine.add_request(text=t, language="English", voice_clone_prompt=[p]) for t, p in zip(TEXTS, prompts)]
+    outputs, num_running = {}, []
+    while engine.has_unfinished_requests():
+        outputs.update((output.request_id, output) for output in engine.step())
+        num_running.append(engine.num_running_requests())
+        assert engine.kv_cache_usage().num_blocks <= 64
+    assert 1 < max(num_running) < len(TEXTS)
+    for request_id, (codes, _) in zip(ids, expected):
+        assert torch.equal(outputs[request_id].audio_codes, codes)
+
+    with pytest.raises(ValueError, match="max_num_kv_blocks"):
+        engine.add_request(text=TEXTS[0], language="English", voice_clone_prompt=[prompts[0]], max_new_tokens=4096)
+
+
+def test_engine_prefills_admitted_requests_together(tts, prompts, expected, monkeypatch):
+    talker, prefill_batch_sizes = tts.model.talker, []
+    forward = talker.forward
+
+    def recording_forward(*args, **kwargs):
+        if kwargs.get("inputs_embeds") is not None:
+            prefill_batch_sizes.append(kwargs["inputs_embeds"].shape[0])
+        return forward(*args, **kwargs)
+
+    monkeypatch.setattr(talker, "forward", recording_forward)
+    tts.enable_prefix_cache()
+    try:
+        engine = Qwen3TTSEngine(tts, max_batch_size=4, block_size=4, **GENERATE_KWARGS)
+        outputs = run_engine(engine, prompts)
+    finally:
+        tts.disable_prefix_cache()
+    assert prefill_batch_sizes[0] == 4 and sum(prefill_batch_sizes) == len(TEXTS)
+    for output, (codes, _) in zip(outputs, expected):
+        assert torch.equal(output.audio_codes, codes)
@@ -0,0 +1,78 @@
+import pytest
+import torch
+
+from tiny_models import tiny_prompt, tiny_tts, voice_clone_inputs
+
+TEXTS = ["abc def", "ghij klmnop qrs tuv", "t"]
+
+
+@pytest.fixture()
+def tts():
+    return tiny_tts()
+
+
+def voice_clone_codes(tts, non_streaming_mode, stream=False, use_static_cache=False):
+    prompts = [tiny_prompt(8, seed=0), tiny_prompt(12, seed=1), tiny_prompt(8, seed=2, icl=False)]
+    inputs = voice_clone_inputs(tts, TEXTS, prompts)
+    kwargs = tts._merge_generate_kwargs(do_sample=False, subtalker_dosample=False, max_new_tokens=30)
+    if stream:
+        frames = tts.model.stream_generate(
+            **inputs, non_streaming_mode=non_streaming_mode, use_static_cache=use_static_cache, **kwargs
+        )
+        return list(torch.stack(list(frames), 1))
+    return tts.model.generate(**inputs, non_streaming_mode=non_streaming_mode, **kwargs)[0]
+
+
+def assert_codes_equal(actual, expected):
+    assert len(actual) == len(expected)
+    for a, b in zip(actual, expected):
+        assert torch.equal(a, b)
+
+
+@pytest.mark.parametrize("non_streaming_mode", [False, True])
+def test_generate_with_prefix_cache_matches_without(tts, tmp_path, non_streaming_mode):
+    expected = voice_clone_codes(tts, non_streaming_mode)
+
+    tts.enable_prefix_cache(cache_dir=str(tmp_path))
+    assert_codes_equal(voice_clone_codes(tts, non_streaming_mode), expected)   # miss
+    assert len(tts.model.talker_prefix_cache) == 3
+    assert_codes_equal(voice_clone_codes(tts, non_streaming_mode), expected)   # memory hit
+
+    tts.enable_prefix_cache(cache_dir=str(tmp_path))
+    assert_codes_equal(voice_clone_codes(tts, non_streaming_mode), expected)   # disk hit
+
+
+@pytest.mark.parametrize("use_static_cache", [False, True])
+def test_stream_generate_with_prefix_cache_matches_without(tts, use_static_cache):
+    expected = voice_clone_codes(tts, False, stream=True)
+    tts.enable_prefix_cache()
+    for _ in range(2):
+        assert_codes_equal(voice_clone_codes(tts, False, stream=True, use_static_cache=use_static_cache), expected)
+
+
+def test_shared_cache_dir_keeps_checkpoints_apart(tts, tmp_path):
+    other = tiny_tts(seed=1)
+    expected = voice_clone_codes(other, False)
+    tts.enable_prefix_cache(cache_dir=str(tmp_path))
+    voice_clone_codes(tts, False)
+    other.enable_prefix_cache(cache_dir=str(tmp_path))
+    assert_codes_equal(voice_clone_codes(other, False), expected)
+
+
+def test_prefix_keys_follow_the_prefix_inputs(tts):
+    tts.enable_prefix_cache()
+
+    def keys(language, prompt, non_streaming_mode=False):
+        inputs = tts._prepare_voice_clone_inputs(text="abc def", language=language, voice_clone_prompt=[prompt])
+        return tts.model._build_talker_inputs(
+            non_streaming_mode=non_streaming_mode, return_prefix_lens=True, **inputs
+        )[-1][0]
+
+    prompt = tiny_prompt(8, seed=0)
+    assert keys("English", prompt) == keys("English", tiny_prompt(8, seed=0))
+    assert keys("English", prompt) != keys("Chinese", prompt)
+    assert keys("English", prompt) != keys("English", prompt, non_streaming_mode=True)
+    assert keys("English", prompt) != keys("English", tiny_prompt(8, seed=1))
+    assert keys("English", tiny_prompt(seed=0, icl=False)) != keys("English", tiny_prompt(seed=1, icl=False))
+    tts.disable_prefix_cache()
+    assert keys("English", prompt) is None
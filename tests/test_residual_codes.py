@@ -0,0 +1,40 @@
+import itertools
+
+import torch
+
+from qwen_tts.core.models.modeling_qwen3_tts import Qwen3TTSResidualCodesCache
+from tiny_models import tiny_prompt, tiny_tts, voice_clone_inputs
+
+
+def test_reused_cache_matches_a_fresh_cache_per_frame():
+    code_predictor = tiny_tts().model.talker.code_predictor
+    cache = Qwen3TTSResidualCodesCache(code_predictor.config)
+    generator = torch.Generator().manual_seed(0)
+    # the batch shrinks and grows again, as in the engine
+    for batch_size in (3, 3, 1, 3, 2, 1):
+        inputs_embeds = torch.randn(batch_size, 2, 32, generator=generator)
+        codes, codec_embeds = code_predictor.generate_residual_codes(
+            inputs_embeds, do_sample=False, residual_codes_cache=cache
+        )
+        expected_codes, expected_embeds = code_predictor.generate_residual_codes(inputs_embeds, do_sample=False)
+        assert torch.equal(codes, expected_codes)
+        torch.testing.assert_close(codec_embeds, expected_embeds)
+    assert sorted(key[0] for key in cache.caches) == [1, 2, 3]
+
+
+def test_interleaved_generations_match_separate_runs():
+    tts = tiny_tts()
+    kwargs = tts._merge_generate_kwargs(do_sample=False, subtalker_dosample=False, max_new_tokens=40)
+    first = voice_clone_inputs(tts, ["abc def", "ghij klm"], [tiny_prompt(8, seed=0), tiny_prompt(12, seed=1)])
+    second = voice_clone_inputs(tts, ["nop qrs tuv"], [tiny_prompt(8, seed=2, icl=False)])
+    expected = [list(tts.model.stream_generate(**inputs, **kwargs)) for inputs in (first, second)]
+
+    # two generations on one model, frame by frame in turns, each with its own code predictor caches
+    streams = [tts.model.stream_generate(**inputs, **kwargs) for inputs in (first, second)]
+    frames = [[], []]
+    for pair in itertools.zip_longest(*streams):
+        for i, frame in enumerate(pair):
+            if frame is not None:
+                frames[i].append(frame)
+    for actual, reference in zip(frames, expected):
+        assert torch.equal(torch.stack(actual), torch.stack(reference))
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+import torch
+
+from qwen_tts.core.models.modeling_qwen3_tts import SpeakerMelFeatures, mel_spectrogram
+from tiny_models import tiny_model
+
+MEL_KWARGS = dict(n_fft=1024, num_mels=128, sampling_rate=24000, hop_size=256, win_size=1024, fmin=0, fmax=12000)
+# two pairs of equal lengths plus odd lengths that only share a bucket once padding is allowed
+AUDIO_LENGTHS = (24000, 6000, 24000, 17001, 9000, 6000, 1500)
+
+
+def random_audios(lengths=AUDIO_LENGTHS):
+    rng = np.random.default_rng(0)
+    return [(0.1 * rng.standard_normal(n)).astype(np.float32) for n in lengths]
+
+
+def test_batched_mel_spectrogram_matches_one_signal_at_a_time():
+    audios = [torch.from_numpy(audio) for audio in random_audios()]
+    mels, frame_lengths = SpeakerMelFeatures(**MEL_KWARGS).batch(audios)
+    for audio, mel, n in zip(audios, mels, frame_lengths.tolist()):
+        expected = mel_spectrogram(audio[None], **MEL_KWARGS)[0]
+        assert n == expected.shape[-1]
+        torch.testing.assert_close(mel[:, :n], expected, atol=1e-5, rtol=1e-5)
+
+
+@pytest.mark.parametrize("batch_size, max_padding_ratio", [(32, 0.0), (32, 0.5), (2, 10.0)])
+def test_batched_speaker_embeddings_match_one_by_one(batch_size, max_padding_ratio):
+    model = tiny_model()
+    audios = random_audios()
+    embeddings = model.extract_speaker_embeddings(
+        audios, 24000, batch_size=batch_size, max_padding_ratio=max_padding_ratio
+    )
+    assert len(embeddings) == len(audios)
+    for audio, embedding in zip(audios, embeddings):
+        # the unbatched extraction before bucketing was added
+        mels = mel_spectrogram(torch.from_numpy(audio)[None], **MEL_KWARGS).transpose(1, 2)
+        with torch.inference_mode():
+            expected = model.speaker_encoder(mels)[0]
+        torch.testing.assert_close(embedding, expected, atol=1e-4, rtol=1e-4)
@@ -0,0 +1,68 @@
+import pytest
+import torch
+
+from tiny_models import NUM_CODE_GROUPS, VOCAB_SIZE, tiny_model, tiny_prompt, tiny_tts, voice_clone_inputs
+
+TEXTS = ["abc def", "ghij klmnop qrs tuv", "t"]
+
+
+@pytest.fixture(scope="module")
+def tts():
+    return tiny_tts()
+
+
+@pytest.fixture(scope="module")
+def inputs(tts):
+    prompts = [tiny_prompt(8, seed=0), tiny_prompt(12, seed=1), tiny_prompt(8, seed=2, icl=False)]
+    return voice_clone_inputs(tts, TEXTS, prompts)
+
+
+@pytest.mark.parametrize("draft_seed", [0, 5])
+@pytest.mark.parametrize("num_draft_frames", [1, 3])
+@pytest.mark.parametrize("max_new_tokens", [60, 9])
+def test_greedy_speculative_matches_generate(tts, inputs, draft_seed, num_draft_frames, max_new_tokens):
+    # seed 0 drafts with the target's own weights, seed 5 with unrelated ones
+    draft = tiny_model(seed=draft_seed)
+    kwargs = tts._merge_generate_kwargs(do_sample=False, subtalker_dosample=False, max_new_tokens=max_new_tokens)
+    expected, _ = tts.model.generate(**inputs, **kwargs)
+    codes, hidden_states = tts.model.generate(**inputs, **kwargs, draft_model=draft, num_draft_frames=num_draft_frames)
+    assert hidden_states is None
+    if max_new_tokens == 60:
+        # the batch is ragged: sequences finish in different rounds
+        assert len({len(c) for c in expected}) > 1
+    for actual, reference in zip(codes, expected):
+        assert torch.equal(actual, reference)
+
+
+def _histograms(codes, num_frames):
+    counts = torch.zeros(num_frames, NUM_CODE_GROUPS, VOCAB_SIZE)
+    for frames in codes:
+        frames = frames[:num_frames]
+        counts[torch.arange(len(frames))[:, None], torch.arange(NUM_CODE_GROUPS), frames] += 1
+    return counts / counts.sum(-1, keepdim=True).clamp(min=1)
+
+
+def test_sampled_speculative_matches_generate_distribution(tts):
+    num_samples, num_frames = 2000, 2
+    inputs = voice_clone_inputs(tts, ["abc def"] * num_samples, [tiny_prompt(8, seed=2, icl=False)] * num_samples)
+    kwargs = tts._merge_generate_kwargs(
+        do_sample=True, subtalker_dosample=True, max_new_tokens=num_frames + 1, top_k=4, subtalker_top_k=4
+    )
+    draft = tiny_model(seed=5)
+
+    torch.manual_seed(0)
+    expected = _histograms(tts.model.generate(**inputs, **kwargs)[0], num_frames)
+    torch.manual_seed(1)
+    speculative = _histograms(
+        tts.model.generate(**inputs, **kwargs, draft_model=draft, num_draft_frames=2)[0], num_frames
+    )
+    torch.manual_seed(2)
+    drafted = _histograms(draft.generate(**inputs, **kwargs)[0], num_frames)
+
+    # total variation distance of every code's marginal distribution
+    speculative_tv = 0.5 * (speculative - expected).abs().sum(-1)
+    drafted_tv = 0.5 * (drafted - expected).abs().sum(-1)
+    # the draft alone is far off, so a speculative sampler that leaked its distribution would be caught
+    assert drafted_tv.max() > 0.3
+    # two runs of plain generate differ by about 0.07 at this sample size
+    assert speculative_tv.max() < 0.12
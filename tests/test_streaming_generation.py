@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import torch
+
+from tiny_models import EOS_TOKEN_ID, SPEAKER, tiny_model, tiny_prompt, tiny_tts, voice_clone_inputs
+
+TEXTS = ["abc def", "ghij klmnop qrs tuv", "t"]
+
+
+@pytest.fixture(scope="module")
+def tts():
+    return tiny_tts()
+
+
+@pytest.fixture(scope="module")
+def inputs(tts):
+    prompts = [tiny_prompt(8, seed=0), tiny_prompt(12, seed=1), tiny_prompt(8, seed=2, icl=False)]
+    return voice_clone_inputs(tts, TEXTS, prompts)
+
+
+@pytest.mark.parametrize("do_sample", [False, True])
+@pytest.mark.parametrize("use_static_cache", [False, True])
+@pytest.mark.parametrize("non_streaming_mode", [False, True])
+def test_stream_generate_matches_generate(tts, inputs, do_sample, use_static_cache, non_streaming_mode):
+    kwargs = tts._merge_generate_kwargs(do_sample=do_sample, subtalker_dosample=do_sample, max_new_tokens=60)
+    kwargs["non_streaming_mode"] = non_streaming_mode
+    if do_sample:
+        # `generate` drops finished rows, after which a batch draws different random numbers than the stream
+        inputs = tts._select_model_inputs(inputs, [0])
+    torch.manual_seed(0)
+    codes, _ = tts.model.generate(**inputs, **kwargs)
+    torch.manual_seed(0)
+    frames = torch.stack(list(tts.model.stream_generate(**inputs, **kwargs, use_static_cache=use_static_cache)), 1)
+    if not do_sample and not non_streaming_mode:
+        assert len({len(c) for c in codes}) > 1
+    for row, reference in zip(frames, codes):
+        assert torch.equal(row[: len(reference)], reference)
+        assert (row[len(reference) :, 0] == EOS_TOKEN_ID).all()
+
+
+def test_generate_with_speakers_and_languages():
+    model = tiny_model()
+    generator = torch.Generator().manual_seed(1)
+    inputs = dict(
+        input_ids=[torch.randint(0, 180, (1, n), generator=generator) for n in (12, 16)],
+        languages=["english", "auto"],
+        speakers=[SPEAKER, None],
+    )
+    kwargs = dict(max_new_tokens=20, do_sample=False, subtalker_dosample=False)
+    codes, _ = model.generate(**inputs, **kwargs)
+    frames = torch.stack(list(model.stream_generate(**inputs, **kwargs, use_static_cache=True)), 1)
+    for row, reference in zip(frames, codes):
+        assert torch.equal(row[: len(reference)], reference)
+
+
+@pytest.mark.parametrize("icl", [True, False])
+def test_stream_voice_clone_matches_generate_voice_clone(tts, icl):
+    prompt = [tiny_prompt(icl=icl)]
+    kwargs = dict(text="abc def", language="English", voice_clone_prompt=prompt, do_sample=False)
+    wavs, sr = tts.generate_voice_clone(**kwargs, subtalker_dosample=False)
+    chunks = list(tts.stream_voice_clone(**kwargs, subtalker_dosample=False, chunk_size=3))
+    assert len(chunks) > 1 and all(chunk_sr == sr for _, chunk_sr in chunks)
+    # chunked decoding only reorders float32 arithmetic in the vocoder
+    np.testing.assert_allclose(np.concatenate([chunk for chunk, _ in chunks]), wavs[0], atol=1e-5)
+
+
+def test_stream_voice_clone_rejects_batches(tts):
+    with pytest.raises(ValueError):
+        next(tts.stream_voice_clone(text=TEXTS[:2], language="English", voice_clone_prompt=[tiny_prompt()] * 2))
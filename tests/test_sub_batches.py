@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from qwen_tts import Qwen3TTSModel
+from tiny_models import tiny_prompt, tiny_tts
+
+plan = Qwen3TTSModel._plan_sub_batches
+
+
+def test_batch_within_the_default_budgets_is_one_call_in_input_order():
+    prompt_lens, output_lens = [10, 300, 40], [20, 400, 5]
+    assert plan(prompt_lens, output_lens, 32, 32 * 1024) == [[0, 1, 2]]
+    assert plan(prompt_lens, output_lens, None, None) == [[0, 1, 2]]
+    assert plan([], [], 32, 32 * 1024) == []
+
+
+def test_large_batches_are_split_longest_first():
+    prompt_lens = [10, 50, 30, 20, 40]
+    output_lens = [10, 50, 30, 20, 40]
+    assert plan(prompt_lens, output_lens, max_batch_size=2) == [[1, 4], [2, 3], [0]]
+    # two samples of the longest length cost 2 * 100 positions
+    assert plan(prompt_lens, output_lens, max_batch_tokens=200) == [[1, 4], [2, 3, 0]]
+    # a sample over the budget on its own still runs
+    assert plan(prompt_lens, output_lens, max_batch_tokens=50) == [[1], [4], [2], [3], [0]]
+
+
+def test_default_budget_splits_many_samples():
+    batches = plan([10] * 70, [10] * 70, 32, 32 * 1024)
+    assert [len(batch) for batch in batches] == [32, 32, 6]
+    assert sorted(i for batch in batches for i in batch) == list(range(70))
+
+
+def test_non_positive_batch_size_is_rejected():
+    with pytest.raises(ValueError):
+        plan([10, 20], [10, 20], max_batch_size=0)
+
+
+def test_sub_batched_generation_matches_one_batch():
+    tts = tiny_tts()
+    texts = ["abc def", "ghij klmnop qrs tuv", "t", "uvw xy"]
+    prompts = [tiny_prompt(8, seed=i, icl=i % 2 == 0) for i in range(len(texts))]
+    kwargs = dict(language="English", voice_clone_prompt=prompts, do_sample=False, subtalker_dosample=False)
+
+    expected, sr = tts.generate_voice_clone(text=texts, max_batch_size=None, max_batch_tokens=None, **kwargs)
+    actual, actual_sr = tts.generate_voice_clone(text=texts, max_batch_size=2, **kwargs)
+    assert actual_sr == sr
+    for wav, reference in zip(actual, expected):
+        np.testing.assert_allclose(wav, reference, atol=1e-4)
@@ -0,0 +1,44 @@
+import pytest
+import torch
+
+from tiny_models import SPEAKER, tiny_model
+
+WINDOW = 4
+MIXED = ["full_attention", "sliding_attention"]
+
+
+def sliding_model(layer_types, attn_implementation="sdpa"):
+    return tiny_model(
+        attn_implementation, eos_scale=0.0, use_sliding_window=True, sliding_window=WINDOW, layer_types=layer_types
+    )
+
+
+@pytest.mark.parametrize("layer_types,first_layer_sees_start", [(MIXED, True), (["sliding_attention"] * 2, False)])
+def test_forward_windows_only_sliding_layers(layer_types, first_layer_sees_start):
+    model = sliding_model(layer_types)
+    embeds = torch.randn(1, 3 * WINDOW, model.config.talker_config.hidden_size)
+    perturbed = embeds.clone()
+    perturbed[:, 0] += 1.0
+    with torch.no_grad():
+        hidden = [
+            model.talker.model(inputs_embeds=x, output_hidden_states=True).hidden_states[1] for x in (embeds, perturbed)
+        ]
+    assert torch.allclose(hidden[0][:, -1], hidden[1][:, -1]) != first_layer_sees_start
+
+
+@pytest.mark.parametrize("attn_implementation", ["sdpa", "eager"])
+@pytest.mark.parametrize("layer_types", [MIXED, ["sliding_attention"] * 2, ["full_attention"] * 2])
+def test_static_decode_step_matches_forward(attn_implementation, layer_types):
+    model = sliding_model(layer_types, attn_implementation)
+    generator = torch.Generator().manual_seed(1)
+    input_ids = [torch.randint(0, 180, (1, n), generator=generator) for n in (12, 5)]
+    kwargs = dict(
+        input_ids=input_ids, languages=["english", "auto"], speakers=[SPEAKER, None], max_new_tokens=3 * WINDOW,
+        do_sample=False, subtalker_dosample=False,
+    )
+    frames = {
+        static: torch.stack(list(model.stream_generate(**kwargs, use_static_cache=static)), 1)
+        for static in (False, True)
+    }
+    assert frames[True].shape[1] == 3 * WINDOW - 1
+    assert torch.equal(frames[True], frames[False])
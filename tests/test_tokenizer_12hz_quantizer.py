@@ -0,0 +1,51 @@
+import torch
+
+from qwen_tts.core.tokenizer_12hz.modeling_qwen3_tts_tokenizer_v2 import SplitResidualVectorQuantizer
+
+
+def _tiny_quantizer():
+    torch.manual_seed(0)
+    quantizer = SplitResidualVectorQuantizer(
+        dimension=8, n_q=4, n_q_semantic=1, bins=64, input_dimension=16, output_dimension=16,
+    )
+    with torch.no_grad():
+        for p in quantizer.parameters():
+            p.normal_()
+        for module in quantizer.modules():
+            if hasattr(module, "cluster_usage"):
+                module.cluster_usage.uniform_(0.5, 2.0)
+    return quantizer.eval()
+
+
+def _reference_decode(quantizer, codes):
+    """Level-by-level decode, as before the folded table."""
+    n = quantizer.n_q_semantic
+    return quantizer.rvq_first.decode(codes[:, :n]) + quantizer.rvq_rest.decode(codes[:, n:])
+
+
+def test_decode_under_inference_mode_matches_reference():
+    codes = torch.randint(0, 64, (2, 4, 15))
+    with torch.inference_mode():
+        quantizer = _tiny_quantizer()
+        first = quantizer.decode(codes)
+        second = quantizer.decode(codes)
+        expected = _reference_decode(quantizer, codes)
+    assert torch.equal(first, second)
+    torch.testing.assert_close(first, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_decode_table_follows_state_dict_load_and_cast():
+    codes = torch.randint(0, 64, (2, 4, 15))
+    quantizer = _tiny_quantizer()
+    with torch.inference_mode():
+        quantizer.decode(codes)
+    quantizer.load_state_dict(_tiny_quantizer().state_dict() | {
+        k: torch.randn_like(v) for k, v in quantizer.state_dict().items() if k.endswith("embedding_sum")
+    })
+    with torch.inference_mode():
+        torch.testing.assert_close(quantizer.decode(codes), _reference_decode(quantizer, codes), rtol=1e-5, atol=1e-5)
+    quantizer.double()
+    with torch.inference_mode():
+        out = quantizer.decode(codes)
+    assert out.dtype == torch.float64
+    torch.testing.assert_close(out, _reference_decode(quantizer, codes))
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+import torch
+
+from tiny_models import CODEBOOK_SIZE, NUM_CODE_GROUPS, tiny_speech_tokenizer, tiny_tokenizer_model
+
+
+def random_codes(*shape, seed=0):
+    return torch.randint(0, CODEBOOK_SIZE, shape, generator=torch.Generator().manual_seed(seed))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 33])
+def test_streaming_decoder_matches_one_pass(chunk_size):
+    decoder = tiny_tokenizer_model().decoder.double()
+    codes = random_codes(2, NUM_CODE_GROUPS, 100)
+    with torch.no_grad():
+        expected = decoder(codes)
+        state = decoder.init_streaming_state()
+        chunks = [decoder(codes[..., i : i + chunk_size], streaming_state=state) for i in range(0, 100, chunk_size)]
+    torch.testing.assert_close(torch.cat(chunks, dim=-1), expected)
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    tokenizer = tiny_speech_tokenizer()
+    tokenizer.model.double()
+    return tokenizer
+
+
+def test_decode_with_context_matches_decoding_the_context_tail(tokenizer):
+    upsample = int(tokenizer.model.get_decode_upsample_rate())
+    contexts = [random_codes(90, NUM_CODE_GROUPS, seed=1), random_codes(30, NUM_CODE_GROUPS, seed=2), None]
+    codes = [random_codes(n, NUM_CODE_GROUPS, seed=3 + n) for n in (40, 17, 25)]
+    wavs, _ = tokenizer.decode_with_context(codes, contexts, context_frames=72)
+    for context, frames, wav in zip(contexts, codes, wavs):
+        tail = context[-72:] if context is not None else frames[:0]
+        with torch.inference_mode():
+            full = tokenizer.model.streaming_decode(torch.cat([tail, frames])[None], return_dict=True).audio_values[0]
+        assert len(wav) == len(frames) * upsample
+        np.testing.assert_allclose(wav, full[len(tail) * upsample :].float().numpy(), atol=1e-5)
+
+    # a second call reuses the cached context states
+    again, _ = tokenizer.decode_with_context(codes[:1], contexts[:1], context_frames=72)
+    np.testing.assert_array_equal(again[0], wavs[0])
+
+
+def test_decode_streaming_matches_decode_with_context(tokenizer):
+    context = random_codes(50, NUM_CODE_GROUPS, seed=1)
+    codes = random_codes(23, NUM_CODE_GROUPS, seed=2)
+    expected, _ = tokenizer.decode_with_context([codes], [context])
+    chunks = list(tokenizer.decode_streaming(iter(codes), chunk_size=4, context_codes=context))
+    assert len(chunks) == 6
+    np.testing.assert_allclose(np.concatenate(chunks), expected[0], atol=1e-6)
@@ -0,0 +1,48 @@
+import pytest
+import torch
+
+from tiny_models import tiny_25hz_decoder, tiny_25hz_inputs
+
+
+@pytest.fixture(scope="module")
+def decoder():
+    return tiny_25hz_decoder()
+
+
+@pytest.mark.parametrize("solver, num_steps", [("euler", 4), ("midpoint", 3)])
+def test_chunked_forward_matches_full_forward(decoder, solver, num_steps):
+    code, conditioning, reference_mel = tiny_25hz_inputs()
+    with torch.inference_mode():
+        full = decoder(code, conditioning, reference_mel, num_steps=num_steps, solver=solver,
+                       generator=torch.Generator().manual_seed(2))
+        chunks = list(decoder.chunked_forward(code, conditioning, reference_mel, chunk_size=8, exact=True,
+                                              num_steps=num_steps, solver=solver,
+                                              generator=torch.Generator().manual_seed(2)))
+    assert len(chunks) > 1
+    chunked = torch.cat(chunks, dim=1)
+    assert chunked.shape == full.shape
+    torch.testing.assert_close(chunked, full, rtol=1e-5, atol=1e-5 * full.abs().max().item())
+
+
+def test_receptive_field_grows_with_passes(decoder):
+    look_backward, look_ahead = decoder.dit.receptive_field()
+    assert decoder.dit.receptive_field(3) == (3 * look_backward, 3 * look_ahead)
+
+
+def test_default_contexts_cover_one_forward_pass(decoder, monkeypatch):
+    code, conditioning, reference_mel = tiny_25hz_inputs()
+    windows = []
+    sample = decoder.dit.sample
+
+    def recording_sample(*args, **kwargs):
+        windows.append(args[2].shape[1])
+        return sample(*args, **kwargs)
+
+    monkeypatch.setattr(decoder.dit, "sample", recording_sample)
+    with torch.inference_mode():
+        full = decoder(code, conditioning, reference_mel, num_steps=4, generator=torch.Generator().manual_seed(2))
+        chunks = list(decoder.chunked_forward(code, conditioning, reference_mel, chunk_size=8, num_steps=4,
+                                              generator=torch.Generator().manual_seed(2)))
+    # one pass looks 2 blocks (of 4 codes) back and 1 ahead, whatever the number of solver steps
+    assert windows == [120, 8 + 4] + [8 + 8 + 4] * 13 + [8 + 8]
+    assert torch.cat(chunks, dim=1).shape == full.shape
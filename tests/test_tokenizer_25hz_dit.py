@@ -0,0 +1,128 @@
+import pytest
+import torch
+
+from qwen_tts.core.tokenizer_25hz.modeling_qwen3_tts_tokenizer_v1 import DIT_ODE_SOLVERS
+from tiny_models import tiny_25hz_decoder, tiny_25hz_inputs
+
+
+@pytest.fixture(scope="module")
+def dit():
+    return tiny_25hz_decoder().dit
+
+
+# 3 and 13 codes leave the last 8-frame block partly empty, 16 codes fill whole blocks
+@pytest.mark.parametrize("num_codes", [3, 13, 16])
+@pytest.mark.parametrize("guidance_scale", [0.5, 0.0])
+def test_block_sparse_attention_matches_dense_attention(dit, monkeypatch, num_codes, guidance_scale):
+    code, conditioning, reference_mel = tiny_25hz_inputs(num_codes)
+    initial_state = dit.sample_noise(code.shape[0], num_codes * dit.repeats, generator=torch.Generator().manual_seed(2))
+    outputs = {}
+    for block_sparse_attention in (True, False):
+        monkeypatch.setattr(dit.config, "block_sparse_attention", block_sparse_attention)
+        outputs[block_sparse_attention] = dit.sample(
+            conditioning, reference_mel, code, num_steps=4, guidance_scale=guidance_scale, initial_state=initial_state
+        )
+    torch.testing.assert_close(outputs[True], outputs[False], rtol=1e-5, atol=1e-5 * outputs[False].abs().max().item())
+
+
+def baseline_sample(dit, conditioning_vector, reference_mel, code, initial_state, num_steps, guidance_scale,
+                    sway_coefficient=-1.0):
+    """The Euler loop of `sample` before the ODE solvers, calling the full DiT forward at every step."""
+    maximum_duration = code.shape[1] * dit.repeats
+    conditioning_vector = conditioning_vector.unsqueeze(1).repeat(1, maximum_duration, 1)
+
+    def ode_function(time_step, hidden_states):
+        model_output = dit(
+            hidden_states=hidden_states,
+            speaker_embedding=conditioning_vector,
+            condition_vector=reference_mel,
+            quantized_code=code,
+            time_step=time_step,
+            apply_cfg=True,
+        )
+        guided_prediction, null_prediction = torch.chunk(model_output, 2, dim=0)
+        return guided_prediction + (guided_prediction - null_prediction) * guidance_scale
+
+    time_embedding = torch.linspace(0, 1, num_steps, dtype=conditioning_vector.dtype)
+    time_embedding += sway_coefficient * (torch.cos(torch.pi / 2 * time_embedding) - 1 + time_embedding)
+    values = initial_state.clone()
+    for time_start, time_end in zip(time_embedding[:-1], time_embedding[1:]):
+        values = values + ode_function(time_start, values) * (time_end - time_start)
+    return values.permute(0, 2, 1)
+
+
+@pytest.mark.parametrize("num_codes", [13, 16])
+def test_euler_solver_reproduces_the_baseline_loop(dit, num_codes):
+    code, conditioning, reference_mel = tiny_25hz_inputs(num_codes)
+    initial_state = dit.sample_noise(code.shape[0], num_codes * dit.repeats, generator=torch.Generator().manual_seed(2))
+    with torch.no_grad():
+        expected = baseline_sample(dit, conditioning, reference_mel, code, initial_state, 6, 0.5)
+    sampled = dit.sample(conditioning, reference_mel, code, num_steps=6, guidance_scale=0.5,
+                         initial_state=initial_state, solver="euler")
+    torch.testing.assert_close(sampled, expected, rtol=0, atol=0)
+
+
+ORDERS = {"euler": 1, "midpoint": 2, "heun": 2, "rk4": 4}
+
+
+def _decay(time_step, value):
+    # dx/dt = -2 t x, solved by x(t) = x(0) exp(-t^2)
+    return -2 * time_step * value
+
+
+@pytest.mark.parametrize("solver", list(ORDERS))
+def test_fixed_step_solvers_converge_at_their_order(solver):
+    initial_value = torch.tensor([1.0, -2.0, 0.5], dtype=torch.float64)
+    exact = initial_value * torch.exp(torch.tensor(-1.0, dtype=torch.float64))
+    errors = []
+    for num_steps in (8, 16, 32):
+        ode_solver = DIT_ODE_SOLVERS[solver](_decay, initial_value.clone())
+        value = ode_solver.integrate(torch.linspace(0, 1, num_steps + 1, dtype=torch.float64))
+        assert ode_solver.num_steps_taken == num_steps
+        errors.append((value - exact).abs().max().item())
+    for coarse, fine in zip(errors[:-1], errors[1:]):
+        assert coarse / fine > 0.8 * 2 ** ORDERS[solver]
+
+
+def test_adaptive_solver_meets_its_tolerance():
+    initial_value = torch.tensor([1.0, -2.0, 0.5], dtype=torch.float64)
+    exact = initial_value * torch.exp(torch.tensor(-1.0, dtype=torch.float64))
+    time_points = torch.linspace(0, 1, 3, dtype=torch.float64)
+    steps = []
+    for tolerance in (1e-2, 1e-4, 1e-6):
+        ode_solver = DIT_ODE_SOLVERS["adaptive_heun"](
+            _decay, initial_value.clone(), rtol=tolerance, atol=tolerance, max_steps=10000
+        )
+        value = ode_solver.integrate(time_points)
+        assert (value - exact).abs().max().item() < 10 * tolerance
+        steps.append(ode_solver.num_steps_taken)
+    assert steps == sorted(steps) and steps[0] < steps[-1]
+
+
+def test_seeded_sample_matches_the_baseline_noise():
+    # the baseline drew (batch, 30000, mel_dim) from the global generator and sliced it; for one clip that is the
+    # same stream as drawing exactly the frames needed
+    dit = tiny_25hz_decoder().dit
+    code, conditioning, reference_mel = tiny_25hz_inputs(13, batch_size=1)
+    torch.manual_seed(3)
+    initial_state = torch.randn([1, 30000, dit.mel_dim], dtype=reference_mel.dtype)[:, : 13 * dit.repeats]
+    with torch.no_grad():
+        expected = baseline_sample(dit, conditioning, reference_mel, code, initial_state, 6, 0.5)
+    sampled = dit.sample(conditioning, reference_mel, code, num_steps=6, guidance_scale=0.5,
+                         generator=torch.Generator().manual_seed(3))
+    torch.testing.assert_close(sampled, expected, rtol=0, atol=0)
+
+
+@pytest.mark.parametrize("apply_cfg", [True, False])
+def test_conditioning_reused_across_steps_matches_recomputing_it(dit, apply_cfg):
+    code, conditioning, reference_mel = tiny_25hz_inputs(13)
+    speaker_embedding = conditioning.unsqueeze(1).expand(-1, code.shape[1] * dit.repeats, -1)
+    generator = torch.Generator().manual_seed(2)
+    with torch.no_grad():
+        prepared = dit.prepare_conditioning(speaker_embedding, reference_mel, code, apply_cfg=apply_cfg)
+        for time_step in torch.linspace(0, 1, 4):
+            hidden_states = dit.sample_noise(code.shape[0], code.shape[1] * dit.repeats, generator=generator)
+            expected = dit(hidden_states, reference_mel, speaker_embedding, code, time_step, apply_cfg=apply_cfg)
+            reused = dit.denoise(hidden_states, time_step, prepared, apply_cfg=apply_cfg)
+            assert reused.shape[0] == code.shape[0] * (2 if apply_cfg else 1)
+            torch.testing.assert_close(reused, expected, rtol=0, atol=0)
@@ -0,0 +1,92 @@
+from dataclasses import asdict, replace
+
+import numpy as np
+import pytest
+import torch
+
+from qwen_tts import VoicePromptStore, load_voice_clone_prompt, save_voice_clone_prompt
+from tiny_models import tiny_prompt
+
+
+def assert_items_equal(actual, expected):
+    assert len(actual) == len(expected)
+    for a, b in zip(actual, expected):
+        assert (a.x_vector_only_mode, a.icl_mode, a.ref_text) == (b.x_vector_only_mode, b.icl_mode, b.ref_text)
+        assert torch.equal(a.ref_spk_embedding, b.ref_spk_embedding)
+        assert (a.ref_code is None) == (b.ref_code is None)
+        if a.ref_code is not None:
+            assert torch.equal(a.ref_code, b.ref_code)
+
+
+def assert_on_cpu(item):
+    assert item.ref_spk_embedding.device.type == "cpu"
+    assert item.ref_code is None or item.ref_code.device.type == "cpu"
+
+
+def test_safetensors_round_trip(tmp_path):
+    items = [tiny_prompt(8, seed=0), tiny_prompt(seed=1, icl=False)]
+    path = str(tmp_path / "prompt.safetensors")
+    save_voice_clone_prompt(items, path, metadata={"model_id": "tiny"})
+    assert_items_equal(load_voice_clone_prompt(path), items)
+
+
+def test_legacy_pt_files_are_loaded(tmp_path):
+    items = [tiny_prompt(8, seed=0), tiny_prompt(seed=1, icl=False)]
+    path = str(tmp_path / "prompt.pt")
+    torch.save({"items": [asdict(item) for item in items]}, path)
+    assert_items_equal(load_voice_clone_prompt(path), items)
+
+    torch.save({"items": []}, path)
+    with pytest.raises(ValueError):
+        load_voice_clone_prompt(path)
+
+
+def test_make_key_depends_on_every_input():
+    wav = np.zeros(100, dtype=np.float32)
+    key = VoicePromptStore.make_key(wav, 24000, "hi", False, "model")
+    assert key == VoicePromptStore.make_key(wav.astype(np.float64), 24000, "hi", False, "model")
+    others = [
+        VoicePromptStore.make_key(wav + 1, 24000, "hi", False, "model"),
+        VoicePromptStore.make_key(wav, 16000, "hi", False, "model"),
+        VoicePromptStore.make_key(wav, 24000, "ho", False, "model"),
+        VoicePromptStore.make_key(wav, 24000, "hi", True, "model"),
+        VoicePromptStore.make_key(wav, 24000, "hi", False, "other"),
+    ]
+    assert len({key, *others}) == 6
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = VoicePromptStore(max_items=2)
+    store.put("a", tiny_prompt(seed=0))
+    store.put("b", tiny_prompt(seed=1))
+    assert store.get("a") is not None  # "b" is now the least recently used
+    store.put("c", tiny_prompt(seed=2))
+    assert "b" not in store and store.get("b") is None
+    assert store.keys() == ["a", "c"]
+
+
+def test_disk_layer_survives_eviction_and_restarts(tmp_path):
+    store = VoicePromptStore(root_dir=str(tmp_path), max_items=1)
+    prompts = {key: tiny_prompt(seed=seed, icl=seed % 2 == 0) for seed, key in enumerate("abc")}
+    for key, item in prompts.items():
+        store.put(key, item)
+    assert list(store.items) == ["c"] and len(store) == 3
+    assert_items_equal([store.get("a")], [prompts["a"]])
+    assert list(store.items) == ["a"]
+
+    reopened = VoicePromptStore(root_dir=str(tmp_path), max_items=2)
+    assert reopened.preload() == 2 and len(reopened.items) == 2
+    assert reopened.preload(["c"]) == 1 and list(reopened.items)[-1] == "c"
+    for key, item in prompts.items():
+        loaded = reopened.get(key)
+        assert_on_cpu(loaded)
+        assert_items_equal([loaded], [item])
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="needs a GPU")
+def test_memory_and_disk_hits_are_both_on_the_cpu(tmp_path):
+    store = VoicePromptStore(root_dir=str(tmp_path))
+    item = tiny_prompt()
+    store.put("a", replace(item, ref_code=item.ref_code.cuda(), ref_spk_embedding=item.ref_spk_embedding.cuda()))
+    assert_on_cpu(store.get("a"))
+    assert_on_cpu(VoicePromptStore(root_dir=str(tmp_path)).get("a"))
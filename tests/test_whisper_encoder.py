@@ -0,0 +1,94 @@
+import pytest
+import torch
+import torch.nn.functional as F
+
+from qwen_tts.core.tokenizer_25hz.vq.speech_vq import WhisperEncoderVQ
+from qwen_tts.core.tokenizer_25hz.vq.whisper_encoder import (
+    MultiHeadAttention,
+    VarlenAttentionLayout,
+    WhisperEncoder,
+    get_T_after_cnn,
+)
+
+ENCODER_KWARGS = dict(n_mels=16, n_ctx=200, n_state=64, n_head=4, n_layer=2, n_window=20, output_dim=32)
+VQ_KWARGS = dict(
+    audio_vq_layers=1, audio_vq_type="GRVQ", audio_vq_codebook_size=32, audio_vq_codebook_dim=64, audio_vq_pe=True
+)
+# clips shorter than, equal to and spanning several `n_window * 2` mel splits
+MEL_LENGTHS = (120, 40, 87, 200, 7, 40, 8)
+
+
+def eager(encoder):
+    for block in encoder.blocks:
+        block.attn.use_flash_attention = False
+    return encoder.eval()
+
+
+def encoder_inputs(lengths=MEL_LENGTHS):
+    generator = torch.Generator().manual_seed(0)
+    mels = [torch.randn(ENCODER_KWARGS["n_mels"], n, generator=generator) for n in lengths]
+    aftercnn_lens = [get_T_after_cnn(n) for n in lengths]
+    return mels, list(lengths), aftercnn_lens, [n // 2 + 2 for n in aftercnn_lens]
+
+
+def one_by_one(encoder, mels, mel_lens, aftercnn_lens, seq_lens, **kwargs):
+    return [encoder([mel], [a], [b], [c], **kwargs) for mel, a, b, c in zip(mels, mel_lens, aftercnn_lens, seq_lens)]
+
+
+def test_varlen_attention_matches_per_sequence_attention():
+    torch.manual_seed(0)
+    n_state, n_head, lengths = 64, 4, [20, 20, 7, 20, 13, 1]
+    attn = MultiHeadAttention(n_state, n_head)
+    attn.use_flash_attention = False
+    x = torch.randn(sum(lengths), n_state)
+    layout = VarlenAttentionLayout(lengths)
+
+    q, k, v = attn.query(x), attn.key(x), attn.value(x)
+    outputs = []
+    for start, end in zip(layout.cu_seqlens[:-1].tolist(), layout.cu_seqlens[1:].tolist()):
+        heads = lambda t: t[start:end].view(end - start, n_head, -1).transpose(0, 1)
+        out = F.scaled_dot_product_attention(heads(q), heads(k), heads(v))
+        outputs.append(out.transpose(0, 1).reshape(end - start, n_state))
+    expected = attn.out(torch.cat(outputs))
+
+    with torch.no_grad():
+        torch.testing.assert_close(attn(x, cu_seqlens=layout.cu_seqlens, varlen_layout=layout), expected)
+        torch.testing.assert_close(attn(x, cu_seqlens=layout.cu_seqlens), expected)
+
+
+def test_conv_front_end_matches_per_split_convolution():
+    torch.manual_seed(0)
+    encoder = eager(WhisperEncoder(**ENCODER_KWARGS))
+    mels, *_ = encoder_inputs()
+    expected = []
+    with torch.no_grad():
+        for mel in mels:
+            for split in mel.split(encoder.n_window * 2, dim=1):
+                out = F.gelu(encoder.conv2(F.gelu(encoder.conv1(split)))).transpose(0, 1)
+                expected.append(out + encoder.positional_embedding[: out.shape[0]])
+        x, split_lens = encoder._conv_front_end(mels)
+    assert split_lens == [len(out) for out in expected]
+    torch.testing.assert_close(x, torch.cat(expected))
+
+
+def test_batched_encoder_matches_one_clip_at_a_time():
+    torch.manual_seed(0)
+    encoder = eager(WhisperEncoder(**ENCODER_KWARGS))
+    inputs = encoder_inputs()
+    with torch.no_grad():
+        batched = encoder(*inputs)
+        expected = torch.cat(one_by_one(encoder, *inputs))
+    assert batched.shape == (sum(inputs[3]), ENCODER_KWARGS["output_dim"])
+    torch.testing.assert_close(batched, expected)
+
+
+@pytest.mark.parametrize("audio_vq_ds_rate", [1, 2])
+def test_batched_vq_encoder_matches_one_clip_at_a_time(audio_vq_ds_rate):
+    torch.manual_seed(0)
+    encoder = eager(WhisperEncoderVQ(**ENCODER_KWARGS, **VQ_KWARGS, audio_vq_ds_rate=audio_vq_ds_rate))
+    inputs = encoder_inputs()
+    with torch.no_grad():
+        features, indices = encoder(*inputs, return_indices=True)
+        singles = one_by_one(encoder, *inputs, return_indices=True)
+    torch.testing.assert_close(features, torch.cat([f for f, _ in singles]))
+    assert torch.equal(indices.flatten(), torch.cat([i.flatten() for _, i in singles]))
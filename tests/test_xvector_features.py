@@ -0,0 +1,57 @@
+import numpy as np
+import torch
+import torchaudio.compliance.kaldi as kaldi
+
+from qwen_tts.core.tokenizer_25hz.vq.speech_vq import MelSpectrogramFeatures, XVectorExtractor, peak_normalize
+
+# ragged 16kHz clips: shorter than one 400-sample fbank window, exactly one window, partial last hops, equal lengths
+AUDIO_LENGTHS = (16000, 399, 400, 4321, 16000, 561, 12345)
+
+
+def random_audios(lengths=AUDIO_LENGTHS):
+    rng = np.random.default_rng(0)
+    return [(0.3 * rng.standard_normal(n)).astype(np.float32) for n in lengths]
+
+
+def padded_batch(audios):
+    waveforms = torch.nn.utils.rnn.pad_sequence([torch.from_numpy(audio) for audio in audios], batch_first=True)
+    return waveforms, torch.tensor([len(audio) for audio in audios])
+
+
+def test_peak_normalize_matches_per_clip_scaling():
+    for audio in random_audios():
+        normalized = peak_normalize(audio, db_level=-6)
+        assert normalized.dtype == np.float32 and normalized.shape == audio.shape
+        np.testing.assert_allclose(np.abs(normalized).max(), 10 ** (-6 / 20), rtol=1e-6)
+        np.testing.assert_allclose(normalized, audio * (10 ** (-6 / 20) / np.abs(audio).max()), rtol=1e-6)
+    silence = np.zeros(100, dtype=np.float32)
+    assert np.array_equal(peak_normalize(silence), silence)
+    assert peak_normalize(np.zeros(0, dtype=np.float32)).shape == (0,)
+
+
+def test_batched_fbank_matches_kaldi_fbank():
+    audios = [peak_normalize(audio) for audio in random_audios()]
+    feats, feat_lengths = XVectorExtractor.fbank(*padded_batch(audios))
+    assert feats.shape[0] == len(audios) and feats.shape[2] == 80
+    for audio, feat, n in zip(audios, feats, feat_lengths.tolist()):
+        if len(audio) < 400:
+            assert n == 0
+            continue
+        expected = kaldi.fbank(torch.from_numpy(audio)[None], num_mel_bins=80, dither=0, sample_frequency=16000)
+        expected = expected - expected.mean(dim=0, keepdim=True)
+        assert n == expected.shape[0]
+        torch.testing.assert_close(feat[:n], expected, atol=1e-4, rtol=1e-4)
+        assert not feat[n:].any()
+
+
+def test_batched_reference_mel_matches_one_clip_at_a_time():
+    mel_ext = MelSpectrogramFeatures()
+    # the unbatched path reflect-pads each clip, which needs more samples than the padding
+    padding = (mel_ext.filter_length - mel_ext.hop_length) // 2
+    audios = [peak_normalize(audio) for audio in random_audios() if len(audio) > padding]
+    waveforms, lengths = padded_batch(audios)
+    mels = mel_ext.extract(waveforms, lengths=lengths)
+    for audio, mel, n in zip(audios, mels, mel_ext.frame_lengths(lengths).tolist()):
+        expected = mel_ext.extract(torch.from_numpy(audio)[None])[0]
+        assert n == expected.shape[-1]
+        torch.testing.assert_close(mel[:, :n], expected, atol=1e-5, rtol=1e-5)
@@ -0,0 +1,147 @@
+"""Randomly initialised, tiny Qwen3-TTS models for the tests; no checkpoints are downloaded."""
+import torch
+
+from qwen_tts import Qwen3TTSModel, Qwen3TTSTokenizer, VoiceClonePromptItem
+from qwen_tts.core.models.configuration_qwen3_tts import Qwen3TTSConfig
+from qwen_tts.core.models.modeling_qwen3_tts import Qwen3TTSForConditionalGeneration
+from qwen_tts.core.tokenizer_12hz.configuration_qwen3_tts_tokenizer_v2 import Qwen3TTSTokenizerV2Config
+from qwen_tts.core.tokenizer_12hz.modeling_qwen3_tts_tokenizer_v2 import Qwen3TTSTokenizerV2Model
+from qwen_tts.core.tokenizer_25hz.configuration_qwen3_tts_tokenizer_v1 import Qwen3TTSTokenizerV1DecoderConfig
+from qwen_tts.core.tokenizer_25hz.modeling_qwen3_tts_tokenizer_v1 import Qwen3TTSTokenizerV1Decoder
+
+NUM_CODE_GROUPS = 4
+CODEBOOK_SIZE = 64
+VOCAB_SIZE = 1024 + CODEBOOK_SIZE
+EOS_TOKEN_ID = 1034
+SPEAKER = "a"
+
+
+def tiny_config(attn_implementation="sdpa", model_type="base", **talker_kwargs):
+    talker = dict(
+        vocab_size=VOCAB_SIZE, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=2, head_dim=8,
+        rope_scaling={"mrope_section": [2, 1, 1], "interleaved": True, "rope_type": "default"},
+        num_code_groups=NUM_CODE_GROUPS, text_hidden_size=24, text_vocab_size=200,
+        codec_eos_token_id=EOS_TOKEN_ID, codec_think_id=1035, codec_nothink_id=1036, codec_think_bos_id=1037,
+        codec_think_eos_id=1038, codec_pad_id=1039, codec_bos_id=1040,
+        spk_id={SPEAKER: 1041}, spk_is_dialect={SPEAKER: False},
+        codec_language_id={"english": 1042, "chinese": 1043},
+        code_predictor_config=dict(
+            vocab_size=CODEBOOK_SIZE, hidden_size=16, intermediate_size=32, num_hidden_layers=2,
+            num_attention_heads=2, num_key_value_heads=1, head_dim=8, num_code_groups=NUM_CODE_GROUPS,
+        ),
+    )
+    talker.update(talker_kwargs)
+    config = Qwen3TTSConfig(
+        talker_config=talker,
+        speaker_encoder_config=dict(
+            mel_dim=128, enc_dim=32, enc_channels=[16, 16, 16, 16, 48], enc_attention_channels=8,
+            enc_res2net_scale=4, enc_se_channels=8,
+        ),
+        tokenizer_type="qwen3_tts_tokenizer_12hz", tts_model_size="0b6", tts_model_type=model_type,
+        tts_pad_token_id=190, tts_bos_token_id=191, tts_eos_token_id=192,
+    )
+    config._attn_implementation = attn_implementation
+    config.talker_config._attn_implementation = attn_implementation
+    config.talker_config.code_predictor_config._attn_implementation = attn_implementation
+    return config
+
+
+def tiny_model(attn_implementation="sdpa", model_type="base", seed=0, eos_scale=2.0, **talker_kwargs):
+    """A tiny talker with weights drawn from `seed`. `eos_scale` sharpens the eos logit so sequences end early."""
+    torch.manual_seed(seed)
+    model = Qwen3TTSForConditionalGeneration(tiny_config(attn_implementation, model_type, **talker_kwargs)).eval()
+    with torch.no_grad():
+        for p in model.parameters():
+            p.normal_(0, 0.3)
+        model.talker.codec_head.weight[EOS_TOKEN_ID] *= eos_scale
+    return model
+
+
+def tiny_tokenizer_model(seed=0):
+    torch.manual_seed(seed)
+    config = Qwen3TTSTokenizerV2Config(
+        encoder_config=dict(
+            hidden_size=32, num_hidden_layers=1, num_attention_heads=4, num_key_value_heads=4, head_dim=8,
+            intermediate_size=64, codebook_size=CODEBOOK_SIZE, codebook_dim=16, num_filters=8,
+            upsampling_ratios=[8, 6, 5, 4], num_quantizers=NUM_CODE_GROUPS, sliding_window=50, frame_rate=12.5,
+            sampling_rate=24000, upsample_groups=32,
+        ),
+        decoder_config=dict(
+            codebook_size=CODEBOOK_SIZE, hidden_size=32, latent_dim=32, num_attention_heads=4,
+            num_key_value_heads=4, sliding_window=8, intermediate_size=48, num_hidden_layers=2,
+            num_quantizers=NUM_CODE_GROUPS, upsample_rates=(8, 5, 4, 3), upsampling_ratios=(2, 2), decoder_dim=32,
+            codebook_dim=16,
+        ),
+        encoder_valid_num_quantizers=NUM_CODE_GROUPS,
+    )
+    model = Qwen3TTSTokenizerV2Model(config).eval()
+    with torch.no_grad():
+        for p in model.decoder.parameters():
+            p.normal_(0, 0.1)
+    return model
+
+
+def tiny_25hz_decoder(seed=0):
+    """A tiny 25Hz DiT + BigVGAN decoder (8-frame DiT blocks, 2 mel frames per code)."""
+    torch.manual_seed(seed)
+    config = Qwen3TTSTokenizerV1DecoderConfig(
+        dit_config=dict(
+            hidden_size=64, num_hidden_layers=4, num_attention_heads=4, head_dim=16, emb_dim=32, block_size=8,
+            look_ahead_layers=[2], look_backward_layers=[0, 3], num_embeds=100, enc_channels=[32, 32, 32, 32, 96],
+            enc_dim=16, enc_emb_dim=16, enc_attention_channels=8, enc_se_channels=8, dropout=0.0, mel_dim=80,
+        ),
+        bigvgan_config=dict(
+            mel_dim=80, upsample_initial_channel=64, upsample_rates=[5, 4, 2], upsample_kernel_sizes=[11, 8, 4],
+            resblock_kernel_sizes=[3, 7], resblock_dilation_sizes=[[1, 3, 5], [1, 3, 5]],
+        ),
+    )
+    decoder = Qwen3TTSTokenizerV1Decoder._from_config(config, attn_implementation="sdpa").eval()
+    # strong random weights so that information actually travels across blocks
+    with torch.no_grad():
+        for p in decoder.dit.parameters():
+            if p.dim() > 1:
+                p.normal_(0, 2.0 / p.shape[-1] ** 0.5)
+    return decoder
+
+
+def tiny_25hz_inputs(num_codes=120, batch_size=2, seed=1):
+    """Codes, x-vector conditioning and reference mel for `tiny_25hz_decoder`."""
+    torch.manual_seed(seed)
+    return torch.randint(0, 99, (batch_size, num_codes)), torch.randn(batch_size, 16), torch.randn(batch_size, 40, 80)
+
+
+def tiny_speech_tokenizer(seed=0):
+    tokenizer = Qwen3TTSTokenizer()
+    tokenizer.model = tiny_tokenizer_model(seed)
+    tokenizer.config = tokenizer.model.config
+    tokenizer.device = torch.device("cpu")
+    return tokenizer
+
+
+class CharProcessor:
+    """Stands in for the text processor: one token per character."""
+
+    def __call__(self, text, return_tensors="pt", padding=True):
+        return {"input_ids": torch.tensor([[(ord(c) * 7) % 180 for c in text]])}
+
+
+def tiny_tts(attn_implementation="sdpa", model_type="base", seed=0, max_new_tokens=30, **model_kwargs):
+    model = tiny_model(attn_implementation, model_type, seed, **model_kwargs)
+    model.load_speech_tokenizer(tiny_speech_tokenizer())
+    return Qwen3TTSModel(model, CharProcessor(), {"max_new_tokens": max_new_tokens})
+
+
+def tiny_prompt(num_frames=10, seed=3, icl=True):
+    generator = torch.Generator().manual_seed(seed)
+    return VoiceClonePromptItem(
+        ref_code=torch.randint(0, CODEBOOK_SIZE, (num_frames, NUM_CODE_GROUPS), generator=generator) if icl else None,
+        ref_spk_embedding=torch.randn(32, generator=generator),
+        x_vector_only_mode=not icl,
+        icl_mode=icl,
+        ref_text="hello there",
+    )
+
+
+def voice_clone_inputs(tts, texts, prompts):
+    return tts._prepare_voice_clone_inputs(text=texts, language=["English"] * len(texts), voice_clone_prompt=prompts)